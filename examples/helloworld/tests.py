@@ -1,4 +1,8 @@
 '''Tests the "helloworld" example.'''
+import os
+import shutil
+import asyncio
+import tempfile
 import unittest
 
 from pulsar import SERVER_SOFTWARE
@@ -57,3 +61,48 @@ class TestHelloWorldThread(unittest.TestCase):
 @dont_run_with_thread
 class TestHelloWorldProcess(TestHelloWorldThread):
     concurrency = 'process'
+
+
+@dont_run_with_thread
+class TestHelloWorldReusePort(TestHelloWorldThread):
+    concurrency = 'process'
+
+    @classmethod
+    async def setUpClass(cls):
+        await run_test_server(cls, server, reuse_port=True, workers=2)
+        cls.client = HttpClient()
+
+    async def test_reserved(self):
+        monitor = get_actor().get_actor(self.app_cfg.name)
+        self.assertFalse(monitor.servers)
+        reserved = monitor.extra['reuse_port']
+        sock = reserved[self.app_cfg.name][0]
+        self.assertEqual(sock.getsockname(), self.app_cfg.addresses[0])
+
+
+class TestHelloWorldUnix(unittest.TestCase):
+    app_cfg = None
+    concurrency = 'thread'
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        bind = 'unix:%s' % os.path.join(cls.tmpdir, 'hello.sock')
+        await run_test_server(cls, server, bind=bind)
+
+    @classmethod
+    async def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            await send('arbiter', 'kill_actor', cls.app_cfg.name)
+        shutil.rmtree(cls.tmpdir)
+
+    async def testResponse(self):
+        path = self.app_cfg.addresses[0]
+        self.assertEqual(path, os.path.join(self.tmpdir, 'hello.sock'))
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        headers = await reader.readuntil(b'\r\n\r\n')
+        self.assertTrue(headers.startswith(b'HTTP/1.1 200 OK\r\n'))
+        self.assertTrue(b'Content-Length: 13\r\n' in headers)
+        self.assertEqual(await reader.readexactly(13), b'Hello World!\n')
+        writer.close()
@@ -90,6 +90,22 @@ class TestWebSocket(unittest.TestCase):
         message = await handler.get()
         self.assertEqual(message, 'Hi there!')
 
+    async def test_permessage_deflate(self):
+        c = self.http()
+        handler = Echo(c._loop)
+        offer = 'permessage-deflate; client_max_window_bits'
+        ws = await c.get(self.ws_echo, websocket_handler=handler,
+                         headers=[('Sec-WebSocket-Extensions', offer)])
+        response = ws.handshake
+        self.assertEqual(response.status_code, 101)
+        self.assertEqual(response.headers['sec-websocket-extensions'],
+                         'permessage-deflate')
+        message = 'Hi there! ' * 100
+        ws.write(message)
+        self.assertEqual(await handler.get(), message)
+        ws.write(message)
+        self.assertEqual(await handler.get(), message)
+
     async def test_ping(self):
         c = self.http()
         handler = Echo(c._loop)
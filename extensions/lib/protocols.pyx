@@ -53,6 +53,10 @@ cdef class Producer(EventHandler):
         self._loop = loop or asyncio.get_event_loop()
         self.time = TimeTracker.register(self._loop)
 
+    @property
+    def current_time(self):
+        return self.time.current_time
+
     cpdef Protocol create_protocol(self):
         """Create a new protocol via the :meth:`protocol_factory`
         This method increase the count of :attr:`sessions` and build
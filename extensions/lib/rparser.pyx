@@ -4,11 +4,11 @@ import cython
 
 cdef class Task
 
-cdef bytes RESPONSE_INTEGER  = b':'
-cdef bytes RESPONSE_STRING  = b'$'
-cdef bytes RESPONSE_ARRAY = b'*'
-cdef bytes RESPONSE_STATUS = b'+'
-cdef bytes RESPONSE_ERROR = b'-'
+cdef int RESPONSE_INTEGER  = ord(b':')
+cdef int RESPONSE_STRING  = ord(b'$')
+cdef int RESPONSE_ARRAY = ord(b'*')
+cdef int RESPONSE_STATUS = ord(b'+')
+cdef int RESPONSE_ERROR = ord(b'-')
 cdef bytes nil = b'$-1\r\n'
 cdef bytes null_array = b'*-1\r\n'
 
@@ -17,13 +17,15 @@ cdef class RedisParser:
     cdef object _protocolError
     cdef object _responseError
     cdef object _encoding
-    cdef object _inbuffer
+    cdef bytearray _inbuffer
+    cdef Py_ssize_t _offset
     cdef Task _current
 
     def __cinit__(self, object perr, object rerr):
         self._protocolError = perr
         self._responseError = rerr
         self._inbuffer = bytearray()
+        self._offset = 0
 
     def on_connect(self, connection):
         if connection.decode_responses:
@@ -39,11 +41,22 @@ cdef class RedisParser:
         else:
             return self._get(None)
 
+    def get_all(self):
+        cdef list messages = []
+        message = self.get()
+        while message is not False:
+            messages.append(message)
+            message = self.get()
+        return messages
+
     def feed(self, stream):
+        if self._offset:
+            del self._inbuffer[:self._offset]
+            self._offset = 0
         self._inbuffer.extend(stream)
 
     def buffer(self):
-        return self._inbuffer
+        return bytes(self._inbuffer[self._offset:])
 
     # CLIENT ENCODERS
     def pack_command(self, args):
@@ -114,11 +127,14 @@ cdef class RedisParser:
             yield v
 
     cdef object _get(self, Task next):
-        b = self._inbuffer
-        cdef int length = b.find(b'\r\n')
+        cdef bytearray b = self._inbuffer
+        cdef Py_ssize_t offset = self._offset
+        cdef Py_ssize_t length = b.find(b'\r\n', offset)
+        cdef int rtype
         if length >= 0:
-            self._inbuffer, response = b[length+2:], bytes(b[:length])
-            rtype, response = response[:1], response[1:]
+            self._offset = length + 2
+            rtype = b[offset] if length > offset else 0
+            response = bytes(b[offset+1:length])
             if rtype == RESPONSE_ERROR:
                 return self._responseError(response.decode('utf-8'))
             elif rtype == RESPONSE_INTEGER:
@@ -134,6 +150,7 @@ cdef class RedisParser:
             else:
                 # Clear the buffer and raise
                 self._inbuffer = bytearray()
+                self._offset = 0
                 raise self._protocolError('Protocol Error')
         else:
             return False
@@ -157,12 +174,16 @@ cdef class Task:
 
     cdef object decode(self, RedisParser parser, object result):
         cdef long length = self._length
+        cdef Py_ssize_t start, end
         cdef bytes chunk
         parser._current = None
         if length >= 0:
             b = parser._inbuffer
-            if len(b) >= length+2:
-                parser._inbuffer, chunk = b[length+2:], bytes(b[:length])
+            start = parser._offset
+            end = start + length
+            if len(b) >= end+2:
+                parser._offset = end + 2
+                chunk = bytes(b[start:end])
                 if parser._encoding:
                     return chunk.decode(parser._encoding)
                 else:
@@ -2,6 +2,8 @@
 #define     __PULSAR_WEBSOCKET__
 
 #include <Python.h>
+#include <stdint.h>
+#include <string.h>
 
 
 PyObject* websocket_mask(const char* chunk, const char* key,
@@ -13,7 +15,19 @@ PyObject* websocket_mask(const char* chunk, const char* key,
         return NULL;
     }
     buf = PyBytes_AS_STRING(result);
-    for (i = 0; i < chunk_length; i++) {
+    i = 0;
+    if (mask_length == 4) {
+        // XOR eight bytes at a time with the key repeated twice
+        uint64_t key8, word;
+        memcpy(&key8, key, 4);
+        memcpy((char*)&key8 + 4, key, 4);
+        for (; i + 8 <= chunk_length; i += 8) {
+            memcpy(&word, chunk + i, 8);
+            word ^= key8;
+            memcpy(buf + i, &word, 8);
+        }
+    }
+    for (; i < chunk_length; i++) {
         buf[i] = chunk[i] ^ key[i % mask_length];
     }
     return result;
@@ -7,7 +7,7 @@ from websocket cimport websocket_mask, to_bytes
 
 cdef class Frame:
     cdef readonly:
-        int opcode, payload_length
+        int opcode, payload_length, rsv1
         bytes masking_key
         bint final
         object body
@@ -58,6 +58,7 @@ cdef class FrameParser:
 
     cdef Frame frame
     cdef object buffer
+    cdef Py_ssize_t _offset
     cdef object ProtocolError
     cdef tuple _opcodes
     cdef object _close_codes
@@ -68,6 +69,7 @@ cdef class FrameParser:
         self.kind = kind
         self.frame = None
         self.buffer = bytearray()
+        self._offset = 0
         self.ProtocolError = ProtocolError
         self._opcodes = (0, 1, 2, 8, 9, 10)
         self.encode_mask_length = 0
@@ -118,6 +120,8 @@ cdef class FrameParser:
         cdef bytes data
         cdef int fin = 1 if final else 0
         opcode, masking_key, data = self._info(message, opcode, masking_key)
+        if self.extensions:
+            rsv1, data = self._send(opcode, final, data, rsv1)
         return self._encode(data, opcode, masking_key, fin,
                             rsv1, rsv2, rsv3)
 
@@ -133,6 +137,8 @@ cdef class FrameParser:
         cdef int fin
         max_payload = max(2, max_payload or 1 << 63)
         opcode, masking_key, data = self._info(message, opcode, masking_key)
+        if self.extensions:
+            rsv1, data = self._send(opcode, True, data, rsv1)
         #
         while data:
             if len(data) >= max_payload:
@@ -142,19 +148,28 @@ cdef class FrameParser:
                 chunk, data, fin = data, b'', 1
             yield self._encode(chunk, opcode, masking_key, fin,
                                rsv1, rsv2, rsv3)
+            # following frames are continuation frames without rsv1
+            opcode = rsv1 = 0
 
     cpdef decode(self, bytes data=None):
         cdef int fin, rsv1, rsv2, rsv3, opcode, payload_length
         cdef Frame frame = self.frame
         cdef int mask_length = self.decode_mask_length
         cdef bytes chunk
+        cdef char* buf
+        cdef Py_ssize_t start
         #
         if data:
+            if self._offset:
+                # removing from the front of a bytearray does not copy
+                del self.buffer[:self._offset]
+                self._offset = 0
             self.buffer.extend(data)
         if frame is None:
-            if len(self.buffer) < 2:
+            if self._available() < 2:
                 return
-            first_byte, second_byte = unpack("BB", self.buffer[:2])
+            first_byte, second_byte = unpack(
+                "BB", self.buffer[self._offset:self._offset+2])
             fin = (first_byte >> 7) & 1
             rsv1 = (first_byte >> 6) & 1
             rsv2 = (first_byte >> 5) & 1
@@ -162,6 +177,8 @@ cdef class FrameParser:
             opcode = first_byte & 0xf
             if fin not in (0, 1):
                 raise self.ProtocolError('FIN must be 0 or 1')
+            if rsv1 and not self.extensions:
+                raise self.ProtocolError('RSV1 set without extensions')
             if bool(mask_length) != bool(second_byte & 0x80):
                 if mask_length:
                     raise self.ProtocolError('unmasked client frame.')
@@ -179,34 +196,40 @@ cdef class FrameParser:
                         'WEBSOCKET control frame fragmented')
             chunk = self._chunk(2)
             self.frame = frame = Frame(opcode, <bint>fin, payload_length)
+            frame.rsv1 = rsv1
 
         if frame.masking_key is None:
             if frame.payload_length == 126:
-                if len(self.buffer) < 2 + mask_length:  # 2 + 4 for mask
+                if self._available() < 2 + mask_length:  # 2 + 4 for mask
                     return
                 chunk = self._chunk(2)
                 frame.payload_length = unpack("!H", chunk)[0]
             elif frame.payload_length == 127:
-                if len(self.buffer) < 8 + mask_length:  # 8 + 4 for mask
+                if self._available() < 8 + mask_length:  # 8 + 4 for mask
                     return
                 chunk = self._chunk(8)
                 frame.payload_length = unpack("!Q", chunk)[0]
-            elif len(self.buffer) < mask_length:
+            elif self._available() < mask_length:
                 return
             if mask_length:
                 frame.set_masking_key(self._chunk(mask_length))
             else:
                 frame.set_masking_key(b'')
 
-        if len(self.buffer) >= frame.payload_length:
+        if self._available() >= frame.payload_length:
             self.frame = None
-            chunk = self._chunk(frame.payload_length)
+            start = self._offset
+            self._offset += frame.payload_length
+            buf = self.buffer
+            if frame.masking_key:
+                chunk = websocket_mask(buf + start, frame.masking_key,
+                                       frame.payload_length,
+                                       len(frame.masking_key))
+            else:
+                chunk = buf[start:self._offset]
             if self.extensions:
                 for extension in self.extensions:
-                    chunk = extension.receive(frame, self.buffer)
-            if frame.masking_key:
-                chunk = websocket_mask(chunk, frame.masking_key,
-                                       len(chunk), len(frame.masking_key))
+                    chunk = extension.receive(frame, chunk)
             if frame.opcode == 1:
                 frame.set_body(chunk.decode("utf-8", "replace"))
             else:
@@ -261,7 +284,17 @@ cdef class FrameParser:
                 pass
         return opcode, masking_key, data
 
+    cdef tuple _send(self, int opcode, bint final, bytes data, int rsv1):
+        cdef int bit
+        for extension in self.extensions:
+            bit, data = extension.send(opcode, final, data)
+            rsv1 |= bit
+        return rsv1, data
+
+    cdef inline Py_ssize_t _available(self):
+        return len(self.buffer) - self._offset
+
     cdef bytes _chunk(self, int length):
-        cdef bytes chunk = bytes(self.buffer[:length])
-        self.buffer = self.buffer[length:]
-        return chunk
+        cdef Py_ssize_t start = self._offset
+        self._offset += length
+        return bytes(self.buffer[start:self._offset])
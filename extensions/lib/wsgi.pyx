@@ -46,6 +46,9 @@ cdef class WsgiProtocol:
     def __cinit__(self, object protocol, object cfg, object FileWrapper):
         cdef object connection = protocol.connection
         cdef object server_address = connection.transport.get_extra_info('sockname')
+        if not isinstance(server_address, tuple):
+            # unix domain socket
+            server_address = (server_address, '')
         self.environ = {
             'wsgi.async': True,
             'wsgi.timestamp': connection.producer.time.current_time,
@@ -69,6 +72,8 @@ cdef class WsgiProtocol:
         self.protocol = protocol
         self.connection = connection
         self.client_address = connection.address
+        if not isinstance(self.client_address, tuple):
+            self.client_address = (self.client_address or '', '')
         self.parser = protocol.create_parser(self)
         self.header_wsgi = Headers()
 
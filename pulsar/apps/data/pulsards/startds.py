@@ -33,7 +33,7 @@ async def start_store(app, url, workers=0, **kw):
         client = store.client()
         try:
             await client.ping()
-        except ConnectionRefusedError:
+        except (ConnectionRefusedError, FileNotFoundError):
             host = localhost(store._host)
             if not host:
                 raise
@@ -49,6 +49,8 @@ def localhost(host):
     if isinstance(host, tuple):
         if host[0] in ('127.0.0.1', ''):
             return ':'.join((str(b) for b in host))
+    elif host and host.startswith('/'):
+        return 'unix:%s' % host
     else:
         return host
 
@@ -25,6 +25,20 @@ Redis Pipeline
 .. autoclass:: pulsar.apps.data.redis.client.Pipeline
    :members:
    :member-order: bysource
+
+Multiplexing
+~~~~~~~~~~~~~~~
+
+By default each command borrows a connection from the store pool for the
+duration of the request. When the store is created with ``multiplex=True``
+(``redis://127.0.0.1:6379/0?multiplex=true``) commands issued by concurrent
+coroutines share one connection instead and are written together once per
+event loop iteration. Blocking commands delay all other commands of a
+multiplexed store, use a separate store for them.
+
+.. autoclass:: pulsar.apps.data.redis.client.Multiplexer
+   :members:
+   :member-order: bysource
 '''
 from ....utils.config import Global
 from ..store import register_store
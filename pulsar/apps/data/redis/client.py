@@ -1,4 +1,5 @@
 from itertools import chain
+from collections import deque
 import datetime
 
 from ....asynclib.protocols import Connection
@@ -90,6 +91,16 @@ def values_to_zset(response, withscores=False, **kw):
         return response
 
 
+def scan_callback(response, scores=False, pairs=False):
+    cursor, values = response
+    if pairs:
+        values = pairs_to_object(values)
+    elif scores:
+        it = iter(values)
+        values = [(member, float(score)) for member, score in zip(it, it)]
+    return int(cursor), values
+
+
 def sort_return_tuples(response, groups=None, **options):
     """
     If ``groups`` is specified, return the response as a list of
@@ -145,6 +156,7 @@ class Consumer(ProtocolConsumer):
             lambda r: r == b'OK'
         ),
         string_keys_to_dict('SORT', sort_return_tuples),
+        string_keys_to_dict('SCAN SSCAN HSCAN ZSCAN', scan_callback),
         string_keys_to_dict('BLPOP BRPOP', lambda r: r and tuple(r) or None),
         string_keys_to_dict('SMEMBERS SDIFF SINTER SUNION', set),
         string_keys_to_dict('INCRBYFLOAT HINCRBYFLOAT ZINCRBY ZSCORE',
@@ -195,28 +207,159 @@ class Consumer(ProtocolConsumer):
                     self.event('post_request').fire(data=response)
             else:   # pipeline
                 commands, raise_on_error, responses = request
-                while response is not False:
+                if response is not False:
                     responses.append(response)
-                    response = parser.get()
+                    responses.extend(parser.get_all())
                 if len(responses) == len(commands):
-                    error = None
-                    result = responses[-1]
-                    response = []
-                    if isinstance(result, Exception):
-                        error = result
-                        result = responses[1:-1]
-                    for cmds, resp in zip(commands[1:-1], result):
-                        args, options = cmds
-                        if isinstance(resp, Exception) and not error:
-                            error = resp
-                        resp = self.parse_response(resp, args[0], options)
-                        response.append(resp)
-                    if error and raise_on_error:
-                        response = ResponseError(error)
+                    response = self.pipeline_response(commands,
+                                                      raise_on_error,
+                                                      responses)
                     self.event('post_request').fire(data=response)
         except Exception as exc:
             self.event('post_request').fire(exc=exc)
 
+    def pipeline_response(self, commands, raise_on_error, responses):
+        error = None
+        result = responses[-1]
+        response = []
+        if isinstance(result, Exception):
+            error = result
+            result = responses[1:-1]
+        for cmds, resp in zip(commands[1:-1], result):
+            args, options = cmds
+            if isinstance(resp, Exception) and not error:
+                error = resp
+            resp = self.parse_response(resp, args[0], options)
+            response.append(resp)
+        if error and raise_on_error:
+            response = ResponseError(error)
+        return response
+
+
+class MultiplexedConsumer(Consumer):
+    '''The consumer of a multiplexed connection.
+
+    It lives as long as the connection and matches replies, in order,
+    with the :attr:`waiters` of the commands written.
+    '''
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.waiters = deque()
+        self.event('post_request').bind(self._connection_lost)
+
+    def start_request(self):
+        pass
+
+    def feed_data(self, data):
+        parser = self.connection.parser
+        parser.feed(data)
+        waiters = self.waiters
+        for response in parser.get_all():
+            future, request = waiters[0]
+            if len(request) == 2:
+                if isinstance(response, Exception):
+                    response = ResponseError(response)
+                else:
+                    response = self.parse_response(response, request[0][0],
+                                                   request[1])
+            else:
+                commands, raise_on_error, responses = request
+                responses.append(response)
+                if len(responses) < len(commands):
+                    continue
+                response = self.pipeline_response(commands, raise_on_error,
+                                                  responses)
+            waiters.popleft()
+            if not future.done():
+                future.set_result(response)
+
+    def _connection_lost(self, _, exc=None):
+        exc = exc or ConnectionResetError('Connection lost')
+        while self.waiters:
+            future = self.waiters.popleft()[0]
+            if not future.done():
+                future.set_exception(exc)
+
+
+class Multiplexer:
+    '''Execute commands from concurrent coroutines over one connection.
+
+    Commands issued during the same event loop iteration are written to
+    the connection in one go and their replies are matched, in order,
+    by a :class:`MultiplexedConsumer`.
+    '''
+    def __init__(self, store):
+        self.store = store
+        self._loop = store._loop
+        self._connection = None
+        self._connecting = False
+        self._requests = []
+        self._flush_handle = None
+
+    async def execute(self, *args, **options):
+        return await self._request((args, options))
+
+    async def execute_pipeline(self, commands, raise_on_error=True):
+        return await self._request((commands, raise_on_error, []))
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            return connection.close()
+
+    #    INTERNALS
+    async def _request(self, request):
+        future = self._loop.create_future()
+        self._requests.append((future, request))
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_soon(self._flush)
+        result = await future
+        if isinstance(result, ResponseError):
+            raise result.exception
+        return result
+
+    def _flush(self):
+        self._flush_handle = None
+        connection = self._connection
+        if connection is None:
+            if not self._connecting:
+                self._connecting = True
+                self._loop.create_task(self._connect())
+            return
+        requests, self._requests = self._requests, []
+        parser = connection.parser
+        waiters = connection.current_consumer().waiters
+        chunks = []
+        for future, request in requests:
+            if future.done():
+                continue
+            if len(request) == 2:
+                chunks.append(parser.pack_command(request[0]))
+            else:
+                chunks.append(parser.pack_pipeline(request[0]))
+            waiters.append((future, request))
+        if chunks:
+            connection.write(b''.join(chunks))
+
+    async def _connect(self):
+        try:
+            connection = await self.store.connect()
+        except Exception as exc:
+            requests, self._requests = self._requests, []
+            for future, _ in requests:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            connection.upgrade(MultiplexedConsumer)
+            connection.event('connection_lost').bind(self._connection_lost)
+            self._connection = connection
+            self._flush()
+        finally:
+            self._connecting = False
+
+    def _connection_lost(self, _, exc=None):
+        self._connection = None
+
 
 class RedisClient:
     '''Client for :class:`.RedisStore`.
@@ -300,7 +443,23 @@ class RedisClient:
             pieces.append('XX')
         return self.execute('set', *pieces)
 
+    # KEYS
+    def scan(self, cursor=0, match=None, count=None, type=None):
+        '''Incrementally iterate over keys.
+
+        Return a two elements tuple with the next ``cursor``, ``0`` when
+        the iteration is over, and a list of keys.
+        '''
+        pieces = self._scan_pieces(cursor, match, count)
+        if type:
+            pieces.extend(('TYPE', type))
+        return self.execute('scan', *pieces)
+
     # HASHES
+    def hscan(self, key, cursor=0, match=None, count=None):
+        pieces = self._scan_pieces(cursor, match, count)
+        return self.execute('hscan', key, *pieces, pairs=True)
+
     def hmget(self, key, *fields):
         return self.execute('hmget', key, *fields, fields=fields)
 
@@ -335,7 +494,16 @@ class RedisClient:
             timeout = 0
         return self.execute_command('BRPOPLPUSH', src, dst, timeout)
 
+    # SETS
+    def sscan(self, key, cursor=0, match=None, count=None):
+        pieces = self._scan_pieces(cursor, match, count)
+        return self.execute('sscan', key, *pieces)
+
     # SORTED SETS
+    def zscan(self, key, cursor=0, match=None, count=None):
+        pieces = self._scan_pieces(cursor, match, count)
+        return self.execute('zscan', key, *pieces, scores=True)
+
     def zadd(self, name, *args, **kwargs):
         """
         Set any number of score, element-name pairs to the key ``name``. Pairs
@@ -508,6 +676,14 @@ class RedisClient:
             raise AttributeError("'%s' object has no attribute '%s'" %
                                  (type(self), name))
 
+    def _scan_pieces(self, cursor, match, count):
+        pieces = [cursor]
+        if match is not None:
+            pieces.extend(('MATCH', match))
+        if count is not None:
+            pieces.extend(('COUNT', count))
+        return pieces
+
     def _eval(self, command, script, keys, args):
         all_args = keys if keys is not None else ()
         num_keys = len(all_args)
@@ -2,9 +2,11 @@ from functools import partial
 
 from ....asynclib.clients import Pool
 from ....utils.string import to_string
+from ....utils.config import validate_bool
 from ..store import RemoteStore
 
-from .client import RedisClient, Pipeline, Consumer, RedisStoreConnection
+from .client import (RedisClient, Pipeline, Consumer, RedisStoreConnection,
+                     Multiplexer)
 from .pubsub import RedisPubSub, RedisChannels
 
 
@@ -14,12 +16,16 @@ class RedisStore(RemoteStore):
     supported_queries = frozenset(('filter', 'exclude'))
 
     def _init(self, namespace=None, pool_size=10,
-              decode_responses=False, **kwargs):
+              decode_responses=False, multiplex=False, **kwargs):
         self.protocol_factory = partial(RedisStoreConnection, Consumer)
         self._decode_responses = decode_responses
         if namespace:
             self._urlparams['namespace'] = namespace
         self._pool = Pool(self.connect, pool_size=pool_size, loop=self._loop)
+        self._multiplexer = None
+        if validate_bool(multiplex):
+            self._urlparams['multiplex'] = 'true'
+            self._multiplexer = Multiplexer(self)
         if self._database is None:
             self._database = 0
         self._database = int(self._database)
@@ -57,12 +63,17 @@ class RedisStore(RemoteStore):
         return self.client().ping()
 
     async def execute(self, *args, **options):
+        if self._multiplexer:
+            return await self._multiplexer.execute(*args, **options)
         connection = await self._pool.connect()
         async with connection:
             result = await connection.execute(*args, **options)
             return result
 
     async def execute_pipeline(self, commands, raise_on_error=True):
+        if self._multiplexer:
+            return await self._multiplexer.execute_pipeline(commands,
+                                                            raise_on_error)
         conn = await self._pool.connect()
         async with conn:
             result = await conn.execute_pipeline(commands, raise_on_error)
@@ -74,6 +85,9 @@ class RedisStore(RemoteStore):
             host, port = self._host
             transport, connection = await self._loop.create_connection(
                 protocol_factory, host, port)
+        elif self._host:
+            transport, connection = await self._loop.create_unix_connection(
+                protocol_factory, self._host)
         else:
             raise NotImplementedError('Could not connect to %s' %
                                       str(self._host))
@@ -88,6 +102,8 @@ class RedisStore(RemoteStore):
 
     def close(self):
         '''Close all open connections.'''
+        if self._multiplexer:
+            self._multiplexer.close()
         return self._pool.close()
 
     def has_query(self, query_type):
@@ -162,12 +162,19 @@ class Store(metaclass=ABCMeta):
             raise ImproperlyConfigured('password but not user')
             assert self._password
         host = self._host
+        path = '/%s' % self._database if self._database else ''
+        self._urlparams.update(kw)
+        params = self._urlparams
         if isinstance(host, tuple):
             host = '%s:%s' % host
+        elif host and host.startswith('/'):
+            # unix domain socket, the database is a query parameter
+            if path:
+                params = params.copy()
+                params['database'] = self._database
+            host, path = 'unix:', host
         host = '%s%s' % (pre, host)
-        path = '/%s' % self._database if self._database else ''
-        self._urlparams.update(kw)
-        query = urlencode(self._urlparams)
+        query = urlencode(params)
         scheme = self.name
         if self._scheme:
             scheme = '%s+%s' % (self._scheme, scheme)
@@ -407,6 +414,11 @@ def parse_store_url(url):
     bits = host.split('@')
     assert len(bits) <= 2, 'Too many @ in %s' % url
     params = dict(parse_qsl(query))
+    if bits[-1] == 'unix:':
+        # unix domain socket, the path is the socket file
+        assert path, 'No unix socket path in %s' % url
+        host = bits[-1] = path
+        path = ''
     if path:
         database = path[1:]
         assert '/' not in database, 'Unsupported database %s' % database
@@ -419,7 +431,7 @@ def parse_store_url(url):
         params['user'] = userpass[0]
         if len(userpass) == 2:
             params['password'] = userpass[1]
-    if ':' in host:
+    if ':' in host and not host.startswith('/'):
         host = tuple(host.split(':'))
         host = host[0], int(host[1])
     return scheme, host, params
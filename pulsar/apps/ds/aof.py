@@ -0,0 +1,282 @@
+'''Append only file persistence for pulsar-ds.
+
+Write commands are logged, using the redis protocol, into a file which is
+replayed when the server starts. How often the file is synced with the disk
+is controlled by the ``key_value_appendfsync`` setting:
+
+* ``always`` the log is written and synced after every write command
+* ``everysec`` the log is written once per loop iteration and synced in
+  the event loop executor once per second
+* ``no`` the log is written once per loop iteration and the operating
+  system decides when to sync it
+
+The log can be compacted in the background via the ``BGREWRITEAOF``
+command.
+'''
+import os
+import time
+
+from ...utils.string import to_string
+from ...utils.structures import Dict, Zset
+
+from .parser import redis_parser, CommandError
+from .client import COMMANDS_INFO
+
+
+AOF_FSYNC = ('always', 'everysec', 'no')
+AOF_REWRITE_ITEMS_PER_CMD = 64
+AOF_READ_CHUNK = 65536
+
+
+class AppendOnlyFile:
+    '''Log write commands into the append only file ``filename``
+    '''
+    def __init__(self, store, filename, fsync='everysec'):
+        self.store = store
+        self.filename = filename
+        self.fsync = fsync
+        self.rewrite_buffer = None
+        self.last_rewrite_time = None
+        self.logger = store.logger
+        self._loop = store._loop
+        self._parser = redis_parser()
+        self._buffer = []
+        self._db = None
+        self._fsync_pending = False
+        self._flush_handle = None
+        self._rewriter = None
+        self._file = open(filename, 'ab')
+
+    @property
+    def rewriting(self):
+        return self._rewriter is not None
+
+    def size(self):
+        return self._file.tell()
+
+    def feed(self, num, requests):
+        '''Append ``requests`` executed on database ``num`` to the log
+        '''
+        multi_bulk = self._parser.multi_bulk
+        chunks = []
+        if num != self._db:
+            self._db = num
+            chunks.append(multi_bulk(('select', str(num))))
+        chunks.extend((multi_bulk(request) for request in requests))
+        data = b''.join(chunks)
+        self._buffer.append(data)
+        if self.rewrite_buffer is not None:
+            self.rewrite_buffer.append(data)
+        if self.fsync == 'always':
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_soon(self.flush)
+
+    def flush(self):
+        '''Write buffered commands into the file
+        '''
+        self._flush_handle = None
+        if self._buffer:
+            data = b''.join(self._buffer)
+            self._buffer = []
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync == 'always':
+                os.fsync(self._file.fileno())
+            else:
+                self._fsync_pending = True
+
+    def cron(self):
+        '''Invoked once a second by the :class:`.Storage`
+        '''
+        if self.fsync == 'everysec' and self._fsync_pending:
+            self._fsync_pending = False
+            self._loop.run_in_executor(None, self._fsync, self._file)
+        if self._rewriter and not self._rewriter.is_alive():
+            self._rewrite_done()
+
+    def close(self):
+        self.flush()
+        if self.fsync != 'no':
+            os.fsync(self._file.fileno())
+        self._file.close()
+
+    def rewrite(self):
+        '''Start rewriting the log in a background process.
+
+        Commands received while the rewrite is in progress are accumulated
+        in the :attr:`rewrite_buffer` and appended to the new log once the
+        background process has finished.
+        '''
+        if self._rewriter is not None:
+            return False
+        from multiprocessing import Process
+        data = self.store._aof_dbs()
+        self.rewrite_buffer = []
+        # Force a select command in the rewrite buffer
+        self._db = None
+        self.logger.debug('Rewriting append only file in background process')
+        self._rewriter = Process(target=rewrite_aof,
+                                 args=(self.store.cfg, self._temp_filename(),
+                                       data))
+        self._rewriter.start()
+        return True
+
+    #    INTERNALS
+    def _temp_filename(self):
+        path, name = os.path.split(self.filename)
+        return os.path.join(path, 'temp-rewriteaof-%s' % name)
+
+    def _fsync(self, file):
+        try:
+            os.fsync(file.fileno())
+        except (OSError, ValueError):
+            # file closed after a rewrite
+            pass
+
+    def _rewrite_done(self):
+        rewriter, self._rewriter = self._rewriter, None
+        buffer, self.rewrite_buffer = self.rewrite_buffer, None
+        temp = self._temp_filename()
+        if rewriter.exitcode:
+            self.logger.error('Background append only file rewrite failed')
+            if os.path.isfile(temp):
+                os.remove(temp)
+            return
+        self.flush()
+        with open(temp, 'ab') as file:
+            file.write(b''.join(buffer))
+            file.flush()
+            os.fsync(file.fileno())
+        self._file.close()
+        os.replace(temp, self.filename)
+        self._file = open(self.filename, 'ab')
+        self._fsync_pending = False
+        self.last_rewrite_time = int(time.time())
+        self.logger.info('Background append only file rewrite finished')
+
+
+class AofClient:
+    '''The client used when replaying the append only file
+    '''
+    transaction = None
+    watched_keys = None
+    blocked = None
+    propagate = None
+    pending = None
+
+    def __init__(self, store):
+        self.store = store
+        self.database = 0
+        self.flag = 0
+        self.errors = 0
+        self._loop = store._loop
+
+    @property
+    def db(self):
+        return self.store.databases[self.database]
+
+    def execute(self, request):
+        request[0] = command = to_string(request[0]).lower()
+        info = COMMANDS_INFO.get(command)
+        if info is None:
+            raise CommandError("unknown command '%s'" % command)
+        handle = getattr(self.store, info.method_name)
+        try:
+            handle(self, request, len(request) - 1)
+        except CommandError:
+            self.errors += 1
+
+    def reply_error(self, value, prefix=None):
+        self.errors += 1
+
+    def reply_wrongtype(self):
+        self.errors += 1
+
+    def _write(self, *args):
+        pass
+
+    reply_ok = _write
+    reply_one = _write
+    reply_zero = _write
+    reply_status = _write
+    reply_int = _write
+    reply_bulk = _write
+    reply_multi_bulk = _write
+    reply_multi_bulk_len = _write
+
+
+def load_aof(store, filename):
+    '''Replay the append only file ``filename`` into ``store``
+    '''
+    client = AofClient(store)
+    parser = redis_parser()
+    commands = 0
+    with open(filename, 'rb') as file:
+        while True:
+            chunk = file.read(AOF_READ_CHUNK)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for request in parser.get_all():
+                client.execute(request)
+                commands += 1
+    if parser.buffer():
+        store.logger.warning('append only file "%s" is truncated, '
+                             'ignoring the last %d bytes',
+                             filename, len(parser.buffer()))
+    if client.errors:
+        store.logger.warning('%d errors while loading append only file',
+                             client.errors)
+    return commands
+
+
+def rewrite_aof(cfg, filename, data):
+    '''Write the minimal set of commands needed to rebuild ``data``
+    '''
+    logger = cfg.configured_logger('pulsar.ds')
+    multi_bulk = redis_parser().multi_bulk
+    with open(filename, 'wb') as file:
+        for num, keys, expires in data:
+            file.write(multi_bulk(('select', str(num))))
+            for key, value in keys.items():
+                for request in _rebuild(key, value):
+                    file.write(multi_bulk(request))
+            for key, (value, when) in expires.items():
+                for request in _rebuild(key, value):
+                    file.write(multi_bulk(request))
+                file.write(multi_bulk(('pexpireat', key, str(when))))
+        file.flush()
+        os.fsync(file.fileno())
+    logger.info('rewrote append only file into "%s"', filename)
+
+
+def _rebuild(key, value):
+    if isinstance(value, bytearray):
+        yield 'set', key, bytes(value)
+    elif isinstance(value, set):
+        yield from _chunked(('sadd', key), value)
+    elif isinstance(value, Dict):
+        yield from _chunked(('hmset', key), value.flat(), 2)
+    elif isinstance(value, Zset):
+        yield from _chunked(('zadd', key), _zadd_args(value), 2)
+    else:
+        yield from _chunked(('rpush', key), value)
+
+
+def _chunked(command, items, width=1):
+    size = width*AOF_REWRITE_ITEMS_PER_CMD
+    request = list(command)
+    for item in items:
+        request.append(item)
+        if len(request) - 2 == size:
+            yield request
+            request = list(command)
+    if len(request) > 2:
+        yield request
+
+
+def _zadd_args(value):
+    for score, member in value.items():
+        yield repr(score)
+        yield member
@@ -57,6 +57,8 @@ class PulsarStoreClient(ProtocolConsumer):
         self.last_command = ''
         self.flag = 0
         self.blocked = None
+        self.propagate = None
+        self.pending = None
 
     @property
     def db(self):
@@ -89,11 +91,19 @@ class PulsarStoreClient(ProtocolConsumer):
                 if not handle:
                     self._loop.logger.info("unknown command '%s'" % command)
                     return self.reply_error("unknown command '%s'" % command)
-                if self.store._password != self.password:
+                store = self.store
+                if store._password != self.password:
                     if command != 'auth':
                         return self.reply_error(
                             'Authentication required', 'NOAUTH')
+                write = handle._info.write
+                if write and store._maxmemory:
+                    if store._out_of_memory(command):
+                        return self.reply_error(store.OOM, 'OOM')
+                self.propagate = None
                 handle(self, request, len(request) - 1)
+                if write:
+                    store._propagate(self, request)
             else:
                 command = ''
                 return self.reply_error("no command")
@@ -145,14 +155,30 @@ class PulsarStoreClient(ProtocolConsumer):
     # Protocol Implementaton
     def feed_data(self, data):
         self.parser.feed(data)
-        request = self.parser.get()
-        while request is not False:
+        requests = self.parser.get_all()
+        if self.pending is not None:
+            self.pending.extend(requests)
+        else:
+            self._execute_requests(requests)
+
+    def resume(self):
+        '''Execute requests received while the client was blocked
+        '''
+        requests, self.pending = self.pending, None
+        if requests:
+            self._execute_requests(requests)
+
+    # Internals
+    def _execute_requests(self, requests):
+        for index, request in enumerate(requests):
+            if self.blocked:
+                # like redis, wait for the client to be unblocked
+                self.pending = requests[index:]
+                break
             if self.store._monitors:
                 self.store._write_to_monitors(self, request)
             self.execute(request)
-            request = self.parser.get()
 
-    # Internals
     def _write(self, response):
         if self.transaction is not None:
             self.transaction.append(response)
@@ -207,6 +233,8 @@ class Blocked:
             else:
                 store._block_callback(client, self.command, key,
                                       value, self.dest)
+            if client.pending is not None:
+                client._loop.call_soon(client.resume)
 
 
 def redis_to_py_pattern(pattern):
@@ -38,6 +38,18 @@ Storage
    :member-order: bysource
 
 
+Append Only File
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. automodule:: pulsar.apps.ds.aof
+
+
+Snapshots
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. automodule:: pulsar.apps.ds.snapshot
+
+
 .. _redis: http://redis.io/
 '''
 import os
@@ -45,7 +57,8 @@ import re
 import time
 import math
 import pickle
-from random import choice
+from random import choice, random, randrange
+from heapq import heappush, heappop, heapify
 from itertools import islice, chain
 from functools import partial, reduce
 from collections import namedtuple
@@ -56,11 +69,15 @@ from pulsar import SERVER_SOFTWARE
 from ..socket import SocketServer
 from ...asynclib.access import get_actor
 from ...asynclib.protocols import TcpServer, Connection
-from ...utils.config import Setting, Config
+from ...utils.config import Setting, Config, validate_bool
 from ...utils.structures import Dict, Zset, Deque
 
 from .parser import redis_parser
-from .utils import sort_command, count_bytes, and_op, or_op, xor_op, save_data
+from .utils import (sort_command, count_bytes, and_op, or_op, xor_op,
+                    memory_size, scan_collection, match_bytes)
+from .snapshot import (save_snapshot, read_snapshot, is_snapshot,
+                       ForkedSaver, SnapshotError, READ_BUFFER)
+from .aof import AppendOnlyFile, AOF_FSYNC, load_aof
 from .client import (command, PulsarStoreClient, Blocked,
                      COMMANDS_INFO, check_input, redis_to_py_pattern)
 
@@ -81,6 +98,20 @@ def pulsards_url(address=None):
 
 # Keyspace changes notification classes
 STRING_LIMIT = 2**32
+# Maximum time (in seconds) spent removing expired keys in a cron cycle
+ACTIVE_EXPIRE_CYCLE_TIME = 0.025
+ACTIVE_EXPIRE_CHECK_EVERY = 16
+ACTIVE_EXPIRE_MIN_REBUILD = 1024
+# Eviction policies when the maxmemory limit is reached
+MAXMEMORY_POLICIES = ('noeviction', 'allkeys-lru', 'volatile-lru',
+                      'allkeys-lfu', 'volatile-lfu', 'allkeys-random',
+                      'volatile-random', 'volatile-ttl')
+# Logarithmic access frequency counter parameters
+LFU_INIT_VAL = 5
+LFU_LOG_FACTOR = 10
+LFU_DECAY_TIME = 60
+# Default number of elements examined by a scan command
+SCAN_COUNT = 10
 
 nan = float('nan')
 
@@ -91,6 +122,20 @@ class PulsarDsSetting(Setting):
     section = "Pulsar data store server"
 
 
+def validate_memory(val):
+    '''Number of bytes from an integer or a string with a
+    ``kb``, ``mb`` or ``gb`` unit.
+    '''
+    if isinstance(val, str):
+        value = val.strip().lower()
+        for unit, m in (('kb', 1 << 10), ('mb', 1 << 20), ('gb', 1 << 30),
+                        ('b', 1)):
+            if value.endswith(unit):
+                return int(value[:-len(unit)])*m
+        return int(value)
+    return int(val or 0)
+
+
 def validate_list_of_pairs(val):
     new_val = []
     if val:
@@ -149,6 +194,81 @@ class KeyValueFileName(PulsarDsSetting):
     desc = '''The filename where to dump the DB.'''
 
 
+class KeyValueMaxMemory(PulsarDsSetting):
+    name = "key_value_maxmemory"
+    flags = ["--key-value-maxmemory"]
+    validator = validate_memory
+    default = 0
+    desc = '''\
+        Approximate memory limit for the data store.
+
+        When the limit is reached keys are evicted according to
+        :ref:`key_value_maxmemory_policy <setting-key_value_maxmemory_policy>`
+        and, if nothing can be evicted, write commands which may use more
+        memory are refused. Accept a number of bytes or a string with a
+        ``kb``, ``mb`` or ``gb`` unit. ``0`` means no limit.
+    '''
+
+
+class KeyValueMaxMemoryPolicy(PulsarDsSetting):
+    name = "key_value_maxmemory_policy"
+    flags = ["--key-value-maxmemory-policy"]
+    choices = MAXMEMORY_POLICIES
+    default = 'noeviction'
+    desc = '''\
+        How keys are selected for eviction when the maxmemory limit is
+        reached.
+
+        ``allkeys-*`` policies select among all keys, ``volatile-*`` among
+        keys with a timeout only. ``lru`` evicts the least recently used,
+        ``lfu`` the least frequently used and ``ttl`` the key with the
+        shortest time to live.
+    '''
+
+
+class KeyValueMaxMemorySamples(PulsarDsSetting):
+    name = "key_value_maxmemory_samples"
+    flags = ["--key-value-maxmemory-samples"]
+    type = int
+    default = 5
+    desc = '''Number of keys sampled, per database, for each eviction.'''
+
+
+class KeyValueAppendOnly(PulsarDsSetting):
+    name = "key_value_appendonly"
+    flags = ["--key-value-appendonly"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = '''\
+        Log every write command into an append only file.
+
+        When enabled, the append only file is replayed at startup instead
+        of loading the snapshot in :ref:`key_value_filename
+        <setting-key_value_filename>`.
+    '''
+
+
+class KeyValueAppendFileName(PulsarDsSetting):
+    name = "key_value_appendfilename"
+    flags = ["--key-value-appendfilename"]
+    default = 'pulsards.aof'
+    desc = '''The filename of the append only file.'''
+
+
+class KeyValueAppendFsync(PulsarDsSetting):
+    name = "key_value_appendfsync"
+    flags = ["--key-value-appendfsync"]
+    choices = AOF_FSYNC
+    default = 'everysec'
+    desc = '''\
+        How often the append only file is synced with the disk.
+
+        ``always`` after every write command, ``everysec`` once per second
+        in the event loop executor, ``no`` let the operating system decide.
+    '''
+
+
 class Server(TcpServer):
     _key_value_store = None
 
@@ -176,7 +296,7 @@ class PulsarDS(SocketServer):
         return Server(*args, **kw)
 
     def protocol_factory(self, idx):
-        return partial(Connection, PulsarStoreClient)
+        return partial(Connection, PulsarStoreClient, cork=self.cfg.cork)
 
     def monitor_start(self, monitor):
         cfg = self.cfg
@@ -187,6 +307,96 @@ class PulsarDS(SocketServer):
 # #############################################################################
 # #    DATA STORE
 pubsub_patterns = namedtuple('pubsub_patterns', 're clients')
+GLOB_CHARS = frozenset(b'*?[\\')
+
+
+def literal_prefix(pattern):
+    '''The leading part of a glob ``pattern`` without special characters
+    '''
+    for i, c in enumerate(pattern):
+        if c in GLOB_CHARS:
+            return pattern[:i]
+    return pattern
+
+
+class PatternIndex:
+    '''Pattern subscriptions bucketed by their literal prefix.
+
+    A channel can only match patterns whose literal prefix is a prefix of
+    the channel, therefore publishing a message performs one dictionary
+    lookup per distinct prefix length and runs the regular expressions of
+    candidate patterns only.
+    '''
+    def __init__(self):
+        self._patterns = {}
+        self._buckets = {}
+        self._lengths = {}
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def __iter__(self):
+        return iter(self._patterns)
+
+    def __contains__(self, pattern):
+        return pattern in self._patterns
+
+    def get(self, pattern):
+        return self._patterns.get(pattern)
+
+    def values(self):
+        return self._patterns.values()
+
+    def add(self, pattern):
+        p = self._patterns.get(pattern)
+        if not p:
+            pre = redis_to_py_pattern(pattern.decode('utf-8'))
+            p = pubsub_patterns(re.compile(pre), set())
+            self._patterns[pattern] = p
+            prefix = literal_prefix(pattern)
+            bucket = self._buckets.get(prefix)
+            if bucket is None:
+                self._buckets[prefix] = bucket = {}
+                size = len(prefix)
+                self._lengths[size] = self._lengths.get(size, 0) + 1
+            bucket[pattern] = p
+        return p
+
+    def remove(self, pattern):
+        self._patterns.pop(pattern)
+        prefix = literal_prefix(pattern)
+        bucket = self._buckets[prefix]
+        bucket.pop(pattern)
+        if not bucket:
+            self._buckets.pop(prefix)
+            size = len(prefix)
+            self._lengths[size] -= 1
+            if not self._lengths[size]:
+                self._lengths.pop(size)
+
+    def discard_client(self, client):
+        for pattern in tuple(client.patterns):
+            p = self._patterns.get(pattern)
+            if p:
+                p.clients.discard(client)
+                if not p.clients:
+                    self.remove(pattern)
+
+    def match(self, channel):
+        '''Generator of :class:`pubsub_patterns` matching ``channel``
+        '''
+        ch = None
+        buckets = self._buckets
+        N = len(channel)
+        for size in self._lengths:
+            if size <= N:
+                bucket = buckets.get(channel[:size])
+                if bucket:
+                    if ch is None:
+                        ch = channel.decode('utf-8')
+                    for p in bucket.values():
+                        if p.re.match(ch):
+                            yield p
 
 
 class Storage:
@@ -197,17 +407,24 @@ class Storage:
         self._password = self.cfg.key_value_password.encode('utf-8')
         self._filename = self.cfg.key_value_filename
         self._writer = None
+        self._aof = None
+        self._blocked_pops = []
         self._server = server
         self._loop = server._loop
         self._parser = redis_parser()
         self._missed_keys = 0
         self._hit_keys = 0
         self._expired_keys = 0
+        self._evicted_keys = 0
+        self._used_memory = 0
+        self._maxmemory = self.cfg.key_value_maxmemory
+        self._maxmemory_policy = self.cfg.key_value_maxmemory_policy
+        self._maxmemory_samples = max(1, self.cfg.key_value_maxmemory_samples)
         self._dirty = 0
         self._bpop_blocked_clients = 0
         self._last_save = int(time.time())
         self._channels = {}
-        self._patterns = {}
+        self._patterns = PatternIndex()
         # The set of clients which are watching keys
         self._watching = set()
         # The set of clients which issued the monitor command
@@ -235,6 +452,7 @@ class Storage:
         self.DIRTY_CAS = (1 << 5)
         #
         self._event_handlers = {self.NOTIFY_GENERIC: self._generic_event,
+                                self.NOTIFY_EVICTED: self._evicted_event,
                                 self.NOTIFY_STRING: self._string_event,
                                 self.NOTIFY_SET: self._set_event,
                                 self.NOTIFY_HASH: self._hash_event,
@@ -252,8 +470,16 @@ class Storage:
                             'allowed in this context')
         self.INVALID_SCORE = 'Invalid score value'
         self.NOT_SUPPORTED = 'Command not yet supported'
+        self.OOM = "command not allowed when used memory > 'maxmemory'"
+        # write commands which never increase the memory usage
+        self.FREE_MEMORY_COMMANDS = frozenset((
+            'del', 'flushdb', 'flushall', 'hdel', 'lpop', 'rpop', 'lrem',
+            'ltrim', 'spop', 'srem', 'zrem', 'zremrangebyrank',
+            'zremrangebyscore', 'expire', 'pexpire', 'expireat',
+            'pexpireat', 'persist', 'rename', 'renamenx', 'move'))
         self.OUT_OF_BOUND = 'Out of bound'
         self.SYNTAX_ERROR = 'Syntax error'
+        self.INVALID_CURSOR = 'invalid cursor'
         self.SUBSCRIBE_COMMANDS = ('psubscribe', 'punsubscribe', 'subscribe',
                                    'unsubscribe', 'quit')
         self.encoder = pickle
@@ -281,6 +507,10 @@ class Storage:
         self.lua = None
         self.version = '2.4.10'
         self._loaddb()
+        if self.cfg.key_value_appendonly:
+            self._aof = AppendOnlyFile(self, self.cfg.key_value_appendfilename,
+                                       self.cfg.key_value_appendfsync)
+            server.event('stop').bind(self._close_aof)
         self._cron()
 
     # #########################################################################
@@ -321,7 +551,10 @@ class Storage:
                 if timeout < 0:
                     return client.reply_error(self.INVALID_TIMEOUT)
                 if client.db.expire(request[1], m*timeout):
+                    self._rewrite(client, self._pexpireat(request[1],
+                                                          m*timeout))
                     return client.reply_one()
+            self._rewrite(client)
             client.reply_zero()
 
     @command('Keys', True)
@@ -337,7 +570,10 @@ class Storage:
                     return client.reply_error(self.INVALID_TIMEOUT)
                 timeout = M*timeout - time.time()
                 if client.db.expire(request[1], timeout):
+                    self._rewrite(client, self._pexpireat(request[1],
+                                                          timeout))
                     return client.reply_one()
+            self._rewrite(client)
             client.reply_zero()
 
     @command('Keys')
@@ -433,6 +669,7 @@ class Storage:
                 if db.pop(key2) is not None:
                     self._signal(self.NOTIFY_GENERIC, db, 'del', key2)
             db.pop(key1)
+            self._signal(self.NOTIFY_GENERIC, db, 'del', key1)
             event = self._type_event_map[type(value)]
             dirty = 1 if event == self.NOTIFY_STRING else len(value)
             db._data[key2] = value
@@ -461,8 +698,12 @@ class Storage:
         if db.pop(key) is not None:
             self._signal(self.NOTIFY_GENERIC, db, 'del', key)
         db._data[key] = value
+        self._signal(self._type_event_map[type(value)], db, request[0], key,
+                     1)
         if ttl > 0:
             db.expire(key, ttl)
+            self._rewrite(client, ['restore', key, b'0', request[3]],
+                          self._pexpireat(key, ttl))
         client.reply_ok()
 
     @command('Keys', True)
@@ -475,12 +716,12 @@ class Storage:
             return client.reply_wrongtype()
         sort_command(self, client, request, value)
 
-    @command('Keys', True)
+    @command('Keys')
     def ttl(self, client, request, N):
         check_input(request, N != 1)
         client.reply_int(client.db.ttl(request[1]))
 
-    @command('Keys', True)
+    @command('Keys')
     def type(self, client, request, N):
         check_input(request, N != 1)
         value = client.db.get(request[1])
@@ -490,9 +731,23 @@ class Storage:
             result = self._type_name_map[type(value)]
         client.reply_status(result)
 
-    @command('Keys', supported=False)
+    @command('Keys')
     def scan(self, client, request, N):
-        client.reply_error(self.NOT_SUPPORTED)
+        check_input(request, not N)
+        try:
+            cursor, match, count, type_name = self._scan_options(request, 1,
+                                                                 True)
+        except ValueError as exc:
+            return client.reply_error(exc)
+        db = client.db
+        cursor, keys = db.scan(cursor, count)
+        if type_name:
+            type_map = self._type_name_map
+            keys = [key for key in keys
+                    if type_map[type(db._value(key))] == type_name]
+        if match:
+            keys = [key for key in keys if match(key)]
+        client.reply_multi_bulk((str(cursor), keys))
 
     # #########################################################################
     # #    STRING COMMANDS
@@ -579,7 +834,8 @@ class Storage:
     def decr(self, client, request, N):
         check_input(request, N != 1)
         r = self._incrby(client, request[0], request[1], b'-1', int)
-        client.reply_int(r)
+        if r is not None:
+            client.reply_int(r)
 
     @command('Strings', True)
     def decrby(self, client, request, N):
@@ -589,7 +845,8 @@ class Storage:
         except Exception:
             val = request[2]
         r = self._incrby(client, request[0], request[1], val, int)
-        client.reply_int(r)
+        if r is not None:
+            client.reply_int(r)
 
     @command('Strings')
     def get(self, client, request, N):
@@ -673,19 +930,22 @@ class Storage:
     def incr(self, client, request, N):
         check_input(request, N != 1)
         r = self._incrby(client, request[0], request[1], b'1', int)
-        client.reply_int(r)
+        if r is not None:
+            client.reply_int(r)
 
     @command('Strings', True)
     def incrby(self, client, request, N):
         check_input(request, N != 2)
         r = self._incrby(client, request[0], request[1], request[2], int)
-        client.reply_int(r)
+        if r is not None:
+            client.reply_int(r)
 
     @command('Strings', True)
     def incrbyfloat(self, client, request, N):
         check_input(request, N != 2)
         r = self._incrby(client, request[0], request[1], request[2], float)
-        client.reply_bulk(str(r).encode('utf-8'))
+        if r is not None:
+            client.reply_bulk(str(r).encode('utf-8'))
 
     @command('Strings')
     def mget(self, client, request, N):
@@ -1028,9 +1288,9 @@ class Storage:
         else:
             client.reply_wrongtype()
 
-    @command('Hashes', supported=False)
+    @command('Hashes')
     def hscan(self, client, request, N):
-        client.reply_error(self.NOT_SUPPORTED)
+        self._scan_collection(client, request, N, self.hash_type)
 
     # #########################################################################
     # #    LIST COMMANDS
@@ -1042,6 +1302,7 @@ class Storage:
         except Exception:
             return client.reply_error(self.SYNTAX_ERROR)
         keys = request[1:-1]
+        self._rewrite(client)
         if not self._bpop(client, request, keys):
             client.blocked = Blocked(client, request[0], keys, timeout)
 
@@ -1058,6 +1319,7 @@ class Storage:
             return client.reply_error(self.SYNTAX_ERROR)
         key, dest = request[1:-1]
         keys = (key,)
+        self._rewrite(client)
         if not self._bpop(client, request, keys, dest):
             client.blocked = Blocked(client, request[0], keys, timeout, dest)
 
@@ -1345,7 +1607,8 @@ class Storage:
     @command('Sets', True)
     def sdiffstore(self, client, request, N):
         check_input(request, N < 2)
-        self._setoper(client, 'difference', request[2:], request[1])
+        self._setoper(client, 'difference', request[2:], request[1],
+                      request[0])
 
     @command('Sets')
     def sinter(self, client, request, N):
@@ -1355,7 +1618,8 @@ class Storage:
     @command('Sets', True)
     def sinterstore(self, client, request, N):
         check_input(request, N < 2)
-        self._setoper(client, 'intersection', request[2:], request[1])
+        self._setoper(client, 'intersection', request[2:], request[1],
+                      request[0])
 
     @command('Sets')
     def sismember(self, client, request, N):
@@ -1422,6 +1686,7 @@ class Storage:
             client.reply_wrongtype()
         else:
             result = value.pop()
+            self._rewrite(client, ['srem', key, result])
             self._signal(self.NOTIFY_SET, db, request[0], key, 1)
             if db.pop(key, value) is not None:
                 self._signal(self.NOTIFY_GENERIC, db, 'del', key)
@@ -1498,11 +1763,12 @@ class Storage:
     @command('Sets', True)
     def sunionstore(self, client, request, N):
         check_input(request, N < 2)
-        self._setoper(client, 'union', request[2:], request[1])
+        self._setoper(client, 'union', request[2:], request[1],
+                      request[0])
 
-    @command('Sets', supported=False)
+    @command('Sets')
     def sscan(self, client, request, N):
-        client.reply_error(self.NOT_SUPPORTED)
+        self._scan_collection(client, request, N, set)
 
     # #########################################################################
     # #    SORTED SETS COMMANDS
@@ -1763,9 +2029,9 @@ class Storage:
     def zunionstore(self, client, request, N):
         self._zsetoper(client, request, N)
 
-    @command('Sorted Sets', supported=False)
+    @command('Sorted Sets')
     def zscan(self, client, request, N):
-        client.reply_error(self.NOT_SUPPORTED)
+        self._scan_collection(client, request, N, self.zset_type)
 
     # #########################################################################
     # #    PUBSUB COMMANDS
@@ -1773,16 +2039,10 @@ class Storage:
     def psubscribe(self, client, request, N):
         check_input(request, not N)
         for pattern in request[1:]:
-            p = self._patterns.get(pattern)
-            if not p:
-                pre = redis_to_py_pattern(pattern.decode('utf-8'))
-                p = pubsub_patterns(re.compile(pre), set())
-                self._patterns[pattern] = p
-            p.clients.add(client)
+            self._patterns.add(pattern).clients.add(client)
             client.patterns.add(pattern)
-            count = reduce(lambda x, y: x + int(client in y.clients),
-                           self._patterns.values())
-            client.reply_multi_bulk((b'psubscribe', pattern, count))
+            client.reply_multi_bulk((b'psubscribe', pattern,
+                                     len(client.patterns)))
 
     @command('Pub/Sub')
     def pubsub(self, client, request, N):
@@ -1808,8 +2068,7 @@ class Storage:
             client.reply_multi_bulk(count)
         elif subcommand == 'numpat':
             check_input(request, N > 1)
-            count = reduce(lambda x, y: x + len(y.clients),
-                           self._patterns.values())
+            count = sum(len(p.clients) for p in self._patterns.values())
             client.reply_int(count)
         else:
             client.reply_error("Unknown command 'pubsub %s'" % subcommand)
@@ -1818,26 +2077,18 @@ class Storage:
     def publish(self, client, request, N):
         check_input(request, N != 2)
         channel, message = request[1:]
-        ch = channel.decode('utf-8')
-        msg = self._parser.multi_bulk((b'message', channel, message))
-        count = self._publish_clients(msg, self._channels.get(channel, ()))
-        for pattern in self._patterns.values():
-            g = pattern.re.match(ch)
-            if g:
-                count += self._publish_clients(msg, pattern.clients)
-        client.reply_int(count)
+        client.reply_int(self._publish(channel, message))
 
     @command('Pub/Sub', script=0)
     def punsubscribe(self, client, request, N):
         patterns = request[1:] if N else list(self._patterns)
         for pattern in patterns:
-            if pattern in self._patterns:
-                p = self._patterns[pattern]
-                if client in p.clients:
-                    client.patterns.discard(pattern)
-                    p.clients.remove(client)
-                    if not p.clients:
-                        self._patterns.pop(pattern)
+            p = self._patterns.get(pattern)
+            if p and client in p.clients:
+                client.patterns.discard(pattern)
+                p.clients.remove(client)
+                if not p.clients:
+                    self._patterns.remove(pattern)
                     client.reply_multi_bulk((b'punsubscribe', pattern))
 
     @command('Pub/Sub', script=0)
@@ -1979,9 +2230,17 @@ class Storage:
 
     # #########################################################################
     # #    SERVER COMMANDS
-    @command('Server', supported=False)
+    @command('Server')
     def bgrewriteaof(self, client, request, N):
-        client.reply_error(self.NOT_SUPPORTED)
+        check_input(request, N)
+        if self._aof is None:
+            client.reply_error('Append only file is not enabled')
+        elif self._aof.rewrite():
+            client.reply_status('Background append only file rewriting '
+                                'started')
+        else:
+            client.reply_error('Background append only file rewriting '
+                               'already in progress')
 
     @command('Server')
     def bgsave(self, client, request, N):
@@ -2025,6 +2284,7 @@ class Storage:
             self._hit_keys = 0
             self._missed_keys = 0
             self._expired_keys = 0
+            self._evicted_keys = 0
             server = client._producer
             server._received = 0
             server._requests_processed = 0
@@ -2113,8 +2373,18 @@ class Storage:
                 if gap >= interval and dirty >= changes:
                     self._save()
                     break
+        if self._aof is not None:
+            self._aof.cron()
+        self._active_expire()
         self._loop.call_later(1, self._cron)
 
+    def _active_expire(self):
+        now = self._loop.time()
+        deadline = now + ACTIVE_EXPIRE_CYCLE_TIME
+        for db in self.databases.values():
+            if db._expires and not db.active_expire(now, deadline):
+                break
+
     def _set(self, client, key, value, seconds=0, milliseconds=0,
              nx=False, xx=False):
         try:
@@ -2134,11 +2404,14 @@ class Storage:
                 db.pop(key)
             if timeout > 0:
                 db._timer(timeout, key, bytearray(value))
+                self._rewrite(client, ['set', key, value],
+                              self._pexpireat(key, timeout))
                 self._signal(self.NOTIFY_STRING, db, 'expire', key)
             else:
                 db._data[key] = bytearray(value)
             self._signal(self.NOTIFY_STRING, db, 'set', key, 1)
             return True
+        self._rewrite(client)
 
     def _incrby(self, client, name, key, value, type):
         try:
@@ -2188,9 +2461,16 @@ class Storage:
             if dest is not None:
                 dval.appendleft(elem)
                 self._signal(self.NOTIFY_LIST, db, 'lpush', dest, 1)
+                propagate = ['rpoplpush', key, dest]
+            else:
+                propagate = ['rpop', key]
         else:
             elem = value.popleft()
             self._signal(self.NOTIFY_LIST, db, 'lpop', key, 1)
+            propagate = ['lpop', key]
+        if self._aof is not None:
+            # logged after the command which pushed into the list
+            self._blocked_pops.append((client.database, propagate))
         if not value:
             db.pop(key)
             self._signal(self.NOTIFY_GENERIC, db, 'del', key, 1)
@@ -2271,7 +2551,7 @@ class Storage:
         self._signal(self.NOTIFY_HASH, db, request[0], key, 1)
         return increment
 
-    def _setoper(self, client, oper, keys, dest=None):
+    def _setoper(self, client, oper, keys, dest=None, command=None):
         db = client.db
         result = None
         for key in keys:
@@ -2285,9 +2565,11 @@ class Storage:
             else:
                 result = getattr(result, oper)(value)
         if dest is not None:
-            db.pop(dest)
+            if db.pop(dest) is not None:
+                self._signal(self.NOTIFY_GENERIC, db, 'del', dest, 1)
             if result:
                 db._data[dest] = result
+                self._signal(self.NOTIFY_SET, db, command, dest, len(result))
                 client.reply_int(len(result))
             else:
                 client.reply_zero()
@@ -2366,19 +2648,91 @@ class Storage:
         stats = {'keyspace_hits': self._hit_keys,
                  'keyspace_misses': self._missed_keys,
                  'expired_keys': self._expired_keys,
+                 'evicted_keys': self._evicted_keys,
                  'keys_changed': self._dirty,
                  'pubsub_channels': len(self._channels),
                  'pubsub_patterns': len(self._patterns),
                  'blocked_clients': self._bpop_blocked_clients}
+        writer = self._writer
         persistance = {'rdb_changes_since_last_save': self._dirty,
-                       'rdb_last_save_time': self._last_save}
+                       'rdb_last_save_time': self._last_save,
+                       'rdb_bgsave_in_progress': int(bool(
+                           writer and writer.is_alive())),
+                       'aof_enabled': int(self._aof is not None)}
+        if self._aof is not None:
+            persistance.update({
+                'aof_rewrite_in_progress': int(self._aof.rewriting),
+                'aof_last_rewrite_time': self._aof.last_rewrite_time or -1,
+                'aof_current_size': self._aof.size()})
         for db in self.databases.values():
             if len(db):
                 keyspace[str(db)] = db.info()
+        memory = {'used_memory': self._used_memory,
+                  'maxmemory': self._maxmemory,
+                  'maxmemory_policy': self._maxmemory_policy}
         return {'keyspace': keyspace,
                 'stats': stats,
+                'memory': memory,
                 'persistance': persistance}
 
+    def _scan_options(self, request, start, with_type=False):
+        '''Parse the cursor, ``MATCH``, ``COUNT`` and, when ``with_type``
+        is set, ``TYPE`` arguments of a scan command
+        '''
+        try:
+            cursor = int(request[start])
+            if cursor < 0:
+                raise ValueError
+        except ValueError:
+            raise ValueError(self.INVALID_CURSOR) from None
+        match, count, type_name = None, SCAN_COUNT, None
+        options = request[start+1:]
+        if len(options) % 2:
+            raise ValueError(self.SYNTAX_ERROR)
+        for name, value in zip(options[::2], options[1::2]):
+            name = name.lower()
+            if name == b'match':
+                pattern = value.decode('utf-8', 'ignore')
+                if pattern != '*':
+                    match = re.compile(redis_to_py_pattern(pattern))
+            elif name == b'count':
+                try:
+                    count = int(value)
+                except ValueError:
+                    count = 0
+                if count < 1:
+                    raise ValueError(self.SYNTAX_ERROR)
+            elif name == b'type' and with_type:
+                type_name = value.decode('utf-8', 'ignore').lower()
+            else:
+                raise ValueError(self.SYNTAX_ERROR)
+        if match:
+            match = partial(match_bytes, match.search)
+        return cursor, match, count, type_name
+
+    def _scan_collection(self, client, request, N, type):
+        check_input(request, N < 2)
+        value = client.db.get(request[1])
+        if value is not None and not isinstance(value, type):
+            return client.reply_wrongtype()
+        try:
+            cursor, match, count, _ = self._scan_options(request, 2)
+        except ValueError as exc:
+            return client.reply_error(exc)
+        if value is None:
+            return client.reply_multi_bulk(('0', ()))
+        if type is self.zset_type:
+            value = value._dict
+        cursor, members = scan_collection(value, cursor, count)
+        if match:
+            members = [member for member in members if match(member)]
+        if type is set:
+            result = members
+        else:
+            result = []
+            [result.extend((member, value[member])) for member in members]
+        client.reply_multi_bulk((str(cursor), result))
+
     def _client_list(self, client):
         for client in client._producer._concurrent_connections:
             yield ' '.join(self._client_info(client))
@@ -2396,40 +2750,201 @@ class Storage:
         if writer and writer.is_alive():
             self.logger.warning('Cannot save, background saving in progress')
         else:
-            from multiprocessing import Process
             data = self._dbs()
+            offset = time.time() - self._loop.time()
             self._dirty = 0
             self._last_save = int(time.time())
-            if is_async:
+            if not is_async:
+                self.logger.debug('Saving database')
+                save_snapshot(self.cfg, self._filename, data, offset)
+            elif hasattr(os, 'fork'):
+                # The child process shares the databases copy-on-write
+                self.logger.debug('Saving database in forked process')
+                self._writer = ForkedSaver(self.cfg, self._filename, data,
+                                           offset)
+            else:
+                from multiprocessing import Process
                 self.logger.debug('Saving database in background process')
-                self._writer = Process(target=save_data,
-                                       args=(self.cfg, self._filename, data))
+                self._writer = Process(target=save_snapshot,
+                                       args=(self.cfg, self._filename, data,
+                                             offset))
                 self._writer.start()
-            else:
-                self.logger.debug('Saving database')
-                save_data(self.cfg, self._filename, data)
 
     def _dbs(self):
-        data = [(db._num, db._data) for db in self.databases.values()
-                if len(db._data)]
-        return (1, data)
+        return [(db._num, db._data, db._expires)
+                for db in self.databases.values() if len(db)]
+
+    def _aof_dbs(self):
+        now = time.time()
+        loop_now = self._loop.time()
+        data = []
+        for db in self.databases.values():
+            if len(db):
+                expires = dict(((key, (t.value,
+                                       int(1000*(now + t.when - loop_now))))
+                                for key, t in db._expires.items()))
+                data.append((db._num, db._data, expires))
+        return data
 
     def _loaddb(self):
+        filename = self.cfg.key_value_appendfilename
+        if self.cfg.key_value_appendonly and os.path.isfile(filename):
+            self.logger.info('loading append only file "%s"', filename)
+            commands = load_aof(self, filename)
+            self.logger.info('replayed %d commands from "%s"',
+                             commands, filename)
+            self._dirty = 0
+            return
         filename = self._filename
         if self.cfg.key_value_save and os.path.isfile(filename):
             self.logger.info('loading data from "%s"', filename)
-            with open(filename, 'rb') as file:
-                data = pickle.load(file)
-            version, dbs = data
-            for num, data in dbs:
+            if is_snapshot(filename):
+                try:
+                    keys = self._load_snapshot(filename)
+                except SnapshotError as exc:
+                    self.logger.error('Could not load "%s": %s',
+                                      filename, exc)
+                else:
+                    self.logger.info('loaded %d keys from "%s"',
+                                     keys, filename)
+            else:
+                self._load_pickle(filename)
+
+    def _load_snapshot(self, filename):
+        offset = self._loop.time() - time.time()
+        keys = 0
+        with open(filename, 'rb', buffering=READ_BUFFER) as file:
+            for num, key, value, expire in read_snapshot(file):
                 db = self.databases.get(num)
-                if db is not None:
-                    db._data = data
+                if db is None:
+                    continue
+                if expire is None:
+                    db._data[key] = value
+                else:
+                    when = 0.001*expire + offset
+                    db._expires[key] = Timer(value, when)
+                    db._push(when, key)
+                db._account(key)
+                keys += 1
+        return keys
+
+    def _load_pickle(self, filename):
+        # snapshots saved before the binary format was introduced
+        with open(filename, 'rb') as file:
+            data = pickle.load(file)
+        version, dbs = data
+        for num, data in dbs:
+            db = self.databases.get(num)
+            if db is not None:
+                db._data = data
+                for key in data:
+                    db._account(key)
+
+    def _close_aof(self, server, **kw):
+        aof, self._aof = self._aof, None
+        if aof is not None:
+            aof.close()
+
+    def _propagate(self, client, request):
+        if self._aof is not None:
+            requests = client.propagate
+            if requests is None:
+                requests = (request,)
+            if requests:
+                self._aof.feed(client.database, requests)
+            # pops of the clients unblocked by the command
+            pops, self._blocked_pops = self._blocked_pops, []
+            for database, pop in pops:
+                self._aof.feed(database, (pop,))
+
+    def _rewrite(self, client, *requests):
+        '''Replace the command propagated to the append only file
+        with ``requests``
+        '''
+        client.propagate = requests
+
+    def _pexpireat(self, key, timeout):
+        when = int(1000*(time.time() + timeout))
+        return ['pexpireat', key, str(when).encode('utf-8')]
 
     def _signal(self, type, db, command, key=None, dirty=0):
         self._dirty += dirty
+        if key is not None:
+            db._account(key)
         self._event_handlers[type](db, key, COMMANDS_INFO[command])
 
+    def _out_of_memory(self, command):
+        '''Evict keys if needed and return ``True`` if ``command``
+        should be refused
+        '''
+        return (not self._free_memory() and
+                command not in self.FREE_MEMORY_COMMANDS)
+
+    def _free_memory(self):
+        maxmemory = self._maxmemory
+        if self._used_memory <= maxmemory:
+            return True
+        elif self._maxmemory_policy == 'noeviction':
+            return False
+        while self._used_memory > maxmemory:
+            candidate = self._eviction_candidate()
+            if candidate is None:
+                return False
+            self._evict(*candidate)
+        return True
+
+    def _eviction_candidate(self):
+        policy = self._maxmemory_policy
+        samples = self._maxmemory_samples
+        now = self._loop.time()
+        best = None
+        best_score = None
+        for db in self.databases.values():
+            if policy == 'volatile-ttl':
+                key = db._next_expiring()
+                candidates = () if key is None else (key,)
+            elif policy.startswith('volatile'):
+                candidates = db._sample_volatile(samples)
+            else:
+                candidates = db._sample(samples)
+            for key in candidates:
+                info = db._keyinfo.get(key)
+                if policy == 'volatile-ttl':
+                    score = db._expires[key].when
+                elif info is None or policy.endswith('random'):
+                    score = random()
+                elif policy.endswith('lru'):
+                    score = info.access
+                else:
+                    score = (info.lfu(now), info.access)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best = (db, key)
+        return best
+
+    def _evict(self, db, key):
+        db.pop(key)
+        self._evicted_keys += 1
+        self._signal(self.NOTIFY_EVICTED, db, 'del', key, 1)
+        if self._aof is not None:
+            self._aof.feed(db._num, (['del', key],))
+        self._notify_keyspace_event(db, 'evicted', key)
+
+    def _notify_keyspace_event(self, db, event, key):
+        if self._channels or self._patterns:
+            keyspace = ('__keyspace@%s__:' % db._num).encode('utf-8') + key
+            keyevent = ('__keyevent@%s__:%s' % (db._num, event)).encode(
+                'utf-8')
+            self._publish(keyspace, event.encode('utf-8'))
+            self._publish(keyevent, key)
+
+    def _publish(self, channel, message):
+        msg = self._parser.multi_bulk((b'message', channel, message))
+        count = self._publish_clients(msg, self._channels.get(channel, ()))
+        for pattern in self._patterns.match(channel):
+            count += self._publish_clients(msg, pattern.clients)
+        return count
+
     def _publish_clients(self, msg, clients):
         remove = set()
         count = 0
@@ -2454,6 +2969,7 @@ class Storage:
             self._modified_key(key)
 
     _string_event = _generic_event
+    _evicted_event = _generic_event
     _set_event = _generic_event
     _hash_event = _generic_event
     _zset_event = _generic_event
@@ -2465,8 +2981,8 @@ class Storage:
         if key in db._blocking_keys:
             if key in db._data:
                 value = db._data[key]
-            elif key in self._expires:
-                value = db._expires[key]
+            elif key in db._expires:
+                value = db._expires[key].value
             else:
                 value = None
             for client in db._blocking_keys.pop(key):
@@ -2480,10 +2996,7 @@ class Storage:
             clients.discard(client)
             if not clients:
                 self._channels.pop(channel)
-        for pattern, p in list(self._patterns.items()):
-            p.clients.discard(client)
-            if not p.clients:
-                self._patterns.pop(pattern)
+        self._patterns.discard_client(client)
 
     def _write_to_monitors(self, client, request):
         cmds = b'" "'.join(request)
@@ -2500,6 +3013,11 @@ class Storage:
 
 class Db:
     '''A database.
+
+    Keys with a timeout are stored in the ``_expires`` dictionary and indexed
+    by expiry time in a heap with lazy deletion. Expired keys are removed
+    when accessed or by the :meth:`active_expire` step invoked by the
+    :class:`.Storage` cron, so that no event loop timer is created per key.
     '''
     def __init__(self, num, store):
         self.store = store
@@ -2507,6 +3025,9 @@ class Db:
         self._loop = store._loop
         self._data = {}
         self._expires = {}
+        self._expires_heap = []
+        self._keyinfo = {}
+        self._keys = []
         self._events = {}
         self._blocking_keys = {}
 
@@ -2518,6 +3039,10 @@ class Db:
         return len(self._data) + len(self._expires)
 
     def __iter__(self):
+        now = self._loop.time()
+        expired = [key for key, t in self._expires.items() if t.when <= now]
+        for key in expired:
+            self._do_expire(key)
         return chain(self._data, self._expires)
 
     # #########################################################################
@@ -2525,43 +3050,56 @@ class Db:
     def flush(self):
         removed = len(self._data)
         self._data.clear()
-        [t.handle.cancel() for t in self._expires.values()]
         self._expires.clear()
+        self._expires_heap = []
+        self.store._used_memory -= sum((info.size for info
+                                        in self._keyinfo.values()))
+        self._keyinfo.clear()
+        self._keys = []
         self.store._signal(self.store.NOTIFY_GENERIC, self, 'flushdb',
                            dirty=removed)
 
     def get(self, key, default=None):
         if key in self._data:
             self.store._hit_keys += 1
+            self._touch(key)
             return self._data[key]
-        elif key in self._expires:
+        t = self._get_timer(key)
+        if t is not None:
             self.store._hit_keys += 1
-            return self._expires[key].value
+            self._touch(key)
+            return t.value
         else:
             self.store._missed_keys += 1
             return default
 
     def exists(self, key):
-        return key in self._data or key in self._expires
+        return key in self._data or self._get_timer(key) is not None
 
     def expire(self, key, timeout):
-        if key in self._expires:
-            t = self._expires.pop(key)
-            t.handle.cancel()
-            value = t.value
-        elif key in self._data:
+        if key in self._data:
             value = self._data.pop(key)
         else:
-            return False
+            t = self._get_timer(key)
+            if t is None:
+                return False
+            elif timeout > 0:
+                t.when = self._loop.time() + timeout
+                self._push(t.when, key)
+                return True
+            else:
+                self._expires.pop(key)
         if timeout > 0:
             self._timer(timeout, key, value)
+        else:
+            self.store._signal(self.store.NOTIFY_GENERIC, self, 'del', key, 1)
         return True
 
     def persist(self, key):
-        if key in self._expires:
+        t = self._get_timer(key)
+        if t is not None:
             self.store._hit_keys += 1
-            t = self._expires.pop(key)
-            t.handle.cancel()
+            self._expires.pop(key)
             self._data[key] = t.value
             return True
         elif key in self._data:
@@ -2571,9 +3109,9 @@ class Db:
         return False
 
     def ttl(self, key, m=1):
-        if key in self._expires:
+        t = self._get_timer(key)
+        if t is not None:
             self.store._hit_keys += 1
-            t = self._expires[key]
             return max(0, int(m*(t.when - self._loop.time())))
         elif key in self._data:
             self.store._hit_keys += 1
@@ -2591,9 +3129,9 @@ class Db:
             if key in self._data:
                 value = self._data.pop(key)
                 return value
-            elif key in self._expires:
-                t = self._expires.pop(key)
-                t.handle.cancel()
+            t = self._get_timer(key)
+            if t is not None:
+                self._expires.pop(key)
                 return t.value
 
     def rem(self, key):
@@ -2602,32 +3140,193 @@ class Db:
             self._data.pop(key)
             self.store._signal(self.store.NOTIFY_GENERIC, self, 'del', key, 1)
             return 1
-        elif key in self._expires:
+        elif self._get_timer(key) is not None:
             self.store._hit_keys += 1
-            t = self._expires.pop(key)
-            t.handle.cancel()
+            self._expires.pop(key)
             self.store._signal(self.store.NOTIFY_GENERIC, self, 'del', key, 1)
             return 1
         else:
             self.store._missed_keys += 1
             return 0
 
+    def active_expire(self, now, deadline):
+        '''Remove keys which expired before ``now``.
+
+        Stop once the loop time is past ``deadline`` and return ``False``
+        if expired keys may still be available.
+        '''
+        heap = self._expires_heap
+        expires = self._expires
+        time = self._loop.time
+        count = 0
+        while heap and heap[0][0] <= now:
+            when, key = heappop(heap)
+            t = expires.get(key)
+            # skip stale entries
+            if t is not None and t.when == when:
+                self._do_expire(key)
+            count += 1
+            if not count % ACTIVE_EXPIRE_CHECK_EVERY and time() > deadline:
+                return not (heap and heap[0][0] <= now)
+        return True
+
+    def scan(self, cursor, count):
+        '''Return the next ``cursor`` and up to ``count`` keys.
+
+        Keys are visited backward in the :attr:`_keys` array, where removed
+        keys are replaced by the last one, so that a full iteration returns
+        all keys present from its start to its end. The ``cursor`` is the
+        number of positions still to visit, ``0`` to start.
+        '''
+        keys = self._keys
+        N = len(keys)
+        end = min(cursor, N) if cursor else N
+        start = max(end - count, 0)
+        now = self._loop.time()
+        data = self._data
+        expires = self._expires
+        result = []
+        for key in keys[start:end]:
+            if key in data:
+                result.append(key)
+            else:
+                t = expires.get(key)
+                if t is not None and t.when > now:
+                    result.append(key)
+        return start, result
+
+    def _value(self, key):
+        value = self._data.get(key)
+        if value is None:
+            t = self._expires.get(key)
+            if t is not None:
+                value = t.value
+        return value
+
+    def _account(self, key):
+        '''Update the approximate memory used by ``key``
+        '''
+        value = self._value(key)
+        info = self._keyinfo.get(key)
+        if value is None:
+            if info is not None:
+                self.store._used_memory -= info.size
+                self._remove_info(key, info)
+        else:
+            size = memory_size(key, value)
+            if info is None:
+                self._keyinfo[key] = KeyInfo(size, self._loop.time(),
+                                             len(self._keys))
+                self._keys.append(key)
+                self.store._used_memory += size
+            else:
+                self.store._used_memory += size - info.size
+                info.size = size
+
+    def _touch(self, key):
+        info = self._keyinfo.get(key)
+        if info is not None:
+            info.touch(self._loop.time())
+
+    def _remove_info(self, key, info):
+        self._keyinfo.pop(key)
+        keys = self._keys
+        last = keys.pop()
+        if last != key:
+            keys[info.pos] = last
+            self._keyinfo[last].pos = info.pos
+
+    def _sample(self, samples):
+        keys = self._keys
+        N = len(keys)
+        if N <= samples:
+            return list(keys)
+        return [keys[randrange(N)] for _ in range(samples)]
+
+    def _sample_volatile(self, samples):
+        heap = self._expires_heap
+        expires = self._expires
+        N = len(heap)
+        if not N:
+            return ()
+        # the heap may contain stale entries, try a few more times
+        sample = set()
+        for _ in range(2*samples):
+            key = heap[randrange(N)][1]
+            if key in expires:
+                sample.add(key)
+                if len(sample) == samples:
+                    break
+        return sample
+
+    def _next_expiring(self):
+        heap = self._expires_heap
+        expires = self._expires
+        while heap:
+            when, key = heap[0]
+            t = expires.get(key)
+            if t is not None and t.when == when:
+                return key
+            heappop(heap)
+
+    def _get_timer(self, key):
+        t = self._expires.get(key)
+        if t is not None and t.when <= self._loop.time():
+            self._do_expire(key)
+            t = None
+        return t
+
     def _do_expire(self, key):
-        if key in self._expires:
-            t = self._expires.pop(key)
-            t.handle.cancel()
+        if self._expires.pop(key, None) is not None:
             self.store._expired_keys += 1
+            self._account(key)
 
     def _timer(self, timeout, key, value):
-        loop = self._loop
-        when = loop.time() + timeout
-        handle = loop.call_at(when, self._do_expire, key)
-        self._expires[key] = Timer(handle, value, when)
+        when = self._loop.time() + timeout
+        self._expires[key] = Timer(value, when)
+        self._push(when, key)
+
+    def _push(self, when, key):
+        heap = self._expires_heap
+        heappush(heap, (when, key))
+        # Rebuild the heap when stale entries dominate
+        if len(heap) > 2*len(self._expires) + ACTIVE_EXPIRE_MIN_REBUILD:
+            heap = [(t.when, k) for k, t in self._expires.items()]
+            heapify(heap)
+            self._expires_heap = heap
 
 
 class Timer:
+    __slots__ = ('value', 'when')
 
-    def __init__(self, handle, value, when):
-        self.handle = handle
+    def __init__(self, value, when):
         self.value = value
         self.when = when
+
+
+class KeyInfo:
+    '''Approximate memory size and access metadata of a key
+    '''
+    __slots__ = ('size', 'access', 'freq', 'pos')
+
+    def __init__(self, size, now, pos):
+        self.size = size
+        self.access = now
+        self.freq = LFU_INIT_VAL
+        self.pos = pos
+
+    def touch(self, now):
+        freq = self.lfu(now)
+        if freq < 255:
+            p = 1.0/(max(freq - LFU_INIT_VAL, 0)*LFU_LOG_FACTOR + 1)
+            if random() < p:
+                freq += 1
+        self.freq = freq
+        self.access = now
+
+    def lfu(self, now):
+        '''Access frequency counter decayed by the time elapsed since
+        the last access
+        '''
+        periods = int((now - self.access)/LFU_DECAY_TIME)
+        return max(self.freq - periods, 0) if periods else self.freq
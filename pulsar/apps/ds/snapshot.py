@@ -0,0 +1,182 @@
+'''Point in time snapshots of pulsar-ds databases.
+
+A snapshot is a versioned binary file written one key at a time so that
+neither saving nor loading needs to materialise the whole dataset::
+
+    header:     b'PULSARDS' version(uint16)
+    record:     opcode(uint8) length(uint32) payload crc32(uint32)
+
+The crc32 covers the opcode, length and payload of a record. Key records
+have the payload::
+
+    expire(int64) type(uint8) key_length(uint32) key value
+
+where ``expire`` is the absolute expiry in milliseconds (``-1`` when the
+key has no timeout) and ``value`` is the raw string for string keys or a
+pickle for the other types.
+
+On posix systems background saves are performed by a forked child process
+which shares the parent memory copy-on-write.
+'''
+import os
+import time
+import pickle
+import struct
+from zlib import crc32
+
+from ...utils.structures import Dict, Zset, Deque
+
+
+MAGIC = b'PULSARDS'
+VERSION = 2
+OP_SELECTDB = 1
+OP_KEY = 2
+OP_EOF = 255
+TYPE_STRING = 0
+TYPE_PICKLE = 1
+WRITE_BUFFER = 1 << 20
+READ_BUFFER = 1 << 16
+
+version_struct = struct.Struct('>H')
+record_struct = struct.Struct('>BI')
+crc_struct = struct.Struct('>I')
+db_struct = struct.Struct('>I')
+key_struct = struct.Struct('>qBI')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def save_snapshot(cfg, filename, data, offset):
+    '''Save ``data`` into ``filename``.
+
+    :param data: list of ``(num, keys, expires)`` triplets where ``keys``
+        maps keys to values and ``expires`` keys to timers
+    :param offset: difference between the wall clock and the loop clock
+    '''
+    logger = cfg.configured_logger('pulsar.ds')
+    path, name = os.path.split(filename)
+    temp = os.path.join(path, 'temp_%s' % name)
+    start = time.time()
+    with open(temp, 'wb', buffering=WRITE_BUFFER) as file:
+        keys = write_snapshot(file, data, offset)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, filename)
+    logger.info('wrote %d keys into "%s" in %.3f seconds',
+                keys, filename, time.time() - start)
+
+
+def write_snapshot(file, data, offset):
+    '''Write a snapshot of ``data`` into a binary ``file``
+    '''
+    write = file.write
+    write(MAGIC)
+    write(version_struct.pack(VERSION))
+    count = 0
+    for num, keys, expires in data:
+        write(_record(OP_SELECTDB, db_struct.pack(num)))
+        for key, value in keys.items():
+            write(_record(OP_KEY, _key_payload(key, value, -1)))
+            count += 1
+        for key, t in expires.items():
+            expire = int(1000*(t.when + offset))
+            write(_record(OP_KEY, _key_payload(key, t.value, expire)))
+            count += 1
+    write(_record(OP_EOF, b''))
+    return count
+
+
+def read_snapshot(file):
+    '''Generator of ``(num, key, value, expire)`` tuples from a snapshot
+    ``file`` opened in binary mode.
+
+    ``expire`` is the absolute expiry in milliseconds or ``None``.
+    '''
+    header = file.read(len(MAGIC) + version_struct.size)
+    if header[:len(MAGIC)] != MAGIC:
+        raise SnapshotError('Not a pulsar-ds snapshot')
+    version, = version_struct.unpack(header[len(MAGIC):])
+    if version > VERSION:
+        raise SnapshotError('Unsupported snapshot version %d' % version)
+    num = 0
+    while True:
+        head = file.read(record_struct.size)
+        if len(head) < record_struct.size:
+            raise SnapshotError('Snapshot is truncated')
+        opcode, length = record_struct.unpack(head)
+        payload = file.read(length)
+        crc = file.read(crc_struct.size)
+        if len(payload) < length or len(crc) < crc_struct.size:
+            raise SnapshotError('Snapshot is truncated')
+        if crc32(payload, crc32(head)) != crc_struct.unpack(crc)[0]:
+            raise SnapshotError('Snapshot checksum mismatch')
+        if opcode == OP_KEY:
+            expire, vtype, klen = key_struct.unpack_from(payload)
+            start = key_struct.size
+            key = payload[start:start+klen]
+            value = payload[start+klen:]
+            if vtype == TYPE_STRING:
+                value = bytearray(value)
+            else:
+                value = pickle.loads(value)
+            yield num, key, value, None if expire < 0 else expire
+        elif opcode == OP_SELECTDB:
+            num, = db_struct.unpack(payload)
+        elif opcode == OP_EOF:
+            break
+        else:
+            raise SnapshotError('Unknown snapshot opcode %d' % opcode)
+
+
+def is_snapshot(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class ForkedSaver:
+    '''Save a snapshot from a forked child process.
+
+    It exposes the subset of :class:`multiprocessing.Process` used by the
+    :class:`.Storage`.
+    '''
+    def __init__(self, cfg, filename, data, offset):
+        self.exitcode = None
+        self.pid = os.fork()
+        if not self.pid:
+            code = 1
+            try:
+                save_snapshot(cfg, filename, data, offset)
+                code = 0
+            finally:
+                os._exit(code)
+
+    def is_alive(self):
+        if self.exitcode is None:
+            pid, status = os.waitpid(self.pid, os.WNOHANG)
+            if not pid:
+                return True
+            self.exitcode = os.WEXITSTATUS(status)
+        return False
+
+    def join(self):
+        if self.exitcode is None:
+            _, status = os.waitpid(self.pid, 0)
+            self.exitcode = os.WEXITSTATUS(status)
+
+
+def _record(opcode, payload):
+    head = record_struct.pack(opcode, len(payload))
+    return b''.join((head, payload,
+                     crc_struct.pack(crc32(payload, crc32(head)))))
+
+
+def _key_payload(key, value, expire):
+    if isinstance(value, bytearray):
+        vtype, value = TYPE_STRING, value
+    elif isinstance(value, (set, Dict, Deque, Zset)):
+        vtype, value = TYPE_PICKLE, pickle.dumps(value, protocol=4)
+    else:
+        raise SnapshotError('Cannot save %s' % type(value))
+    return b''.join((key_struct.pack(expire, vtype, len(key)), key, value))
@@ -1,14 +1,39 @@
-import shutil
-import pickle
+from sys import getsizeof
+from heapq import nsmallest
 
+from ...utils.structures import Zset
 
-def save_data(cfg, filename, data):
-    logger = cfg.configured_logger('pulsar.ds')
-    temp = 'temp_%s' % filename
-    with open(temp, 'wb') as file:
-        pickle.dump(data, file, protocol=2)
-    shutil.move(temp, filename)
-    logger.info('wrote data into "%s"', filename)
+
+# Approximate overhead of a key in the database and of an element
+# in a collection
+KEY_OVERHEAD = 96
+ITEM_OVERHEAD = 16
+ZSET_ITEM_OVERHEAD = 120
+# Elements of a collection are scanned in the order of their hash
+HASH_MASK = (1 << 64) - 1
+
+
+def memory_size(key, value):
+    '''Approximate memory used by ``key`` and its ``value``.
+
+    The size of collections is estimated from one element only so that
+    the calculation does not depend on the number of elements.
+    '''
+    size = KEY_OVERHEAD + getsizeof(key)
+    if isinstance(value, bytearray):
+        return size + getsizeof(value)
+    N = len(value)
+    if isinstance(value, Zset):
+        member = next(iter(value._dict)) if N else b''
+        return size + N*(ZSET_ITEM_OVERHEAD + getsizeof(member))
+    size += getsizeof(value)
+    if N:
+        if isinstance(value, dict):
+            field, item = next(iter(value.items()))
+            size += N*(2*ITEM_OVERHEAD + getsizeof(field) + getsizeof(item))
+        else:
+            size += N*(ITEM_OVERHEAD + getsizeof(next(iter(value))))
+    return size
 
 
 def sort_command(store, client, request, value):
@@ -196,3 +221,29 @@ def or_op(x, y):
 
 def xor_op(x, y):
     return x ^ y
+
+
+def scan_collection(values, cursor, count):
+    '''Return the next cursor and up to about ``count`` elements of
+    ``values`` whose hash is not less than ``cursor``.
+
+    Elements are visited in the order of their (unsigned) hash, which does
+    not depend on insertions or removals, so that no state is kept between
+    calls. Elements with the same hash are always returned together.
+    Unlike the keyspace scan, each call is linear in the size of the
+    collection, although only ``count`` elements are sorted.
+    '''
+    if not cursor and len(values) <= count:
+        return 0, list(values)
+    candidates = [(hash(v) & HASH_MASK, v) for v in values]
+    if cursor:
+        candidates = [c for c in candidates if c[0] >= cursor]
+    if len(candidates) <= count:
+        return 0, [v for _, v in candidates]
+    bound = nsmallest(count, (h for h, _ in candidates))[-1]
+    result = [v for h, v in candidates if h <= bound]
+    return 0 if len(result) == len(candidates) else bound + 1, result
+
+
+def match_bytes(search, value):
+    return search(value.decode('utf-8', 'ignore'))
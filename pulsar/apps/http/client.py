@@ -486,6 +486,8 @@ class HttpResponse(ProtocolConsumer):
     _data_sent = None
     _cookies = None
     _raw = None
+    _body = None
+    _decoder = None
     content = None
     headers = None
     parser = None
@@ -636,20 +638,32 @@ class HttpResponse(ProtocolConsumer):
         request = self.request
         self.status_code = self.parser.get_status_code()
         self.version = self.parser.get_http_version()
+        self._decoder = self.producer.content_decoder(self)
         self.event('on_headers').fire()
         if request.method == 'HEAD':
             self.event('post_request').fire()
 
     def on_body(self, body):
+        if self._decoder:
+            body = self._decoder.decompress(body)
+            if not body:
+                return
         if self.request.stream or self._raw:
             self.raw.feed_data(body)
-        elif self.content is None:
-            self.content = body
+        elif self._body is None:
+            self._body = [body]
         else:
-            self.content += body
+            self._body.append(body)
 
     def on_message_complete(self):
-        self.producer.maybe_decompress(self)
+        if self._decoder:
+            decoder, self._decoder = self._decoder, None
+            body = decoder.flush()
+            if body:
+                self.on_body(body)
+        if self._body is not None:
+            body, self._body = self._body, None
+            self.content = body[0] if len(body) == 1 else b''.join(body)
         self.fire_event('post_request')
 
     def write_body(self):
@@ -795,8 +809,8 @@ class HttpClient(AbstractClient):
         self.event('post_request').bind(Expect())
         self.event('post_request').bind(Redirect())
         self._decompressors = dict(
-            gzip=GzipDecompress(),
-            deflate=DeflateDecompress()
+            gzip=GzipDecompress,
+            deflate=DeflateDecompress
         )
 
     # API
@@ -889,13 +903,15 @@ class HttpClient(AbstractClient):
         self.connection_pools.clear()
         return asyncio.gather(*waiters, loop=self._loop)
 
-    def maybe_decompress(self, response):
+    def content_decoder(self, response):
+        """Incremental decoder of the ``response`` body or ``None``
+        """
         encoding = response.headers.get('content-encoding')
         if encoding and response.request.decompress:
             deco = self._decompressors.get(encoding)
-            if not deco:
-                self.logger.warning('Cannot decompress %s', encoding)
-            response.content = deco(response.content)
+            if deco:
+                return deco()
+            self.logger.warning('Cannot decompress %s', encoding)
 
     async def __aenter__(self):
         await self.close()
@@ -2,16 +2,38 @@ import zlib
 
 
 class GzipDecompress:
+    '''Incremental decoder of gzip encoded bodies
+    '''
+    def __init__(self):
+        self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
 
     def __call__(self, data):
-        deco = zlib.decompressobj(16 + zlib.MAX_WBITS)
-        return deco.decompress(data)
+        return self.decompress(data) + self.flush()
 
+    def decompress(self, data):
+        return self._decoder.decompress(data)
 
-class DeflateDecompress:
+    def flush(self):
+        return self._decoder.flush()
 
-    def __call__(self, data):
-        try:
-            return zlib.decompressobj().decompress(data)
-        except zlib.error:
-            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+
+class DeflateDecompress(GzipDecompress):
+    '''Incremental decoder of deflate encoded bodies
+
+    Servers send either zlib wrapped or raw deflate streams, the format
+    is detected from the first chunk.
+    '''
+    def __init__(self):
+        self._decoder = None
+
+    def decompress(self, data):
+        if self._decoder is None:
+            self._decoder = zlib.decompressobj()
+            try:
+                return self._decoder.decompress(data)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return self._decoder.flush() if self._decoder else b''
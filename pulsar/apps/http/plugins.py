@@ -10,7 +10,9 @@ from pulsar.utils.httpurl import (
     REDIRECT_CODES, requote_uri, get_hostport, host_no_default_port,
     tls_schemes
 )
-from pulsar.utils.websocket import SUPPORTED_VERSIONS, websocket_key
+from pulsar.utils.websocket import (
+    SUPPORTED_VERSIONS, WS_EXTENSIONS, websocket_key, parse_extensions
+)
 
 
 requestKey = namedtuple('requestKey', 'scheme host port tunnel verify cert')
@@ -236,7 +238,13 @@ class WebSocket:
             handler = request.websocket_handler
             if not handler:
                 handler = WS()
-            parser = request.client.frame_parser(kind=1)
+            extensions = self.accept_extensions(
+                response.headers.get('Sec-WebSocket-Extensions'))
+            if extensions:
+                parser = request.client.frame_parser(kind=1,
+                                                     extensions=extensions)
+            else:
+                parser = request.client.frame_parser(kind=1)
             consumer = partial(WebSocketClient.create,
                                response, handler, parser)
             connection.upgrade(consumer)
@@ -244,6 +252,16 @@ class WebSocket:
             websocket = connection.current_consumer()
             response.request_again = lambda r: websocket
 
+    def accept_extensions(self, header):
+        '''Client side extensions negotiated by the server in ``header``
+        '''
+        extensions = []
+        for name, params in parse_extensions(header):
+            if name not in WS_EXTENSIONS:
+                raise PulsarException('Extension %s not supported' % name)
+            extensions.append(WS_EXTENSIONS[name].accept(params))
+        return extensions
+
 
 class InfoHeaders:
     __slots__ = ('headers',)
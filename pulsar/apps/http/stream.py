@@ -1,4 +1,6 @@
-import asyncio
+from collections import deque
+
+from ...asynclib.mixins import DEFAULT_LIMIT
 
 
 class StreamConsumedError(Exception):
@@ -8,11 +10,22 @@ class StreamConsumedError(Exception):
 
 class HttpStream:
     """An asynchronous streaming body for an HTTP response
+
+    Body chunks are buffered until consumed. Reading from the connection
+    is paused once more than ``limit`` bytes are buffered and resumed when
+    the consumer has drained the buffer below half of that.
     """
-    def __init__(self, response):
+    def __init__(self, response, limit=DEFAULT_LIMIT):
         self._response = response
         self._streamed = False
-        self._queue = asyncio.Queue()
+        self._buffer = deque()
+        self._buffer_size = 0
+        self._limit = limit
+        self._paused = False
+        self._waiter = None
+        event = response.event('post_request')
+        if not event.fired():
+            event.bind(self._finished)
 
     def __repr__(self):
         return repr(self._response)
@@ -42,27 +55,68 @@ class HttpStream:
 
     def __next__(self):
         if self.done:
-            try:
-                return self._queue.get_nowait()
-            except asyncio.QueueEmpty:
-                raise StopIteration
+            if self._buffer:
+                return self._pop()
+            raise StopIteration
         else:
-            return self._queue.get()
+            return self._get()
 
     def __aiter__(self):
         return _start_iter(self)
 
     async def __anext__(self):
-        if self.done:
-            try:
-                return self._queue.get_nowait()
-            except asyncio.QueueEmpty:
-                raise StopAsyncIteration
-        else:
-            return await self._queue.get()
+        body = await self._get()
+        if body is None:
+            raise StopAsyncIteration
+        return body
 
     def feed_data(self, body):
-        self._queue.put_nowait(body)
+        self._buffer.append(body)
+        self._buffer_size += len(body)
+        self._wakeup()
+        if not self._paused and self._buffer_size > self._limit:
+            transport = self._transport()
+            if transport:
+                self._paused = True
+                transport.pause_reading()
+
+    # INTERNALS
+    async def _get(self):
+        while not self._buffer:
+            if self.done:
+                return
+            self._waiter = self._response._loop.create_future()
+            await self._waiter
+        return self._pop()
+
+    def _pop(self):
+        body = self._buffer.popleft()
+        self._buffer_size -= len(body)
+        if self._paused and self._buffer_size <= self._limit // 2:
+            self._resume()
+        return body
+
+    def _resume(self):
+        self._paused = False
+        transport = self._transport()
+        if transport and not transport.is_closing():
+            transport.resume_reading()
+
+    def _transport(self):
+        connection = self._response.connection
+        return connection.transport if connection else None
+
+    def _wakeup(self):
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _finished(self, _, exc=None, **kw):
+        if self._paused:
+            self._resume()
+        self._wakeup()
 
 
 def _start_iter(self):
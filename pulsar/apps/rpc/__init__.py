@@ -78,7 +78,7 @@ Server Commands
 """
 from .handlers import (
     RpcHandler, rpc_method, InvalidRequest, InvalidParams,
-    NoSuchFunction, InternalError
+    NoSuchFunction, InternalError, MethodTimeout
 )
 from .jsonrpc import JSONRPC, JsonProxy, JsonBatchProxy
 from .mixins import PulsarServerCommands
@@ -91,6 +91,7 @@ __all__ = [
     'InvalidParams',
     'NoSuchFunction',
     'InternalError',
+    'MethodTimeout',
     'JSONRPC',
     'JsonProxy',
     'JsonBatchProxy',
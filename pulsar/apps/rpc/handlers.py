@@ -49,13 +49,21 @@ class InternalError(InvalidRequest):
     msg = 'Internal error'
 
 
+@rpc_exception
+class MethodTimeout(InvalidRequest):
+    status = 504
+    fault_code = -32000
+    msg = 'The method did not complete in time'
+
+
 def exception(code, msg):
     global _exceptions
     cls = _exceptions.get(code, Exception)
     raise cls(msg)
 
 
-def rpc_method(func, doc=None, format='json', request_handler=None):
+def rpc_method(func, doc=None, format='json', request_handler=None,
+               timeout=None):
     '''A decorator which exposes a function ``func`` as an rpc function.
 
     :param func: The function to expose.
@@ -66,6 +74,8 @@ def rpc_method(func, doc=None, format='json', request_handler=None):
         and ``kwargs`` and return a new ``kwargs`` to be passed to ``func``.
         It can be used to add additional parameters based on request and
         format.
+    :param timeout: Optional time budget, in seconds, for the asynchronous
+        result of ``func``. It overrides the handler ``method_timeout``.
     '''
     def _(self, *args, **kwargs):
         request = args[0]
@@ -83,6 +93,7 @@ def rpc_method(func, doc=None, format='json', request_handler=None):
     _.__doc__ = doc or func.__doc__
     _.__name__ = func.__name__
     _.FromApi = True
+    _.timeout = timeout
     return _
 
 
@@ -125,6 +136,7 @@ class RpcHandler(metaclass=MetaRpcHandler):
     separator = '.'
     '''HTTP method allowed by this handler.'''
     virtual = True
+    _handlers = None
 
     def __init__(self, subhandlers=None, title=None, documentation=None):
         self._parent = None
@@ -161,6 +173,10 @@ class RpcHandler(metaclass=MetaRpcHandler):
         '''
         self.subHandlers[prefix] = handler
         handler._parent = self
+        parent = self
+        while parent is not None:
+            parent._handlers = None
+            parent = parent._parent
         return self
 
     def getSubHandler(self, prefix):
@@ -168,8 +184,24 @@ class RpcHandler(metaclass=MetaRpcHandler):
         return self.subHandlers.get(prefix)
 
     def get_handler(self, method):
+        '''The bound rpc function for ``method``
+
+        Lookups are cached, the cache is cleared when a sub handler is added
+        to this handler or to one of its children.
+        '''
+        try:
+            return self._handlers[method]
+        except (KeyError, TypeError):
+            pass
         if not method:
             raise NoSuchFunction('RPC method not supplied')
+        proc = self._get_handler(method)
+        if self._handlers is None:
+            self._handlers = {}
+        self._handlers[method] = proc
+        return proc
+
+    def _get_handler(self, method):
         bits = method.split(self.separator, 1)
         handler = self
         method_name = bits[-1]
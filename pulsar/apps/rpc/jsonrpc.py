@@ -2,13 +2,13 @@ import logging
 import asyncio
 from collections import namedtuple
 
-from pulsar.api import AsyncObject
+from pulsar.api import AsyncObject, isawaitable
 from pulsar.utils.string import gen_unique_id
 from pulsar.utils.tools import checkarity
 from pulsar.utils.system import json
 from pulsar.apps.http import HttpClient
 
-from .handlers import RpcHandler, InvalidRequest, exception
+from .handlers import RpcHandler, InvalidRequest, MethodTimeout, exception
 
 
 logger = logging.getLogger('pulsar.jsonrpc')
@@ -26,9 +26,18 @@ class JSONRPC(RpcHandler):
     A remote method is invoked by sending a request to a remote service,
     the request is a single object serialised using JSON.
 
+    The responses of a batch request are streamed to the client, as a
+    chunked JSON array, in the order the calls complete.
+
     .. _`JSON-RPC 2.0`: http://www.jsonrpc.org/specification
     '''
     version = '2.0'
+    max_concurrency = 16
+    '''Maximum number of calls of a batch request executed concurrently.'''
+    method_timeout = None
+    '''Default time budget, in seconds, for the asynchronous result of a
+    method. Set the ``timeout`` of :func:`.rpc_method` to override it for a
+    given method.'''
 
     async def __call__(self, request):
         response = request.response
@@ -45,19 +54,48 @@ class JSONRPC(RpcHandler):
         else:
             # if it's batch request
             if isinstance(data, list):
-                status = 200
-
-                tasks = [self._call(request, each) for each in data]
-                result = await asyncio.gather(*tasks)
-                res = [r[0] for r in result]
+                response = request.json_response((), 200)
+                response.content = self._batch(request, data)
+                return response
             else:
                 res, status = await self._call(request, data)
 
         response.status_code = status
         return request.json_response(res)
 
+    def _batch(self, request, data):
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue(self.max_concurrency)
+        calls = iter(data)
+        workers = [loop.create_task(self._batch_worker(request, calls, queue))
+                   for _ in range(min(self.max_concurrency, len(data)))]
+        try:
+            yield b'['
+            for n in range(len(data)):
+                yield self._batch_result(queue, n)
+            yield b']'
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _batch_worker(self, request, calls, queue):
+        for data in calls:
+            try:
+                res, _ = await self._call(request, data)
+                res = json.dumps(res)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                res = json.dumps(self._get_error_and_status(exc, data)[0])
+            await queue.put(res)
+
+    async def _batch_result(self, queue, n):
+        res = await queue.get()
+        return (',%s' % res if n else res).encode('utf-8')
+
     async def _call(self, request, data):
         proc = None
+        cancelled = False
         try:
             if (not isinstance(data, dict) or
                     data.get('jsonrpc') != self.version or
@@ -74,11 +112,27 @@ class JSONRPC(RpcHandler):
             #
             proc = self.get_handler(data.get('method'))
             result = proc(request, *args, **kwargs)
-            try:
-                result = await result
-            except TypeError:
-                pass
-        except Exception as exc:
+            if isawaitable(result):
+                timeout = getattr(proc, 'timeout', None)
+                timeout = self.method_timeout if timeout is None else timeout
+                future = asyncio.ensure_future(result)
+                try:
+                    done, _ = await asyncio.wait((future,),
+                                                 timeout=timeout or None)
+                except asyncio.CancelledError:
+                    # this call is cancelled, not the method
+                    cancelled = True
+                    future.cancel()
+                    raise
+                if not done:
+                    future.cancel()
+                    raise MethodTimeout(
+                        'RPC method "%s" did not complete in %s seconds' %
+                        (data.get('method'), timeout))
+                result = future.result()
+        except (Exception, asyncio.CancelledError) as exc:
+            if cancelled:
+                raise
             return self._get_error_and_status(exc, data, proc)
 
         return {
@@ -87,7 +141,7 @@ class JSONRPC(RpcHandler):
             'result': result
         }, 200
 
-    def _get_error_and_status(self, exc, data, proc):
+    def _get_error_and_status(self, exc, data, proc=None):
         if isinstance(exc, TypeError) and proc:
             params = data.get('params')
             if isinstance(params, dict):
@@ -164,6 +218,14 @@ class JsonProxy(AsyncObject):
 
         Default ``None``.
     :param encoding: encoding of the request. Default ``ascii``.
+    :param batch_size: when greater than one, calls are collected and sent
+        to the server as a single JSON-RPC batch request of at most
+        ``batch_size`` calls. Each call still returns its own result.
+        Not used when ``full_response`` is ``True``. Default ``None``.
+    :param batch_delay: seconds to wait for more calls before sending a
+        batch. When ``0`` the batch is sent at the next iteration of the
+        event loop, and contains the calls made in the current one.
+        Default ``0``.
 
     Lets say your RPC server is running at ``http://domain.name.com/``::
 
@@ -173,6 +235,12 @@ class JsonProxy(AsyncObject):
         >>> a.ping()
         'pong'
 
+    With auto-batching, concurrent calls share one HTTP request::
+
+        >>> a = JsonProxy('http://domain.name.com/', batch_size=100)
+        >>> await asyncio.gather(a.add(3, 4), a.ping())
+        [7, 'pong']
+
     '''
     separator = '.'
     default_version = '2.0'
@@ -181,10 +249,13 @@ class JsonProxy(AsyncObject):
         'accept': 'application/json, text/*; q=0.5',
         'content-type': 'application/json'
     }
+    _pending = None
+    _pending_handle = None
 
     def __init__(self, url, version=None, data=None, headers=None,
                  full_response=False, http=None, timeout=None, sync=False,
-                 loop=None, encoding='ascii', **kw):
+                 loop=None, encoding='ascii', batch_size=None, batch_delay=0,
+                 **kw):
         self.sync = sync
         self.headers = headers
         self._url = url
@@ -198,6 +269,8 @@ class JsonProxy(AsyncObject):
             http = HttpClient(timeout=timeout, loop=loop, **kw)
         self.http = http
         self._encoding = encoding
+        self._batch_size = 0 if full_response else (batch_size or 0)
+        self._batch_delay = batch_delay
 
     @property
     def url(self):
@@ -227,13 +300,13 @@ class JsonProxy(AsyncObject):
     async def _call(self, name, *args, **kwargs):
         data = self._get_data(name, *args, **kwargs)
         is_ascii = self._encoding == 'ascii'
-        data = json.dumps(data, ensure_ascii=is_ascii).encode(self._encoding)
-        return await self._send(data)
+        body = json.dumps(data, ensure_ascii=is_ascii).encode(self._encoding)
+        if self._batch_size > 1:
+            return await self._batch_call(data['id'], body)
+        return await self._send(body)
 
     async def _send(self, data):
-        headers = self.default_headers.copy()
-        headers.update(self.headers or ())
-        resp = await self.http.post(self._url, data=data, headers=headers)
+        resp = await self._post(data)
         if self._full_response:
             return resp
         else:
@@ -243,6 +316,68 @@ class JsonProxy(AsyncObject):
                     resp.raise_for_status()
             return self.loads(content)
 
+    def _post(self, data):
+        headers = self.default_headers.copy()
+        headers.update(self.headers or ())
+        return self.http.post(self._url, data=data, headers=headers)
+
+    def _batch_call(self, id, body):
+        future = self._loop.create_future()
+        if self._pending is None:
+            self._pending = []
+            if self._batch_delay:
+                self._pending_handle = self._loop.call_later(
+                    self._batch_delay, self._flush)
+            else:
+                self._pending_handle = self._loop.call_soon(self._flush)
+        self._pending.append((id, body, future))
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        return future
+
+    def _flush(self):
+        pending = self._pending
+        self._pending = None
+        if self._pending_handle:
+            self._pending_handle.cancel()
+            self._pending_handle = None
+        if pending:
+            self._loop.create_task(self._send_batch(pending))
+
+    async def _send_batch(self, pending):
+        try:
+            if len(pending) == 1:
+                _, body, future = pending[0]
+                result = await self._send(body)
+                if not future.done():
+                    future.set_result(result)
+                return
+            data = b'[' + b','.join((body for _, body, _ in pending)) + b']'
+            resp = await self._post(data)
+            content = resp.json()
+            if not isinstance(content, list):
+                if not resp.ok and 'error' not in content:
+                    resp.raise_for_status()
+                # the whole batch failed
+                self.loads(content)
+                content = ()
+            responses = dict(((r.get('id'), r) for r in content
+                              if isinstance(r, dict)))
+            for id, _, future in pending:
+                if future.done():
+                    continue
+                response = responses.get(id)
+                try:
+                    if response is None:
+                        raise InvalidRequest('No response for request %s' % id)
+                    future.set_result(self.loads(response))
+                except Exception as exc:
+                    future.set_exception(exc)
+        except Exception as exc:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+
     def _get_data(self, func_name, *args, **kwargs):
         id = self.makeid()
         params = self.get_params(*args, **kwargs)
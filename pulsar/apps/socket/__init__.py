@@ -50,6 +50,11 @@ You can bind to a random available port by specifying 0 as the port number::
 
 useful during testing.
 
+To skip the TCP/IP stack when clients are on the same host, for example
+behind a local reverse proxy, bind to a unix domain socket::
+
+    python script.py --bind unix:/tmp/pulsar.sock
+
 
 backlog
 ---------
@@ -60,6 +65,25 @@ To specify the maximum number of queued connections you can use the
 
 rarely used.
 
+cork
+---------------
+To coalesce the data written to a client :class:`.Connection` during an
+event loop iteration into one write, use the :ref:`cork <setting-cork>`
+setting::
+
+    python script.py --cork
+
+useful when clients pipeline many small requests.
+
+reuse_port
+---------------
+To let the kernel balance new connections across workers, each one
+listening on its own ``SO_REUSEPORT`` socket, use the
+:ref:`reuse-port <setting-reuse_port>` setting::
+
+    python script.py --reuse-port --workers 4
+
+
 keep_alive
 ---------------
 To control how long a server :class:`.Connection` is kept alive after the
@@ -92,6 +116,10 @@ and then spawn several process-based actors which listen on the
 same shared socket.
 This is how pre-forking servers operate.
 
+With the :ref:`reuse-port <setting-reuse_port>` setting the parent process
+only reserves the addresses and each worker binds and listens on its own
+``SO_REUSEPORT`` socket, so that the kernel distributes connections.
+
 When running a :class:`SocketServer` in threading mode::
 
     python script.py --concurrency thread
@@ -123,10 +151,11 @@ except ImportError:     # pragma    nocover
     ssl = None
 
 from pulsar import DEFAULT_PORT, SERVER_SOFTWARE
-from ...utils.internet import parse_address
+from ...utils.internet import parse_address, reuse_port_sockets
 from ...utils.system import platform
 from ...utils.exceptions import ImproperlyConfigured
-from ...utils.config import pass_through, validate_pos_int, Config, Setting
+from ...utils.config import (pass_through, validate_pos_int, validate_bool,
+                             Config, Setting)
 from ...asynclib.protocols import (
     TcpServer, DatagramServer, Connection, DatagramProtocol
 )
@@ -182,6 +211,37 @@ class Backlog(SocketSetting):
         """
 
 
+class Cork(SocketSetting):
+    name = "cork"
+    flags = ["--cork"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Coalesce data written to a connection during an event loop
+        iteration into a single write.
+
+        Reduces the number of ``send`` system calls when many small
+        responses are written together, for example pipelined requests.
+        """
+
+
+class ReusePort(SocketSetting):
+    name = "reuse_port"
+    flags = ["--reuse-port"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Each worker binds its own ``SO_REUSEPORT`` listening socket.
+
+        Rather than accepting on a socket shared by all workers, the
+        kernel balances new connections across the workers' sockets,
+        avoiding thundering-herd wakeups. Only available on platforms
+        supporting ``SO_REUSEPORT`` and in multi-process mode.
+        """
+
+
 class KeyFile(SocketSetting):
     name = "key_file"
     flags = ["--key-file"]
@@ -222,7 +282,7 @@ class SocketServer(Application):
 
         By default it returns the :meth:`.Application.callable`.
         '''
-        return partial(Connection, self.callable(idx))
+        return partial(Connection, self.callable(idx), cork=self.cfg.cork)
 
     def callable(self, idx=0):
         callables = self.cfg.callable
@@ -230,13 +290,17 @@ class SocketServer(Application):
             callables = callables,
         return callables[idx]
 
-    async def binds(self, worker, sockets=None):
+    async def binds(self, worker, sockets=None, reuse_port=None):
         servers = {}
         for idx, bind in enumerate(self.cfg.bind.split(',')):
             name = self.name
             if idx:
                 name = '%s%s' % (name, idx)
             protocol_factory = self.protocol_factory(idx)
+            if reuse_port:
+                sockets = {name: []}
+                for address in reuse_port[name]:
+                    sockets[name].extend(reuse_port_sockets(address))
             if sockets:
                 server = await self.create_server(
                     worker, protocol_factory, sockets=sockets[name], idx=idx
@@ -257,30 +321,46 @@ class SocketServer(Application):
         '''Create the socket listening to the ``bind`` address.
 
         If the platform does not support multiprocessing sockets set the
-        number of workers to 0.
+        number of workers to 0. In :ref:`reuse_port <setting-reuse_port>`
+        mode the addresses are only reserved, with bound sockets which do
+        not listen, and each worker binds its own listening socket.
         '''
         cfg = self.cfg
         if (not platform.has_multiprocessing_socket or
                 cfg.concurrency == 'thread'):
             cfg.set('workers', 0)
-        servers = await self.binds(monitor)
-        if not servers:
-            raise ImproperlyConfigured('Could not open a socket. '
-                                       'No address to bind to')
-        addresses = []
-        for server in servers.values():
-            addresses.extend(server.addresses)
+        if self.reuse_port():
+            reserved = self.reserve(monitor)
+            addresses = [sock.getsockname() for sockets in reserved.values()
+                         for sock in sockets]
+        else:
+            servers = await self.binds(monitor)
+            if not servers:
+                raise ImproperlyConfigured('Could not open a socket. '
+                                           'No address to bind to')
+            addresses = []
+            for server in servers.values():
+                addresses.extend(server.addresses)
         self.cfg.addresses = addresses
 
     def actorparams(self, monitor, params):
-        params['sockets'] = dict(((name, server.sockets) for
-                                  name, server in monitor.servers.items()))
+        reserved = monitor.extra.get('reuse_port')
+        if reserved:
+            params['sockets'] = None
+            params['reuse_port'] = dict(
+                ((name, [sock.getsockname() for sock in sockets])
+                 for name, sockets in reserved.items()))
+        else:
+            params['sockets'] = dict(((name, server.sockets) for
+                                      name, server in monitor.servers.items()))
+            params['reuse_port'] = None
 
     async def worker_start(self, worker, exc=None):
         '''Start the worker by invoking the :meth:`create_server` method.
         '''
         if not exc and self.name not in worker.servers:
-            servers = await self.binds(worker, worker.sockets)
+            servers = await self.binds(worker, worker.sockets,
+                                       worker.reuse_port)
             for server in servers.values():
                 server.event('stop').bind(lambda _, **kw: worker.stop())
 
@@ -288,6 +368,9 @@ class SocketServer(Application):
         server = worker.servers.pop(self.name, None)
         if server:
             await server.close()
+        for sockets in worker.extra.pop('reuse_port', {}).values():
+            for sock in sockets:
+                sock.close()
         close = getattr(self.cfg.callable, 'close', None)
         if hasattr(close, '__call__'):
             try:
@@ -299,9 +382,48 @@ class SocketServer(Application):
     def worker_info(self, worker, data=None):
         server = worker.servers.get(self.name)
         if server and data:
-            data['%sserver' % self.name] = server.info()
+            info = server.info()
+            info['server']['reuse_port'] = bool(
+                getattr(worker, 'reuse_port', None))
+            info['clients']['accepted'] = server.sessions
+            data['%sserver' % self.name] = info
         return data
 
+    def reuse_port(self):
+        '''``True`` when workers bind their own ``SO_REUSEPORT`` sockets
+        '''
+        cfg = self.cfg
+        if not cfg.reuse_port or not cfg.workers:
+            return False
+        if any((not isinstance(parse_address(bind), tuple)
+                for bind in cfg.bind.split(','))):
+            return False
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            self.logger.warning('SO_REUSEPORT not available, workers '
+                                'will share the listening sockets')
+            return False
+        return True
+
+    def reserve(self, monitor):
+        '''Reserve the ``bind`` addresses with ``SO_REUSEPORT`` sockets
+        which do not listen, so that ports are resolved once for all
+        workers.
+        '''
+        reserved = {}
+        for idx, bind in enumerate(self.cfg.bind.split(',')):
+            name = self.name
+            if idx:
+                name = '%s%s' % (name, idx)
+            try:
+                reserved[name] = reuse_port_sockets(parse_address(bind))
+            except socket.error as e:
+                raise ImproperlyConfigured(e) from None
+        if not reserved:
+            raise ImproperlyConfigured('Could not open a socket. '
+                                       'No address to bind to')
+        monitor.extra['reuse_port'] = reserved
+        return reserved
+
     #   INTERNALS
     async def create_server(self, worker, protocol_factory, address=None,
                             sockets=None, idx=0):
@@ -365,3 +487,8 @@ class UdpSocketServer(SocketServer):
         '''Return the :class:`.DatagramProtocol` factory.
         '''
         return partial(DatagramProtocol, self.callable(idx))
+
+    def reuse_port(self):
+        '''Datagram workers always share the monitor sockets
+        '''
+        return False
@@ -209,4 +209,6 @@ async def run_test_server(cls, server, name=None, bind=None, **kwargs):
     s = server(**kwargs)
     cls.app_cfg = await send('arbiter', 'run', s)
     await asyncio.sleep(0.5)
-    cls.uri = 'http://{0}:{1}'.format(*cls.app_cfg.addresses[0])
+    address = cls.app_cfg.addresses[0]
+    if isinstance(address, tuple):
+        cls.uri = 'http://{0}:{1}'.format(*address)
@@ -57,15 +57,25 @@ WebSocket protocol
    :members:
    :member-order: bysource
 
+.. module:: pulsar.apps.ws.group
+
+WebSocket group
+~~~~~~~~~~~~~~~~~~~~
+
+.. autoclass:: WebSocketGroup
+   :members:
+   :member-order: bysource
+
 '''
 import logging
 
 from pulsar.apps import data
 
 from .websocket import WebSocket, WebSocketProtocol
+from .group import WebSocketGroup
 
 
-__all__ = ['WebSocket', 'WebSocketProtocol', 'WS']
+__all__ = ['WebSocket', 'WebSocketProtocol', 'WebSocketGroup', 'WS']
 
 
 LOGGER = logging.getLogger('pulsar.ws')
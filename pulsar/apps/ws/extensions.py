@@ -3,26 +3,199 @@ import zlib
 from pulsar.utils import websocket
 
 ############################################################################
-#  x-webkit-deflate-frame     Extension
+#  permessage-deflate     Extension
 #
-# http://code.google.com/p/pywebsocket/
+# https://tools.ietf.org/html/rfc7692
 
+DEFLATE_TAIL = b'\x00\x00\xff\xff'
+WINDOW_BITS = (9, 10, 11, 12, 13, 14, 15)
+MAX_MESSAGE_SIZE = 2**24
 
-class deflate_frame(websocket.Extension):
 
-    def __init__(self, window_bits=None):
-        self.window_bits = window_bits or zlib.MAX_WBITS
+class PerMessageDeflate(websocket.Extension):
+    '''Compress data frames with the ``permessage-deflate`` extension
 
-    def receive(self, frame, application_data):
-        if frame.rsv1 == 1:
-            application_data += b'\x00\x00\xff\xff'
-            return zlib.decompress(application_data)
+    Each connection keeps its own compressor and decompressor so that,
+    unless context takeover is disabled, messages are compressed using
+    the sliding window of the previous ones.
+
+    .. attribute:: server
+
+        ``True`` for the server side of the connection.
+
+    .. attribute:: min_size
+
+        Messages smaller than this number of bytes are sent uncompressed.
+
+    .. attribute:: max_size
+
+        Maximum size, in bytes, of a decompressed message. Larger messages
+        raise a :class:`.ProtocolError` with status code 1009 (message too
+        big). ``0`` for no limit.
+    '''
+    name = 'permessage-deflate'
+
+    def __init__(self, server=True, server_no_context_takeover=False,
+                 client_no_context_takeover=False,
+                 server_max_window_bits=None, client_max_window_bits=None,
+                 compress_level=6, min_size=64, max_size=MAX_MESSAGE_SIZE):
+        self.server = server
+        self.server_no_context_takeover = server_no_context_takeover
+        self.client_no_context_takeover = client_no_context_takeover
+        self.server_max_window_bits = server_max_window_bits
+        self.client_max_window_bits = client_max_window_bits
+        self.compress_level = compress_level
+        self.min_size = min_size
+        self.max_size = max_size
+        if server:
+            self._compress_reset = server_no_context_takeover
+            self._compress_bits = server_max_window_bits or zlib.MAX_WBITS
+            self._decompress_reset = client_no_context_takeover
+            self._decompress_bits = client_max_window_bits or zlib.MAX_WBITS
         else:
-            return application_data
+            self._compress_reset = client_no_context_takeover
+            self._compress_bits = client_max_window_bits or zlib.MAX_WBITS
+            self._decompress_reset = server_no_context_takeover
+            self._decompress_bits = server_max_window_bits or zlib.MAX_WBITS
+        self._compressor = None
+        self._decompressor = None
+        self._deflating = False
+        self._inflating = False
+        self._inflated = 0
+
+    @classmethod
+    def negotiate(cls, params, server_no_context_takeover=False,
+                  client_max_window_bits=None, **options):
+        '''Accept a client offer with ``params``
+
+        ``server_no_context_takeover`` and ``client_max_window_bits`` are
+        the server preferences, they are used when the client does not
+        ask for them. Offers with unknown or invalid parameters are
+        declined.
+        '''
+        accepted = {}
+        for key, value in params.items():
+            if key in ('server_no_context_takeover',
+                       'client_no_context_takeover'):
+                if value is not True:
+                    return
+                accepted[key] = True
+            elif key == 'server_max_window_bits':
+                bits = _window_bits(value)
+                if bits is None:
+                    return
+                accepted[key] = bits
+            elif key == 'client_max_window_bits':
+                if value is True:
+                    if client_max_window_bits:
+                        accepted[key] = client_max_window_bits
+                else:
+                    bits = _window_bits(value)
+                    if bits is None:
+                        return
+                    accepted[key] = min(bits, client_max_window_bits or 15)
+            else:
+                return
+        if server_no_context_takeover:
+            accepted['server_no_context_takeover'] = True
+        options.update(accepted)
+        return cls(server=True, **options)
+
+    @classmethod
+    def accept(cls, params):
+        options = {}
+        for key, value in params.items():
+            if key in ('server_no_context_takeover',
+                       'client_no_context_takeover'):
+                value = True
+            elif key in ('server_max_window_bits', 'client_max_window_bits'):
+                value = _window_bits(value)
+            else:
+                value = None
+            if value is None:
+                raise websocket.ProtocolError(
+                    'Invalid %s parameter %s' % (cls.name, key))
+            options[key] = value
+        return cls(server=False, **options)
+
+    def header(self):
+        params = [self.name]
+        if self.server_no_context_takeover:
+            params.append('server_no_context_takeover')
+        if self.client_no_context_takeover:
+            params.append('client_no_context_takeover')
+        if self.server_max_window_bits:
+            params.append('server_max_window_bits=%d' %
+                          self.server_max_window_bits)
+        if self.client_max_window_bits:
+            params.append('client_max_window_bits=%d' %
+                          self.client_max_window_bits)
+        return '; '.join(params)
+
+    def receive(self, frame, data):
+        opcode = frame.opcode
+        if opcode > 7:
+            return data
+        if opcode:
+            # first frame of a message
+            self._inflating = bool(frame.rsv1)
+            self._inflated = 0
+        if not self._inflating:
+            return data
+        max_size = self.max_size
+        if max_size and self._inflated > max_size:
+            # the remaining frames of a message over the limit
+            return b''
+        if self._decompressor is None:
+            self._decompressor = zlib.decompressobj(-self._decompress_bits)
+        if frame.final:
+            data += DEFLATE_TAIL
+        if max_size:
+            # stop inflating one byte past the limit
+            data = self._decompressor.decompress(
+                data, max_size - self._inflated + 1)
+            self._inflated += len(data)
+            if self._inflated > max_size:
+                self._decompressor = None
+                raise websocket.ProtocolError(
+                    'Message larger than %d bytes' % max_size, 1009)
+        else:
+            data = self._decompressor.decompress(data)
+        if frame.final and self._decompress_reset:
+            self._decompressor = None
+        return data
+
+    def send(self, opcode, final, data):
+        if opcode > 7:
+            return 0, data
+        rsv1 = 0
+        if opcode:
+            # first frame of a message
+            self._deflating = len(data) >= self.min_size
+            rsv1 = int(self._deflating)
+        if not self._deflating:
+            return 0, data
+        if self._compressor is None:
+            self._compressor = zlib.compressobj(
+                self.compress_level, zlib.DEFLATED, -self._compress_bits)
+        data = (self._compressor.compress(data) +
+                self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        if final:
+            if data.endswith(DEFLATE_TAIL):
+                data = data[:-4] or b'\x00'
+            if self._compress_reset:
+                self._compressor = None
+        return rsv1, data
+
 
-    def send(self, frame, application_data):
-        application_data = self._compress.compress(application_data)
-        return application_data
+def _window_bits(value):
+    try:
+        bits = int(value)
+    except (TypeError, ValueError):
+        return
+    # zlib does not support a window of 8 bits for raw deflate streams
+    if bits in WINDOW_BITS:
+        return bits
 
 
-# websocket.WS_EXTENSIONS['x-webkit-deflate-frame'] = deflate_frame
+websocket.WS_EXTENSIONS[PerMessageDeflate.name] = PerMessageDeflate
@@ -0,0 +1,184 @@
+import json
+import logging
+
+from pulsar.asynclib.mixins import DEFAULT_LIMIT
+from pulsar.utils.websocket import frame_parser
+
+from .extensions import PerMessageDeflate
+
+
+LOGGER = logging.getLogger('pulsar.ws')
+PLAIN = 0
+
+
+class WebSocketGroup:
+    '''A group of server side :class:`.WebSocketProtocol` receiving the
+    same messages.
+
+    A message is encoded once into a frame and the same bytes are written
+    to the connection of every member. Members which negotiated
+    ``permessage-deflate`` without server context takeover receive a frame
+    compressed once for all of them (when :attr:`compress` is ``True``),
+    the others receive the uncompressed frame.
+
+    Members are removed from the group when their connection is closed.
+
+    .. attribute:: max_buffer
+
+        Members with more than this number of bytes waiting to be written
+        are slow members and do not receive messages.
+
+    .. attribute:: drop_slow
+
+        If ``True`` slow members are closed and removed from the group,
+        otherwise they miss messages until they catch up.
+
+    .. attribute:: compress
+
+        Compress frames for members accepting shared compressed frames.
+
+    The group can be registered as a callback of :class:`.Channels` events,
+    see :meth:`register`.
+    '''
+    def __init__(self, max_buffer=None, drop_slow=False, compress=True,
+                 logger=None):
+        self.members = set()
+        self.max_buffer = max_buffer or 4*DEFAULT_LIMIT
+        self.drop_slow = drop_slow
+        self.compress = compress
+        self.logger = logger or LOGGER
+        self.skipped = 0
+        self.dropped = 0
+        self._parsers = {}
+
+    def __repr__(self):
+        return '%s(%d)' % (self.__class__.__name__, len(self.members))
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, websocket):
+        return websocket in self.members
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def add(self, websocket):
+        '''Add a ``websocket`` to the group
+        '''
+        if websocket not in self.members:
+            event = websocket.event('post_request')
+            if not event.fired():
+                self.members.add(websocket)
+                event.bind(self._member_closed)
+
+    def remove(self, websocket):
+        '''Remove a ``websocket`` from the group
+        '''
+        self.members.discard(websocket)
+
+    def broadcast(self, message, opcode=None):
+        '''Write ``message`` to all members of the group
+
+        :param message: message to send, a string or bytes
+        :param opcode: optional opcode, as in
+            :meth:`.WebSocketProtocol.write`
+        :return: the number of members the message was written to
+        '''
+        frames = {}
+        sent = 0
+        for websocket in tuple(self.members):
+            connection = websocket.connection
+            if connection is None or connection.closed:
+                self.members.discard(websocket)
+                continue
+            if self._pending(connection) > self.max_buffer:
+                self._slow(websocket)
+                continue
+            key = self._frame_key(websocket.parser)
+            try:
+                if key is None:
+                    websocket.write(message, opcode=opcode)
+                else:
+                    frame = frames.get(key)
+                    if frame is None:
+                        frame = self._parser(key).encode(message,
+                                                         opcode=opcode)
+                        frames[key] = frame
+                    connection.write(frame)
+            except ConnectionResetError:
+                self.members.discard(websocket)
+            else:
+                sent += 1
+        return sent
+
+    async def register(self, channels, channel, event='*'):
+        '''Broadcast ``event`` on ``channel`` of :class:`.Channels`
+        ``channels`` to the group members
+
+        Messages are encoded via :meth:`channel_message`.
+        '''
+        return await channels.register(channel, event, self)
+
+    async def unregister(self, channels, channel, event='*'):
+        '''Stop broadcasting ``event`` on ``channel``
+        '''
+        return await channels.unregister(channel, event, self)
+
+    def channel_message(self, channel, event, data):
+        '''Encode ``data`` of a :class:`.Channels` ``event`` as a message
+        '''
+        return json.dumps({'channel': channel.name,
+                           'event': event,
+                           'data': data})
+
+    def __call__(self, channel, event, data):
+        self.broadcast(self.channel_message(channel, event, data))
+
+    # INTERNALS
+    def _member_closed(self, websocket, **kw):
+        self.members.discard(websocket)
+
+    def _pending(self, connection):
+        size = connection._buffer_size + connection._corked_size
+        transport = connection.transport
+        if transport is not None:
+            size += transport.get_write_buffer_size()
+        return size
+
+    def _slow(self, websocket):
+        if self.drop_slow:
+            self.dropped += 1
+            self.members.discard(websocket)
+            self.logger.warning('Closing slow websocket %s', websocket)
+            websocket.connection.close()
+        else:
+            self.skipped += 1
+
+    def _frame_key(self, parser):
+        # masked frames are different for each member
+        if parser.encode_mask_length:
+            return
+        extensions = parser.extensions
+        if not extensions:
+            return PLAIN
+        if len(extensions) == 1:
+            extension = extensions[0]
+            if isinstance(extension, PerMessageDeflate):
+                if self.compress and extension._compress_reset:
+                    return extension._compress_bits
+                # uncompressed messages do not touch the compression
+                # context of the connection
+                return PLAIN
+
+    def _parser(self, key):
+        parser = self._parsers.get(key)
+        if parser is None:
+            if key == PLAIN:
+                parser = frame_parser()
+            else:
+                extension = PerMessageDeflate(server_no_context_takeover=True,
+                                              server_max_window_bits=key)
+                parser = frame_parser(extensions=[extension])
+            self._parsers[key] = parser
+        return parser
@@ -6,7 +6,9 @@ from pulsar.api import HttpException, ProtocolError, ProtocolConsumer
 from pulsar.asynclib.futures import maybe_async
 from pulsar.utils.string import to_bytes, native_str
 from pulsar.utils.httpurl import CHARSET
-from pulsar.utils.websocket import frame_parser, parse_close
+from pulsar.utils.websocket import (
+    frame_parser, parse_close, parse_extensions, WS_EXTENSIONS
+)
 from pulsar.apps import wsgi
 
 from . import extensions as ext    # noqa
@@ -54,7 +56,9 @@ class WebSocketProtocol(ProtocolConsumer):
         return self.handshake.cfg
 
     def feed_data(self, data):
-        frame = self.parser.decode(data)
+        if self.connection.closed:
+            return
+        frame = self._decode(data)
         while frame:
             if frame.is_close:
                 try:
@@ -70,7 +74,7 @@ class WebSocketProtocol(ProtocolConsumer):
                 self._on(self.handler.on_ping, frame)
             elif frame.is_pong:
                 self._on(self.handler.on_pong, frame)
-            frame = self.parser.decode()
+            frame = self._decode()
 
     def write(self, message, opcode=None, encode=True, **kw):
         '''Write a new ``message`` into the wire.
@@ -105,6 +109,15 @@ class WebSocketProtocol(ProtocolConsumer):
         '''
         return self.write(self.parser.close(code), opcode=0x8, encode=False)
 
+    def _decode(self, data=None):
+        try:
+            return self.parser.decode(data)
+        except ProtocolError as exc:
+            # close with the status code of the error when available
+            if not exc.status_code:
+                raise
+            self.write_close(exc.status_code)
+
     def _on(self, handler, frame):
         maybe_async(handler(self, frame.body), loop=self._loop)
 
@@ -126,14 +139,26 @@ class WebSocket(wsgi.Router):
     .. attribute:: parser_factory
 
         A factory of websocket frame parsers
+
+    .. attribute:: extensions
+
+        Dictionary of extensions, registered in ``WS_EXTENSIONS``, which can
+        be negotiated during the handshake. It maps the extension name to
+        a dictionary of options for the extension. By default all
+        registered extensions are available with default options, pass an
+        empty dictionary to disable extensions.
     """
     protocol_factory = WebSocketProtocol.create
     parser_factory = frame_parser
 
-    def __init__(self, route, handle, parser_factory=None, **kwargs):
+    def __init__(self, route, handle, parser_factory=None, extensions=None,
+                 **kwargs):
         super().__init__(route, **kwargs)
         self.handle = handle
         self.parser_factory = parser_factory or frame_parser
+        if extensions is None:
+            extensions = dict(((name, {}) for name in WS_EXTENSIONS))
+        self.extensions = extensions
 
     def get(self, request):
         headers_parser = self.handle_handshake(request)
@@ -177,12 +202,9 @@ class WebSocket(wsgi.Router):
         if subprotocols:
             for s in subprotocols.split(','):
                 ws_protocols.append(s.strip())
-        # Collect supported extensions
-        ws_extensions = []
-        extensions = environ.get('HTTP_SEC_WEBSOCKET_EXTENSIONS')
-        if extensions:
-            for e in extensions.split(','):
-                ws_extensions.append(e.strip())
+        # Negotiate supported extensions
+        ws_extensions = self.negotiate_extensions(
+            environ.get('HTTP_SEC_WEBSOCKET_EXTENSIONS'))
         # Build the frame parser
         version = environ.get('HTTP_SEC_WEBSOCKET_VERSION')
         try:
@@ -196,10 +218,28 @@ class WebSocket(wsgi.Router):
             headers.append(('Sec-WebSocket-Protocol',
                             ', '.join(parser.protocols)))
         if parser.extensions:
-            headers.append(('Sec-WebSocket-Extensions',
-                            ','.join(parser.extensions)))
+            extensions = (e.header() for e in parser.extensions)
+            headers.append(('Sec-WebSocket-Extensions', ', '.join(extensions)))
         return headers, parser
 
+    def negotiate_extensions(self, header):
+        '''Negotiate the extensions offered by the client in ``header``
+
+        Return a list of extensions, at most one for each name, in the order
+        offered by the client.
+        '''
+        extensions = []
+        names = set()
+        for name, params in parse_extensions(header):
+            options = self.extensions.get(name)
+            if name in names or options is None or name not in WS_EXTENSIONS:
+                continue
+            extension = WS_EXTENSIONS[name].negotiate(params, **options)
+            if extension:
+                names.add(name)
+                extensions.append(extension)
+        return extensions
+
     def challenge_response(self, key):
         sha1 = hashlib.sha1(to_bytes(key+WEBSOCKET_GUID))
         return native_str(base64.b64encode(sha1.digest()))
@@ -74,7 +74,7 @@ from .handlers import WsgiHandler, LazyWsgi
 from .routers import (Router, MediaRouter, MediaMixin, RouterParam,
                       file_response)
 from .auth import HttpAuthenticate, parse_authorization_header
-from .formdata import parse_form_data
+from .formdata import parse_form_data, BodyReaderStats
 from .headers import HOP_HEADERS
 from .utils import (handle_wsgi_error, render_error_debug, wsgi_request,
                     set_wsgi_request_class, dump_environ)
@@ -147,7 +147,16 @@ class WSGIServer(SocketServer):
         cfg = self.cfg
         server.keep_alive = cfg.http_keep_alive
         server.wsgi_callable = self.callable(idx)
+        server.body_stats = BodyReaderStats()
         return server
 
+    def worker_info(self, worker, data=None):
+        data = super().worker_info(worker, data)
+        server = worker.servers.get(self.name)
+        if server and data:
+            info = data['%sserver' % self.name]
+            info['body_reader'] = server.body_stats.info()
+        return data
+
     def protocol_factory(self, idx=0):
-        return partial(Connection, HttpServerResponse)
+        return partial(Connection, HttpServerResponse, cork=self.cfg.cork)
@@ -1,12 +1,13 @@
 import email.parser
 import asyncio
 import json
+import tempfile
 
+from time import monotonic
 from http.client import HTTPMessage, _MAXHEADERS
 from io import BytesIO
 from urllib.parse import parse_qs
 from base64 import b64encode
-from functools import reduce
 from cgi import valid_boundary, parse_header
 from inspect import isawaitable
 from asyncio import ensure_future
@@ -27,6 +28,24 @@ FORM_ENCODED_TYPES = ('application/x-www-form-urlencoded',
 BODY_DATA = 0
 BODY_FILES = 1
 LARGE_BODY_CODE = 403
+MULTIPART_CHUNK_SIZE = 2**16
+MULTIPART_SPOOL_SIZE = 2**20
+BODY_HIGH_WATER = 2**16
+
+
+class BodyReaderStats:
+    """Backpressure counters aggregated over :class:`HttpBodyReader`
+    instances of a server
+    """
+    __slots__ = ('paused', 'paused_time')
+
+    def __init__(self):
+        self.paused = 0
+        self.paused_time = 0
+
+    def info(self):
+        return {'paused': self.paused,
+                'paused_time': round(self.paused_time, 6)}
 
 
 def http_protocol(parser):
@@ -37,31 +56,54 @@ class HttpBodyReader:
     """Asynchronous body reader and parser
 
     An instance of this class is injected into the wsgi.input key
-    of the WSGI environment
+    of the WSGI environment.
+
+    The reader applies backpressure: the transport is paused once more
+    than twice ``high_water`` bytes are buffered and resumed when the
+    application has consumed the buffer down to ``high_water``.
+    Reading the whole body is bounded by ``limit`` while streaming.
     """
-    __slots__ = ('limit', 'transport', 'environ',
-                 '_reader', '_expect_sent', '_waiting')
+    __slots__ = ('limit', 'high_water', 'transport', 'environ', 'stats',
+                 'paused', 'paused_time', '_reader', '_expect_sent',
+                 '_waiting', '_paused_at', '_discard')
 
-    def __init__(self, transport, limit, environ):
+    def __init__(self, transport, limit, environ, high_water=None,
+                 stats=None):
         self.limit = limit
+        self.high_water = high_water or min(limit, BODY_HIGH_WATER)
         self.transport = transport
         self.environ = environ
-        self._reader = asyncio.StreamReader()
+        self.stats = stats
+        self.paused = 0
+        self.paused_time = 0
+        self._reader = asyncio.StreamReader(limit=self.high_water)
         self._expect_sent = None
         self._waiting = None
-        self._reader.set_transport(self.transport)
+        self._paused_at = None
+        self._discard = False
+        self._reader.set_transport(self)
 
     def feed_data(self, data):
-        self._reader.feed_data(data)
+        if not self._discard:
+            self._reader.feed_data(data)
 
     def feed_eof(self):
         self._reader.feed_eof()
 
+    def at_eof(self):
+        return self._reader.at_eof()
+
     def fail(self):
         if self._waiting_expect():
             raise HttpException(status=417)
 
     def read(self, n=-1):
+        if n is None or n < 0:
+            length = self.environ.get('CONTENT_LENGTH')
+            if length and int(length) > self.limit:
+                raise_large_body_error(self.limit)
+            self._can_continue()
+            return self._read_all()
         self._can_continue()
         return self._reader.read(n=n)
 
@@ -76,9 +118,57 @@ class HttpBodyReader:
         return line
 
     def readexactly(self, n):
+        if n > self.limit:
+            raise_large_body_error(self.limit)
         self._can_continue()
         return self._reader.readexactly(n)
 
+    def pause_reading(self):
+        """Pause the transport, called when the buffer is above the
+        high-water mark
+        """
+        if self._paused_at is None:
+            self._paused_at = monotonic()
+            self.paused += 1
+            if self.stats:
+                self.stats.paused += 1
+            self.transport.pause_reading()
+
+    def resume_reading(self):
+        """Resume the transport, called once the buffer has been drained
+        """
+        if self._paused_at is not None:
+            paused_time = monotonic() - self._paused_at
+            self._paused_at = None
+            self.paused_time += paused_time
+            if self.stats:
+                self.stats.paused_time += paused_time
+            if not self.transport.is_closing():
+                self.transport.resume_reading()
+
+    def discard(self):
+        """Drop buffered and incoming data, resuming the transport if paused
+
+        Called once the response has been sent so that a body which
+        the application did not consume cannot stall the connection.
+        """
+        if not self._discard:
+            self._discard = True
+            self._reader.feed_eof()
+            self.resume_reading()
+
+    async def _read_all(self):
+        chunks = []
+        size = 0
+        while True:
+            chunk = await self._reader.read(self.high_water)
+            if not chunk:
+                return b''.join(chunks)
+            size += len(chunk)
+            if size > self.limit:
+                raise_large_body_error(self.limit)
+            chunks.append(chunk)
+
     def _waiting_expect(self):
         '''``True`` when the client is waiting for 100 Continue.
         '''
@@ -137,6 +227,20 @@ def parse_form_data(request, stream=None, **kw):
     return decoder.parse()
 
 
+def multipart_parts(request, **kw):
+    '''Asynchronous iterator over the parts of a ``multipart/form-data``
+    request body, for handlers streaming uploads to storage.
+
+    See :meth:`MultipartDecoder.parts`.
+    '''
+    content_type, options = parse_options_header(
+        request.get('CONTENT_TYPE') or '')
+    if content_type != 'multipart/form-data':
+        raise HttpException(status=415)
+    options.update(kw)
+    return MultipartDecoder(request, options, None).parts()
+
+
 class FormDecoder:
     """Base class for decoding HTTP body data
     """
@@ -162,64 +266,209 @@ class FormDecoder:
 
 
 class MultipartDecoder(FormDecoder):
-    buffer = None
+    """Decoder of ``multipart/form-data`` bodies.
 
+    Parts are scanned in chunks of ``chunk_size`` bytes (option, default
+    64KB). Parts larger than ``spool_size`` bytes (option, default 1MB or
+    the stream buffer if smaller) are written to temporary files unless
+    a ``stream`` callable consumes them, other parts are kept in memory
+    and can't be larger than the stream buffer limit.
+    """
     @property
     def boundary(self):
         return self.options.get('boundary', '')
 
+    @property
+    def chunk_size(self):
+        return self.options.get('chunk_size', MULTIPART_CHUNK_SIZE)
+
+    @property
+    def spool_size(self):
+        return self.options.get('spool_size',
+                                min(MULTIPART_SPOOL_SIZE, self.limit))
+
     def parse(self):
+        reader = self.reader()
+        if isinstance(reader.fp, BytesProducer):
+            return reader.fp(self._consume(reader))
+        else:
+            return self._consume(reader)
+
+    def parts(self):
+        """Asynchronous iterator over the :class:`MultipartReaderPart` of
+        the body.
+
+        The data of a part should be read before moving to the next
+        part, unread data is skipped.
+        """
+        return MultipartParts(self.reader(), self)
+
+    def reader(self):
         boundary = self.boundary
         if not valid_boundary(boundary):
             raise HttpException("Invalid boundary for multipart/form-data",
                                 status=422)
         inp = self.request.get('wsgi.input') or BytesIO()
-        self.buffer = bytearray()
+        if not isinstance(inp, HttpBodyReader):
+            inp = BytesProducer(inp)
+        return MultipartReader(inp, boundary, self.chunk_size, self.limit)
 
-        if isinstance(inp, HttpBodyReader):
-            return self._consume(inp, boundary)
-        else:
-            producer = BytesProducer(inp)
-            return producer(self._consume, boundary)
-
-    async def _consume(self, fp, boundary):
-        sep = b'--'
-        nextpart = ('--%s' % boundary).encode()
-        lastpart = ("--%s--" % boundary).encode()
-        terminator = b""
-
-        while terminator != lastpart:
-            nbytes = -1
-            current = None
-
-            if terminator:
-                headers = await parse_headers(fp)
-                current = MultipartPart(self, headers)
-
-                data = await fp.read(nbytes) if nbytes > 0 else b''
-
-                if current.name:
-                    current.feed_data(data)
-                else:
-                    current = None
-
-            while 1:
-                line = await fp.readline() or lastpart
-                if line.startswith(sep):
-                    terminator = line.rstrip()
-                    if terminator in (nextpart, lastpart):
-                        break
-                if current:
-                    current.feed_data(line)
-
-            # Done with part.
-            if current:
-                current.done()
-
-        self.request.environ['wsgi.input'] = BytesIO(self.buffer)
+    async def _consume(self, reader):
+        while True:
+            headers = await reader.next_part()
+            if headers is None:
+                break
+            part = MultipartPart(self, headers)
+            while True:
+                data = await reader.read()
+                if not data:
+                    break
+                if part.name:
+                    part.feed_data(data)
+            if part.name:
+                part.done()
         return self.result
 
 
+class MultipartReader:
+    """Incremental parser of a ``multipart`` body read, in chunks of
+    ``chunk_size`` bytes, from the asynchronous stream ``fp``.
+
+    Boundaries are searched with :meth:`bytearray.find` and part data is
+    returned as soon as it can't be part of a boundary.
+    """
+    PREAMBLE, HEADERS, BODY, DONE = range(4)
+
+    def __init__(self, fp, boundary, chunk_size=MULTIPART_CHUNK_SIZE,
+                 limit=None):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self.delimiter = ('\n--%s' % boundary).encode('latin-1')
+        # the first boundary may not be preceded by a line break
+        self.buffer = bytearray(b'\n')
+        self.state = self.PREAMBLE
+        self.eof = False
+
+    async def next_part(self):
+        """Skip to the next part and return its headers, or ``None``
+        when there are no more parts
+        """
+        while self.state in (self.PREAMBLE, self.BODY):
+            await self.read()
+        if self.state == self.HEADERS:
+            self.state = self.BODY
+            return await self._read_headers()
+
+    async def read(self):
+        """Read a chunk of data of the current part, an empty bytes object
+        is returned when the part is finished
+        """
+        buffer = self.buffer
+        delimiter = self.delimiter
+        body = self.state == self.BODY
+        start = 0
+        while self.state in (self.PREAMBLE, self.BODY):
+            index = buffer.find(delimiter, start)
+            if index >= 0:
+                boundary = await self._boundary(index + len(delimiter))
+                if boundary is None:
+                    start = index + 1
+                    continue
+                end = index - 1 if index and buffer[index-1] == 13 else index
+                data = bytes(buffer[:end]) if body else b''
+                del buffer[:boundary]
+                return data
+            elif self.eof:
+                # unterminated body
+                data = bytes(buffer) if body else b''
+                buffer.clear()
+                self.state = self.DONE
+                return data
+            size = len(buffer) - len(delimiter)
+            if size > 0:
+                if body:
+                    data = bytes(buffer[:size])
+                    del buffer[:size]
+                    return data
+                del buffer[:size]
+                start = 0
+            await self._read_more()
+        return b''
+
+    async def _boundary(self, index):
+        # Check the boundary line after a delimiter found in the buffer,
+        # return the end of the line or None if it is not a boundary
+        buffer = self.buffer
+        while len(buffer) < index + 2 and not self.eof:
+            await self._read_more()
+        if buffer[index:index+2] == b'--':
+            self.state = self.DONE
+            return len(buffer)
+        while True:
+            end = buffer.find(b'\n', index)
+            if end >= 0:
+                if buffer[index:end].strip():
+                    return
+                self.state = self.HEADERS
+                return end + 1
+            elif self.eof:
+                self.state = self.DONE
+                return len(buffer)
+            elif len(buffer) - index > 1024:
+                return
+            await self._read_more()
+
+    async def _read_more(self):
+        data = await self.fp.read(self.chunk_size)
+        if data:
+            self.buffer.extend(data)
+        else:
+            self.eof = True
+
+    async def _read_headers(self):
+        buffer = self.buffer
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                if self.eof:
+                    end = len(buffer) - 1
+                    break
+                if self.limit and len(buffer) > self.limit:
+                    raise_large_body_error(self.limit)
+                await self._read_more()
+            elif buffer[start:end+1] in (b'\r\n', b'\n'):
+                break
+            else:
+                start = end + 1
+        lines = bytes(buffer[:end+1])
+        del buffer[:end+1]
+        if lines.count(b'\n') > _MAXHEADERS:
+            raise HttpException("got more than %d headers" % _MAXHEADERS)
+        hstring = lines.decode('iso-8859-1')
+        return email.parser.Parser(_class=HTTPMessage).parsestr(hstring)
+
+
+class MultipartParts:
+    """Asynchronous iterator over the parts of a multipart body
+    """
+    def __init__(self, reader, decoder):
+        self.reader = reader
+        self.decoder = decoder
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.current = None
+        headers = await self.reader.next_part()
+        if headers is None:
+            raise StopAsyncIteration
+        self.current = MultipartReaderPart(self, headers)
+        return self.current
+
+
 class BytesDecoder(FormDecoder):
 
     def parse(self, mem_limit=None, **kw):
@@ -267,15 +516,12 @@ class JsonDecoder(BytesDecoder):
         return self.result
 
 
-class MultipartPart:
+class PartHeaders:
     filename = None
     name = ''
 
-    def __init__(self, parser, headers):
-        self.parser = parser
+    def __init__(self, headers):
         self.headers = headers
-        self._bytes = []
-        self._done = False
         length = headers.get(CONTENT_LENGTH)
         content = headers.get('content-disposition')
         if length:
@@ -296,23 +542,50 @@ class MultipartPart:
     def __repr__(self):
         return self.name
 
-    @property
-    def charset(self):
-        return self.parser.charset
-
     @property
     def content_type(self):
         return self.headers.get('Content-Type')
 
+    def is_file(self):
+        return self.filename or self.content_type not in (None, 'text/plain')
+
+
+class MultipartPart(PartHeaders):
+    """A part of a multipart body.
+
+    Data is kept in memory unless the part is larger than the
+    ``spool_size`` of the decoder, in which case it is written to a
+    temporary :attr:`file`.
+    """
+    file = None
+
+    def __init__(self, parser, headers):
+        super().__init__(headers)
+        self.parser = parser
+        self._bytes = []
+        self._size = 0
+        self._done = False
+
+    @property
+    def charset(self):
+        return self.parser.charset
+
     @property
     def size(self):
-        return reduce(lambda x, y: x+len(y), self._bytes, 0)
+        return self._size
 
     def bytes(self):
         '''Bytes'''
+        if self.file:
+            self.file.seek(0)
+            return self.file.read()
         return b''.join(self._bytes)
 
     def bytesio(self):
+        '''A file-like object with the part data'''
+        if self.file:
+            self.file.seek(0)
+            return self.file
         return BytesIO(self.recv())
 
     def base64(self, charset=None):
@@ -329,36 +602,28 @@ class MultipartPart:
     def feed_data(self, data):
         """Feed new data into the MultiPart parser or the data stream"""
         if data:
-            self._bytes.append(data)
-            if self.parser.stream:
-                self.parser.stream(self)
+            parser = self.parser
+            self._size += len(data)
+            if self.file:
+                self.file.write(data)
+            elif parser.stream or self._size <= parser.spool_size:
+                if self._size > parser.limit:
+                    raise_large_body_error(parser.limit)
+                self._bytes.append(data)
             else:
-                self.parser.buffer.extend(data)
+                self.file = tempfile.TemporaryFile()
+                self._bytes.append(data)
+                self.file.write(self.recv())
+            if parser.stream:
+                parser.stream(self)
 
     def recv(self, size=-1):
-        if self._done:
-            data = self._bytes
-            self._bytes = []
-        else:
-            data = self._bytes[:-1]
-            self._bytes = self._bytes[-1:]
+        data = self._bytes
+        self._bytes = []
         return b''.join(data)
 
-    def is_file(self):
-        return self.filename or self.content_type not in (None, 'text/plain')
-
     def done(self):
         if not self._done:
-
-            if self._bytes and self.length < 0:
-                # Strip final line terminator
-                line = self._bytes[-1]
-                if line[-2:] == b"\r\n":
-                    line = line[:-2]
-                elif line[-1:] == b"\n":
-                    line = line[:-1]
-                self._bytes[-1] = line
-
             self._done = True
             if self.parser.stream:
                 self.parser.stream(self)
@@ -368,25 +633,48 @@ class MultipartPart:
             else:
                 self.parser.result[0].add(self.name, self.string())
 
+    def close(self):
+        if self.file:
+            self.file.close()
+
 
-async def parse_headers(fp, _class=HTTPMessage):
-    """Parses only RFC2822 headers from a file pointer.
-    email Parser wants to see strings rather than bytes.
-    But a TextIOWrapper around self.rfile would buffer too many bytes
-    from the stream, bytes which we later need to read as bytes.
-    So we read the correct bytes here, as bytes, for email Parser
-    to parse.
+class MultipartReaderPart(PartHeaders):
+    """A part of a multipart body yielded by
+    :meth:`MultipartDecoder.parts`.
+
+    It is an asynchronous iterator over chunks of the part data::
+
+        async for part in request.multipart_parts():
+            async for chunk in part:
+                ...
     """
-    headers = []
-    while True:
-        line = await fp.readline()
-        headers.append(line)
-        if len(headers) > _MAXHEADERS:
-            raise HttpException("got more than %d headers" % _MAXHEADERS)
-        if line in (b'\r\n', b'\n', b''):
-            break
-    hstring = b''.join(headers).decode('iso-8859-1')
-    return email.parser.Parser(_class=_class).parsestr(hstring)
+    def __init__(self, parts, headers):
+        super().__init__(headers)
+        self.parts = parts
+
+    @property
+    def charset(self):
+        return self.parts.decoder.charset
+
+    def read(self):
+        """Read a chunk of data, an empty bytes object is returned when
+        all data has been read
+        """
+        if self.parts.current is not self:
+            return self._empty()
+        return self.parts.reader.read()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self.read()
+        if not data:
+            raise StopAsyncIteration
+        return data
+
+    async def _empty(self):
+        return b''
 
 
 def raise_large_body_error(limit):
@@ -405,12 +693,11 @@ class BytesProducer:
     async def readline(self):
         return self.bytes.readline()
 
-    async def read(self):
-        return self.bytes.read()
+    async def read(self, n=-1):
+        return self.bytes.read(n)
 
-    def __call__(self, consumer, *args):
+    def __call__(self, coro):
         value = None
-        coro = consumer(self, *args)
         while True:
             try:
                 value = coro.send(value)
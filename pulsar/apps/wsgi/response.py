@@ -28,12 +28,83 @@ AccessControl
 
 '''
 import re
-from io import BytesIO
-from gzip import GzipFile
+import zlib
+from asyncio import get_event_loop
+from inspect import isawaitable
+
+try:
+    import brotli
+except ImportError:     # pragma    nocover
+    brotli = None
 
 
-re_accepts_gzip = re.compile(r'\bgzip\b')
 re_media_type = re.compile(r'^(image|audio|video)/.+')
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+ENCODINGS = ('br', 'gzip', 'deflate') if brotli else ('gzip', 'deflate')
+
+
+def negotiate_encoding(header, encodings=ENCODINGS):
+    '''The preferred content coding, among ``encodings``, accepted by an
+    ``Accept-Encoding`` ``header``.
+
+    Ties in quality values are resolved by the order of ``encodings``.
+
+    :return: the content coding or ``None``
+    '''
+    if not header:
+        return
+    accepted = {}
+    for value in header.split(','):
+        coding, _, params = value.partition(';')
+        coding = coding.strip().lower()
+        q = 1
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0
+        accepted[coding] = q
+    best, best_q = None, 0
+    default = accepted.get('*', 0)
+    for coding in encodings:
+        q = accepted.get(coding, default)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class StreamCompressor:
+    '''Incremental compressor for a content coding in :data:`ENCODINGS`
+
+    .. attribute:: compress
+
+        Compress a chunk of data, returning the compressed bytes available
+
+    .. attribute:: flush
+
+        Return all the compressed bytes available so far without
+        ending the stream
+
+    .. attribute:: finish
+
+        Return the remaining compressed bytes
+    '''
+    def __init__(self, encoding, level=6):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=level)
+            self.compress = compressor.process
+            self.flush = compressor.flush
+            self.finish = compressor.finish
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED,
+                                          WBITS[encoding])
+            self.compress = compressor.compress
+            self.flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = compressor.flush
+
+    def __call__(self, data):
+        return self.compress(data) + self.finish()
 
 
 class ResponseMiddleware:
@@ -89,22 +160,39 @@ class AccessControl(ResponseMiddleware):
 
 class GZipMiddleware(ResponseMiddleware):
     """A :class:`ResponseMiddleware` for compressing content if the request
-allows gzip compression. It sets the Vary header accordingly.
+allows it. It sets the Vary header accordingly.
 
-The compression implementation is from
-http://jython.xhaus.com/http-compression-in-python-and-jython
+The content coding is negotiated from the ``Accept-Encoding`` header among
+``encodings`` (``br`` when brotli is installed, ``gzip`` and ``deflate``
+by default).
+
+Streamed responses are compressed chunk by chunk, including chunks which
+are awaitables, and compressed data is flushed after each awaited chunk so
+that it reaches the client without delay. Responses with a known length
+of at least ``executor_length`` bytes (if given) are compressed in the
+event loop executor, this requires an asynchronous
+:ref:`WsgiHandler <wsgi-handler>`.
     """
-    def __init__(self, min_length=200):
+    def __init__(self, min_length=200, compresslevel=6, executor_length=None,
+                 encodings=None):
         self.min_length = min_length
+        self.compresslevel = compresslevel
+        self.executor_length = executor_length
+        self.encodings = tuple(encodings or ENCODINGS)
 
     def available(self, environ, response):
         # It's not worth compressing non-OK or really short responses
         if response.status_code == 200:
-            if (response.length() or 0) < self.min_length:
-                return False
             headers = response.headers
+            if response.is_streamed():
+                length = headers.get('Content-Length')
+                length = int(length) if length else self.min_length
+            else:
+                length = response.length()
+            if length < self.min_length:
+                return False
             ctype = headers.get('Content-Type', '').lower()
-            # Avoid gzipping if we've already got a content-encoding.
+            # Avoid compressing if we've already got a content-encoding.
             if 'Content-Encoding' in headers:
                 return False
             # MSIE have issues with gzipped response of various
@@ -112,22 +200,68 @@ http://jython.xhaus.com/http-compression-in-python-and-jython
             if "msie" in environ.get('HTTP_USER_AGENT', '').lower():
                 if not ctype.startswith("text/") or "javascript" in ctype:
                     return False
-            ae = environ.get('HTTP_ACCEPT_ENCODING', '')
-            if not re_accepts_gzip.search(ae):
-                return False
             if re_media_type.match(ctype):
                 return False
-            return True
+            return self.encoding(environ) is not None
+
+    def encoding(self, environ):
+        """The content coding to use for the response
+        """
+        return negotiate_encoding(environ.get('HTTP_ACCEPT_ENCODING'),
+                                  self.encodings)
 
     def execute(self, environ, response):
+        encoding = self.encoding(environ)
         headers = response.headers
         headers.add('Vary', 'Accept-Encoding')
-        response.content = self.compress_string(b''.join(response.content))
-        response.headers['Content-Encoding'] = 'gzip'
-
-    def compress_string(self, s):
-        zbuf = BytesIO()
-        zfile = GzipFile(mode='wb', compresslevel=6, fileobj=zbuf)
-        zfile.write(s)
-        zfile.close()
-        return zbuf.getvalue()
+        headers['Content-Encoding'] = encoding
+        compressor = StreamCompressor(encoding, self.compresslevel)
+        if response.is_streamed():
+            headers.pop('Content-Length', None)
+            response.content = self.compress_stream(response.content,
+                                                    compressor)
+        else:
+            body = b''.join(response.content)
+            if self.executor_length and len(body) >= self.executor_length:
+                return self._compress_in_executor(response, body,
+                                                  compressor)
+            response.content = compressor(body)
+
+    def compress_stream(self, iterable, compressor):
+        """Compress an iterable over bytes or awaitables resulting
+        in bytes
+        """
+        executor_length = self.executor_length
+        try:
+            for chunk in iterable:
+                if isawaitable(chunk):
+                    yield self._compress_chunk(chunk, compressor)
+                elif executor_length and len(chunk) >= executor_length:
+                    yield get_event_loop().run_in_executor(
+                        None, compressor.compress, chunk)
+                else:
+                    chunk = compressor.compress(chunk)
+                    if chunk:
+                        yield chunk
+            yield compressor.finish()
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    def compress_string(self, s, encoding='gzip'):
+        return StreamCompressor(encoding, self.compresslevel)(s)
+
+    async def _compress_chunk(self, chunk, compressor):
+        chunk = await chunk
+        loop = get_event_loop()
+        if self.executor_length and len(chunk) >= self.executor_length:
+            chunk = await loop.run_in_executor(None, compressor.compress,
+                                               chunk)
+        else:
+            chunk = compressor.compress(chunk)
+        return chunk + compressor.flush()
+
+    async def _compress_in_executor(self, response, body, compressor):
+        response.content = await get_event_loop().run_in_executor(
+            None, compressor, body)
+        return response
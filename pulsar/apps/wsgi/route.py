@@ -40,6 +40,9 @@ _converter_args_re = re.compile(r'''
 ''', re.VERBOSE | re.UNICODE)
 
 
+_REGEX_CHARS = frozenset('.^$*+?{}[]\\|()')
+
+
 _PYTHON_CONSTANTS = {
     'None':     None,
     'True':     True,
@@ -210,6 +213,7 @@ class Route:
     def __init__(self, rule, defaults=None, is_re=False):
         rule = remove_double_slash('/%s' % rule)
         self.defaults = defaults if defaults is not None else {}
+        self.is_re = is_re
         self.is_leaf = not rule.endswith('/')
         self.rule = rule[1:]
         self.variables = set(map(str, self.defaults))
@@ -377,6 +381,111 @@ class Route:
         return cls('%s/%s' % (self.rule, rule), defaults, is_re=is_re)
 
 
+class RouteTree:
+    '''A radix tree of url path segments.
+
+    Each node has static edges, keyed by the segment string, and typed
+    parameter edges which match a segment with a converter of a
+    :class:`Route`, or the remaining segments for the ``path`` converter.
+    Values are added in order of priority and :meth:`match` returns the
+    first added value whose routes match a path, as matching each
+    :class:`Route` regex in turn would do.
+    '''
+    def __init__(self):
+        self.root = _TreeNode()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, routes, value):
+        '''Add ``value`` for the concatenation of ``routes``
+
+        Raise ``ValueError`` if the routes can't be represented by
+        path segments.
+        '''
+        priority = self.size
+        node = self.root
+        node.update(priority)
+        route = None
+        for route in routes:
+            for dynamic, bit in route.breadcrumbs:
+                if dynamic:
+                    node = node.param(bit, route._converters[bit])
+                elif route.is_re and _REGEX_CHARS.intersection(bit):
+                    raise ValueError('Regex rule %s' % route.rule)
+                else:
+                    node = node.static.setdefault(bit, _TreeNode())
+                node.update(priority)
+        if route is not None and not route.is_leaf:
+            node = node.static.setdefault('', _TreeNode())
+            node.update(priority)
+        if node.value is None:
+            node.value = (priority, value)
+        self.size += 1
+
+    def match(self, path):
+        '''Match a ``path`` and return a two elements tuple containing the
+        value and a dictionary of matched variables, or ``None``.
+        '''
+        best = [self.size, None, None]
+        self.root.match(path.split('/'), 0, {}, best)
+        if best[1] is not None:
+            return best[1], best[2]
+
+
+class _TreeNode:
+    __slots__ = ('static', 'params', 'value', 'priority')
+
+    def __init__(self):
+        self.static = {}
+        self.params = []
+        self.value = None
+        self.priority = None
+
+    def update(self, priority):
+        if self.priority is None:
+            self.priority = priority
+
+    def param(self, name, converter):
+        key = (name, type(converter), converter.regex,
+               tuple(sorted(vars(converter).items())))
+        for edge in self.params:
+            if edge[0] == key:
+                return edge[-1]
+        node = _TreeNode()
+        regex = re.compile(converter.regex, re.UNICODE)
+        catch_all = isinstance(converter, PathConverter)
+        self.params.append((key, name, converter, regex, catch_all, node))
+        return node
+
+    def match(self, bits, index, urlargs, best):
+        if self.priority >= best[0]:
+            return
+        if index == len(bits):
+            if self.value and self.value[0] < best[0]:
+                best[:] = self.value[0], self.value[1], dict(urlargs)
+            return
+        node = self.static.get(bits[index])
+        if node:
+            node.match(bits, index + 1, urlargs, best)
+        for _, name, converter, regex, catch_all, node in self.params:
+            if catch_all:
+                ends = range(len(bits), index, -1)
+            else:
+                ends = (index + 1,)
+            for end in ends:
+                value = '/'.join(bits[index:end])
+                if not regex.fullmatch(value):
+                    continue
+                try:
+                    urlargs[name] = converter.to_python(value)
+                except Http404:
+                    continue
+                node.match(bits, end, urlargs, best)
+                urlargs.pop(name)
+
+
 class BaseConverter:
     """Base class for all converters."""
     regex = '[^/]+'
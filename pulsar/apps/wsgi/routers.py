@@ -1,6 +1,7 @@
 import os
 import re
 import stat
+import time
 import mimetypes
 from collections import OrderedDict
 from functools import partial, lru_cache
@@ -11,11 +12,17 @@ from pulsar.utils.httpurl import CacheControl
 from pulsar.utils.slugify import slugify
 from pulsar.utils.security import digest
 from pulsar.utils.lib import http_date
-from pulsar.api import Http404, MethodNotAllowed
+from pulsar.api import Http404, MethodNotAllowed, HttpException
 
-from .route import Route
+from .route import Route, RouteTree, PathConverter
 from .utils import wsgi_request
 from .content import Html
+from .response import negotiate_encoding, re_media_type
+from .wrappers import FileWrapper
+
+
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+MAX_RANGES = 16
 
 
 def get_roule_methods(attrs):
@@ -164,7 +171,9 @@ class Router(metaclass=RouterType):
 
     '''
     _creation_count = 0
+    _routes_version = 0
     _parent = None
+    _tree = None
     name = None
     SkipRoute = SkipRoute
 
@@ -321,7 +330,60 @@ class Router(metaclass=RouterType):
 
     @lru_cache(maxsize=1024)
     def resolve(self, url, method):
-        return self._resolve(url[1:], method.lower())
+        method = method.lower()
+        tree = self.route_tree()
+        if tree is None:
+            return self._resolve(url[1:], method)
+        match = tree.match(url[1:])
+        if match:
+            router, urlargs = match
+            return router._handler(method, urlargs)
+
+    def route_tree(self):
+        '''The :class:`.RouteTree` of this :class:`Router` and its children.
+
+        The tree is compiled the first time it is needed and again after
+        routes are added or removed. It is ``None`` when a route
+        can't be represented by url path segments, for example a regex
+        rule, in which case :meth:`resolve` matches routes one by one.
+        '''
+        if self._tree is None or self._tree[0] != Router._routes_version:
+            try:
+                tree = self._compile()
+            except ValueError:
+                tree = None
+            self._tree = (Router._routes_version, tree)
+        return self._tree[1]
+
+    def _compile(self):
+        routes = []
+        parent = self._parent
+        while parent and parent._route.is_leaf:
+            routes.insert(0, parent._route)
+            parent = parent._parent
+        tree = RouteTree()
+        self._add_to_tree(tree, tuple(routes))
+        return tree
+
+    def _add_to_tree(self, tree, routes):
+        route = self._route
+        if self.routes and not route.is_leaf:
+            for converter in route._converters.values():
+                if isinstance(converter, PathConverter):
+                    raise ValueError('Path converter in %s' % route.rule)
+        routes += (route,)
+        tree.add(routes, self)
+        for router in self.routes:
+            router._add_to_tree(tree, routes)
+
+    def _handler(self, method, urlargs):
+        handler = getattr(self, method, None)
+        if handler is None:
+            raise MethodNotAllowed
+        response_wrapper = self.response_wrapper
+        if response_wrapper:
+            handler = partial(response_wrapper, handler)
+        return Handler(self, handler, urlargs)
 
     def _resolve(self, path, method, urlargs=None):
         '''Resolve a path and return a ``(handler, urlargs)`` tuple or
@@ -335,13 +397,7 @@ class Router(metaclass=RouterType):
             path = match.pop('__remaining__')
             urlargs = update_args(urlargs, match)
         else:
-            handler = getattr(self, method, None)
-            if handler is None:
-                raise MethodNotAllowed
-            response_wrapper = self.response_wrapper
-            if response_wrapper:
-                handler = partial(response_wrapper, handler)
-            return Handler(self, handler, update_args(urlargs, match))
+            return self._handler(method, update_args(urlargs, match))
         #
         for handler in self.routes:
             view_args = handler._resolve(path, method, urlargs)
@@ -370,6 +426,7 @@ class Router(metaclass=RouterType):
             self.routes.append(router)
         else:
             self.routes.insert(index, router)
+        self._routes_changed()
         return router
     add_child = add_route
 
@@ -378,6 +435,7 @@ class Router(metaclass=RouterType):
         if router in self.routes:
             self.routes.remove(router)
             router._parent = None
+            self._routes_changed()
 
     def get_route(self, name):
         '''Get a child :class:`Router` by its :attr:`name`.
@@ -436,6 +494,10 @@ class Router(metaclass=RouterType):
         return router
 
     # INTERNALS
+    def _routes_changed(self):
+        Router._routes_version += 1
+        Router.resolve.cache_clear()
+
     def _set_params(self, parameters):
         for name, value in parameters.items():
             if name not in self.defaults:
@@ -445,10 +507,33 @@ class Router(metaclass=RouterType):
 
 class MediaMixin:
     cache_control = CacheControl(maxage=86400)
+    precompressed = None
 
     def serve_file(self, request, fullpath, status_code=None):
+        cache = getattr(self, 'cache', None)
+        load = cache.get if cache is not None else StaticFile.load
+        static_file = load(fullpath)
+        if (self.precompressed and not status_code and
+                not re_media_type.match(static_file.content_type or '')):
+            request.response.headers.add('Vary', 'Accept-Encoding')
+            header = request.get('HTTP_ACCEPT_ENCODING')
+            encodings = tuple(self.precompressed)
+            encoding = negotiate_encoding(header, encodings)
+            while encoding:
+                try:
+                    compressed = load(fullpath + self.precompressed[encoding])
+                except Http404:
+                    encodings = tuple(e for e in encodings if e != encoding)
+                    encoding = negotiate_encoding(header, encodings)
+                else:
+                    return file_response(
+                        request, fullpath, static_file=compressed,
+                        content_type=static_file.content_type,
+                        content_encoding=encoding,
+                        cache_control=self.cache_control)
         return file_response(request, fullpath, status_code=status_code,
-                             cache_control=self.cache_control)
+                             cache_control=self.cache_control,
+                             static_file=static_file)
 
     def directory_index(self, request, fullpath):
         names = [Html('a', '../', href='../', cn='folder')]
@@ -499,16 +584,35 @@ class MediaRouter(Router, MediaMixin):
     .. attribute:: default_file
 
         The default file to serve when a directory is requested.
+
+    .. attribute:: cache
+
+        A :class:`FileCache` of the files served by this router.
+        Its size is controlled by the ``cache_files`` (maximum number of
+        files) and ``cache_file_size`` (maximum size in bytes of a cached
+        file) parameters while ``cache_interval`` is the number of seconds
+        after which a cached file is checked for modifications.
+
+    .. attribute:: precompressed
+
+        Ordered mapping of content codings to file suffixes. When a
+        request accepts one of these codings and a sibling file with the
+        corresponding suffix exists (``app.js.br`` or ``app.js.gz``
+        for ``app.js`` by default), the sibling is served with the
+        ``Content-Encoding`` header set. Pass ``None`` to switch off.
     '''
     def __init__(self, rule, path=None, show_indexes=False,
                  default_suffix=None, default_file='index.html',
-                 serve_only=None, **params):
+                 serve_only=None, cache_files=128, cache_file_size=2**16,
+                 cache_interval=1, precompressed=PRECOMPRESSED, **params):
         super().__init__('%s/<path:path>' % rule, **params)
         self._serve_only = set(serve_only or ())
         self._default_suffix = default_suffix
         self._default_file = default_file
         self._show_indexes = show_indexes
         self._file_path = path or ''
+        self.cache = FileCache(cache_files, cache_file_size, cache_interval)
+        self.precompressed = OrderedDict(precompressed or ())
 
     def filesystem_path(self, request):
         return self.get_full_path(request.urlargs['path'])
@@ -524,6 +628,8 @@ class MediaRouter(Router, MediaMixin):
                 raise self.SkipRoute
 
         fullpath = self.filesystem_path(request)
+        if self.cache.lookup(fullpath):
+            return self.serve_file(request, fullpath)
 
         if not self._serve_only:
 
@@ -589,7 +695,8 @@ def was_modified_since(header=None, mtime=0, size=0):
 
 
 def file_response(request, filepath, block=None, status_code=None,
-                  content_type=None, encoding=None, cache_control=None):
+                  content_type=None, encoding=None, cache_control=None,
+                  static_file=None, content_encoding=None):
     """Utility for serving a local file
 
     Typical usage::
@@ -601,35 +708,286 @@ def file_response(request, filepath, block=None, status_code=None,
             def get(self, request):
                 return wsgi.file_response(request, "<filepath>")
 
+    Conditional requests (``If-Modified-Since``, ``If-None-Match``) and
+    single or multiple byte ``Range`` requests are supported.
+
     :param request: Wsgi request
     :param filepath: full path of file to serve
     :param block: Optional block size (default 1MB)
     :param status_code: Optional status code (default 200)
+    :param static_file: Optional :class:`StaticFile` for ``filepath``
+    :param content_encoding: Optional content coding of ``static_file``
     :return: a :class:`~.WsgiResponse` object
     """
-    file_wrapper = request.get('wsgi.file_wrapper')
-    if os.path.isfile(filepath):
-        response = request.response
-        info = os.stat(filepath)
-        size = info[stat.ST_SIZE]
-        modified = info[stat.ST_MTIME]
-        header = request.get('HTTP_IF_MODIFIED_SINCE')
-        if not was_modified_since(header, modified, size):
-            response.status_code = 304
-        else:
-            if not content_type:
-                content_type, encoding = mimetypes.guess_type(filepath)
-            file = open(filepath, 'rb')
-            response.headers['content-length'] = str(size)
-            response.content = file_wrapper(file, block)
-            response.content_type = content_type
-            response.encoding = encoding
-            if status_code:
-                response.status_code = status_code
-            else:
-                response.headers["Last-Modified"] = http_date(modified)
-            if cache_control:
-                etag = digest('modified: %d - size: %d' % (modified, size))
-                cache_control(response.headers, etag=etag)
+    if static_file is None:
+        static_file = StaticFile.load(filepath)
+    response = request.response
+    etag = static_file.etag
+    size = static_file.size
+    if cache_control:
+        cache_control(response.headers, etag=etag)
+    if not status_code and not modified(request, static_file):
+        response.status_code = 304
         return response
-    raise Http404
+    response.content_type = content_type or static_file.content_type
+    response.encoding = encoding if content_type else static_file.encoding
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    ranges = None
+    if status_code:
+        response.status_code = status_code
+    else:
+        response.headers['Last-Modified'] = static_file.last_modified
+        response.headers['Accept-Ranges'] = 'bytes'
+        header = request.get('HTTP_RANGE')
+        if header and if_range(request.get('HTTP_IF_RANGE'), static_file):
+            ranges = parse_ranges(header, size)
+            if ranges == []:
+                raise HttpException(
+                    status=416,
+                    headers=[('Content-Range', 'bytes */%d' % size)])
+    if not ranges:
+        response.headers['content-length'] = str(size)
+        response.content = static_file.open(request, block)
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response.status_code = 206
+        response.headers['Content-Range'] = 'bytes %d-%d/%d' % (start, end,
+                                                                size)
+        response.headers['content-length'] = str(end - start + 1)
+        response.content = static_file.open(request, block, start,
+                                            end - start + 1)
+    else:
+        boundary = digest('%s - %s' % (etag, time.time()))[:24]
+        ct = response.content_type or 'application/octet-stream'
+        parts = []
+        length = 0
+        for start, end in ranges:
+            head = ('--%s\r\nContent-Type: %s\r\n'
+                    'Content-Range: bytes %d-%d/%d\r\n\r\n' % (
+                        boundary, ct, start, end, size)).encode('latin-1')
+            parts.append((head, start, end - start + 1))
+            length += len(head) + end - start + 3
+        tail = ('--%s--\r\n' % boundary).encode('latin-1')
+        response.status_code = 206
+        response.content_type = ('multipart/byteranges; boundary=%s' %
+                                 boundary)
+        response.encoding = None
+        response.headers['content-length'] = str(length + len(tail))
+        response.content = _byteranges(request, static_file, block, parts,
+                                       tail)
+    return response
+
+
+def modified(request, static_file):
+    """Check ``If-None-Match`` and ``If-Modified-Since`` headers
+    against a :class:`StaticFile`
+    """
+    header = request.get('HTTP_IF_NONE_MATCH')
+    if header:
+        etags = set(etag.strip() for etag in header.split(','))
+        return not ('*' in etags or
+                    static_file.quoted_etag in etags or
+                    'W/%s' % static_file.quoted_etag in etags)
+    return was_modified_since(request.get('HTTP_IF_MODIFIED_SINCE'),
+                              static_file.mtime, static_file.size)
+
+
+def if_range(header, static_file):
+    """Check if a ``Range`` request applies given the ``If-Range`` header
+    """
+    return (not header or header == static_file.quoted_etag or
+            header == static_file.last_modified)
+
+
+def parse_ranges(header, size, max_ranges=MAX_RANGES):
+    """Parse a ``Range`` header for a resource of ``size`` bytes.
+
+    Overlapping and adjacent ranges are merged. Headers with more than
+    ``max_ranges`` ranges, or with ranges adding up to more than ``size``
+    bytes, are ignored so that the full resource is served instead.
+
+    :return: a sorted list of inclusive ``(start, end)`` ranges, an empty
+        list if no range is satisfiable or ``None`` if the header is
+        invalid or ignored
+    """
+    unit, _, ranges = header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return
+    ranges = ranges.split(',')
+    if len(ranges) > max_ranges:
+        return
+    result = []
+    for value in ranges:
+        start, sep, end = value.strip().partition('-')
+        try:
+            if not sep:
+                return
+            elif not start:
+                suffix = int(end)
+                if suffix < 0:
+                    return
+                if suffix:
+                    result.append((max(size - suffix, 0), size - 1))
+            else:
+                start = int(start)
+                if end:
+                    end = int(end)
+                    if end < start:
+                        return
+                else:
+                    end = size - 1
+                if start < size:
+                    result.append((start, min(end, size - 1)))
+        except ValueError:
+            return
+    if sum((end - start + 1 for start, end in result)) > size:
+        return
+    merged = []
+    for start, end in sorted(result):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class StaticFile:
+    """Stat data and response headers of a file served by
+    :func:`file_response`.
+
+    .. attribute:: content
+
+        The file content for files stored in a :class:`FileCache`,
+        otherwise ``None``.
+    """
+    __slots__ = ('path', 'size', 'mtime', 'content_type', 'encoding',
+                 'etag', 'quoted_etag', 'last_modified', 'content',
+                 'checked')
+
+    def __init__(self, path, info, content=None):
+        self.path = path
+        self.size = info[stat.ST_SIZE]
+        self.mtime = info[stat.ST_MTIME]
+        self.content_type, self.encoding = mimetypes.guess_type(path)
+        self.etag = digest('modified: %d - size: %d' % (self.mtime,
+                                                        self.size))
+        self.quoted_etag = '"%s"' % self.etag
+        self.last_modified = http_date(self.mtime)
+        self.content = content
+        self.checked = time.time()
+
+    @classmethod
+    def load(cls, path, max_size=-1):
+        """Load a :class:`StaticFile`, reading its content if the file
+        size is not larger than ``max_size`` bytes.
+
+        Raise :class:`.Http404` if ``path`` is not a file.
+        """
+        try:
+            info = os.stat(path)
+            if not stat.S_ISREG(info.st_mode):
+                raise Http404
+            content = None
+            if info.st_size <= max_size:
+                with open(path, 'rb') as file:
+                    content = file.read()
+                if len(content) != info.st_size:
+                    content = None
+        except OSError:
+            raise Http404 from None
+        return cls(path, info, content)
+
+    def unchanged(self, info):
+        return (info[stat.ST_MTIME] == self.mtime and
+                info[stat.ST_SIZE] == self.size)
+
+    def open(self, request, block=None, start=0, count=None):
+        """Response content for ``count`` bytes from ``start``
+        """
+        if self.content is not None:
+            end = self.size if count is None else start + count
+            return self.content[start:end]
+        file = open(self.path, 'rb')
+        if start:
+            file.seek(start)
+        if count is None:
+            return request.get('wsgi.file_wrapper', FileWrapper)(file, block)
+        return FileWrapper(file, block, count)
+
+
+class FileCache:
+    """A least recently used cache of :class:`StaticFile`.
+
+    Files up to ``max_file_size`` bytes are stored with their content, a
+    cached file is checked for modifications at most once every
+    ``interval`` seconds.
+    """
+    def __init__(self, max_files=128, max_file_size=2**16, interval=1):
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.interval = interval
+        self._files = OrderedDict()
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, path):
+        return path in self._files
+
+    def clear(self):
+        self._files.clear()
+
+    def lookup(self, path):
+        """A cached :class:`StaticFile` checked for modifications in the
+        last ``interval`` seconds or ``None``
+        """
+        static_file = self._files.get(path)
+        if (static_file and
+                time.time() - static_file.checked < self.interval):
+            self._files.move_to_end(path)
+            return static_file
+
+    def get(self, path):
+        """Get the :class:`StaticFile` for ``path``
+
+        Raise :class:`.Http404` if ``path`` is not a file.
+        """
+        static_file = self.lookup(path)
+        if static_file:
+            return static_file
+        static_file = self._files.pop(path, None)
+        if static_file:
+            try:
+                info = os.stat(path)
+            except OSError:
+                raise Http404 from None
+            if static_file.unchanged(info):
+                static_file.checked = time.time()
+                self._files[path] = static_file
+                return static_file
+        if self.max_files > 0:
+            static_file = StaticFile.load(path, self.max_file_size)
+        else:
+            static_file = StaticFile.load(path)
+        if static_file.content is not None:
+            self._files[path] = static_file
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+        return static_file
+
+
+def _byteranges(request, static_file, block, parts, tail):
+    for head, start, count in parts:
+        yield head
+        content = static_file.open(request, block, start, count)
+        if isinstance(content, bytes):
+            yield content
+        else:
+            try:
+                yield from content
+            finally:
+                content.close()
+        yield b'\r\n'
+    yield tail
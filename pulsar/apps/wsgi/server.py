@@ -48,7 +48,8 @@ class HttpServerResponse(ProtocolConsumer):
         return HttpBodyReader(
             self.connection.transport,
             self.producer.cfg.stream_buffer,
-            environ)
+            environ,
+            stats=getattr(self.producer, 'body_stats', None))
 
     def __repr__(self):
         return '%s - %d - %s' % (
@@ -86,6 +87,7 @@ class HttpServerResponse(ProtocolConsumer):
         wsgi_callable = producer.wsgi_callable
         keep_alive = producer.keep_alive or None
         environ = wsgi.environ
+        body_reader = environ.get('wsgi.input')
         exc_info = None
         response = None
         done = False
@@ -117,6 +119,9 @@ class HttpServerResponse(ProtocolConsumer):
                         )
                     #
                     # Do the actual writing
+                    wrapper = getattr(response, 'content', response)
+                    if isinstance(wrapper, FileWrapper):
+                        await self._sendfile(wrapper)
                     for chunk in response:
                         if isawaitable(chunk):
                             with timeout(loop, keep_alive):
@@ -152,6 +157,8 @@ class HttpServerResponse(ProtocolConsumer):
                                 'No keep alive, closing connection %s',
                                 self.connection
                             )
+                    if isinstance(body_reader, HttpBodyReader):
+                        body_reader.discard()
                     self.event('post_request').fire()
                     if not wsgi.keep_alive:
                         self.connection.close()
@@ -163,6 +170,41 @@ class HttpServerResponse(ProtocolConsumer):
                 environ.clear()
             self = None
 
+    async def _sendfile(self, wrapper):
+        # Send a regular file with loop.sendfile on plain connections,
+        # what is left to send is then written by iterating the wrapper
+        loop = self._loop
+        wsgi = self.request
+        connection = self.connection
+        transport = connection.transport
+        if (not hasattr(loop, 'sendfile') or
+                CONTENT_LENGTH not in wsgi.headers or
+                transport.get_extra_info('socket') is None or
+                transport.get_extra_info('sslcontext') or
+                wrapper.fileno() is None):
+            return
+        keep_alive = self.producer.keep_alive or None
+        waiter = wsgi.write(b'')
+        if waiter:
+            with timeout(loop, keep_alive):
+                await waiter
+        connection.uncork()
+        file = wrapper.file
+        count = int(wsgi.headers[CONTENT_LENGTH])
+        while count > 0:
+            try:
+                with timeout(loop, keep_alive):
+                    sent = await loop.sendfile(
+                        transport, file, file.tell(),
+                        min(count, wrapper.block), fallback=False
+                    )
+            except RuntimeError:
+                break
+            if not sent:
+                break
+            count -= sent
+            connection.changed()
+
     def _cancel_task(self, task):
         task.cancel()
 
@@ -46,6 +46,9 @@ Wsgi File Wrapper
 .. _AJAX: http://en.wikipedia.org/wiki/Ajax_(programming)
 .. _TLS: http://en.wikipedia.org/wiki/Transport_Layer_Security
 """
+import os
+import stat
+from asyncio import ensure_future, get_event_loop
 from functools import partial
 from inspect import isawaitable
 from http.cookies import SimpleCookie
@@ -62,7 +65,7 @@ from .content import HtmlDocument
 from .utils import (set_wsgi_request_class, query_dict,
                     parse_accept_header, LOGGER, PULSAR_CACHE)
 from .structures import ContentAccept, CharsetAccept, LanguageAccept
-from .formdata import parse_form_data
+from .formdata import parse_form_data, multipart_parts
 from .headers import LOCATION
 
 
@@ -296,6 +299,18 @@ class WsgiRequest:
         """
         return self.data_and_files(files=False)
 
+    def multipart_parts(self, **options):
+        """Asynchronous iterator over the parts of a
+        ``multipart/form-data`` body.
+
+        Each part is an asynchronous iterator over chunks of its data::
+
+            async for part in request.multipart_parts():
+                async for chunk in part:
+                    ...
+        """
+        return multipart_parts(self, **options)
+
     def _data_and_files(self, data=True, files=True, stream=None, result=None):
         if result is None:
             data_files = parse_form_data(self, stream=stream)
@@ -435,16 +450,70 @@ class FileWrapper:
     Available directly from the ``wsgi.file_wrapper`` key in the WSGI environ
     dictionary. Alternatively one can use the :func:`~.file_response`
     high level function for serving local files.
+
+    The pulsar WSGI server sends regular files with ``loop.sendfile``
+    when the connection is not encrypted. Otherwise the file is iterated
+    and blocks are read in the event loop default executor so that disk
+    I/O does not block the event loop.
+
+    :param file: a file-like object opened in binary mode
+    :param block: Optional block size (default 1MB)
+    :param count: Optional number of bytes to serve from the current
+        position of ``file`` (default until the end of the file)
     """
-    def __init__(self, file, block=None):
+    def __init__(self, file, block=None, count=None):
         self.file = file
         self.block = max(block or ONEMB, MAX_BUFFER_SIZE)
+        self.count = count
+
+    def fileno(self):
+        """The file descriptor of the wrapped file or ``None``
+        """
+        try:
+            return self.file.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
 
     def __iter__(self):
-        while True:
-            data = self.file.read(self.block)
+        st = self._stat()
+        if st is None:
+            yield from self._read_sync()
+        else:
+            remaining = st.st_size - self.file.tell()
+            if self.count is not None:
+                remaining = min(remaining, self.count)
+            loop = get_event_loop()
+            future = None
+            while remaining > 0:
+                size = min(remaining, self.block)
+                future = ensure_future(self._read(loop, future, size),
+                                       loop=loop)
+                yield future
+                remaining -= size
+
+    def _stat(self):
+        # stat of the wrapped file when it is a regular file
+        fileno = self.fileno()
+        if fileno is not None:
+            st = os.fstat(fileno)
+            if stat.S_ISREG(st.st_mode):
+                return st
+
+    async def _read(self, loop, previous, size):
+        if previous is not None:
+            await previous
+        return await loop.run_in_executor(None, self.file.read, size)
+
+    def _read_sync(self):
+        remaining = self.count
+        while remaining is None or remaining > 0:
+            size = self.block if remaining is None else min(remaining,
+                                                            self.block)
+            data = self.file.read(size)
             if not data:
                 break
+            if remaining is not None:
+                remaining -= len(data)
             future = create_future()
             future.set_result(data)
             yield future
@@ -1,9 +1,8 @@
-import time
-
 from asyncio import Queue, CancelledError
 
 
 DEFAULT_LIMIT = 2**16
+TIMER_WHEEL_INTERVAL = 1
 
 
 class FlowControl:
@@ -11,11 +10,19 @@ class FlowControl:
 
     This implements the protocol methods :meth:`pause_writing`,
     :meth:`resume_writing`.
+
+    When :attr:`cork` is ``True``, data written during an event loop
+    iteration is collected and passed to the transport in one call from a
+    callback scheduled by the first write, so that pipelined responses
+    need one ``send`` rather than one per response.
     """
     _b_limit = 2*DEFAULT_LIMIT
     _paused = False
     _buffer_size = 0
     _waiter = None
+    _corked = None
+    _corked_size = 0
+    cork = False
 
     def write(self, data):
         """Write ``data`` into the wire.
@@ -27,25 +34,49 @@ class FlowControl:
             raise ConnectionResetError(
                 'Transport closed - cannot write on %s' % self
             )
-        else:
-            t = self.transport
-            if self._paused or self._buffer:
-                self._buffer.appendleft(data)
-                self._buffer_size += len(data)
-                self._write_from_buffer()
-                if self._buffer_size > 2 * self._b_limit:
-                    if self._waiter and not self._waiter.cancelled():
-                        self.logger.warning(
-                            '%s buffer size is %d: limit is %d ',
-                            self._buffer_size, self._b_limit
-                        )
-                    else:
-                        t.pause_reading()
-                        self._waiter = self._loop.create_future()
-            else:
-                t.write(data)
+        elif self.cork:
+            if self._corked is None:
+                self._corked = []
+                self._loop.call_soon(self.uncork)
+            self._corked.append(data)
+            self._corked_size += len(data)
+            if self._corked_size >= self._b_limit:
+                self.uncork()
             self.changed()
             return self._waiter
+        else:
+            return self._write(data)
+
+    def uncork(self):
+        """Write data collected in :attr:`cork` mode into the transport
+        """
+        corked = self._corked
+        if corked is not None:
+            self._corked = None
+            self._corked_size = 0
+            if not self.closed:
+                self._write(corked[0] if len(corked) == 1
+                            else b''.join(corked))
+
+    def _write(self, data):
+        t = self.transport
+        if self._paused or self._buffer:
+            self._buffer.appendleft(data)
+            self._buffer_size += len(data)
+            self._write_from_buffer()
+            if self._buffer_size > 2 * self._b_limit:
+                if self._waiter and not self._waiter.cancelled():
+                    self.logger.warning(
+                        '%s buffer size is %d: limit is %d ',
+                        self._buffer_size, self._b_limit
+                    )
+                else:
+                    t.pause_reading()
+                    self._waiter = self._loop.create_future()
+        else:
+            t.write(data)
+        self.changed()
+        return self._waiter
 
     def pause_writing(self):
         '''Called by the transport when the buffer goes over the
@@ -104,9 +135,12 @@ class FlowControl:
 
 class Timeout:
     '''Adds a timeout for idle connections to protocols
+
+    Idle connections are tracked by the :class:`TimerWheel` of the
+    producer rather than by a loop timer per connection.
     '''
     _timeout = None
-    _timeout_handler = None
+    _timeout_deadline = None
 
     @property
     def timeout(self):
@@ -124,83 +158,167 @@ class Timeout:
 
     # INTERNALS
     def _timed_out(self):
-        if self.last_change:
-            gap = time.time() - self.last_change
-            if gap < self._timeout:
-                self._timeout_handler = None
-                return self._add_timeout(None, timeout=self._timeout-gap)
         self.close()
         self.logger.debug('Closed idle %s.', self)
 
-    def _add_timeout(self, _, exc=None, timeout=None):
+    def _add_timeout(self, _, exc=None):
         if not self.closed:
             self._cancel_timeout(_, exc=exc)
-            timeout = timeout or self._timeout
-            if timeout and not exc:
-                self._timeout_handler = self._loop.call_later(
-                    timeout, self._timed_out
-                )
+            if self._timeout and not exc:
+                TimerWheel.register(self.producer).add(self)
 
     def _cancel_timeout(self, _, exc=None, **kw):
-        if self._timeout_handler:
-            self._timeout_handler.cancel()
-            self._timeout_handler = None
+        if self._timeout_deadline is not None:
+            TimerWheel.register(self.producer).remove(self)
+
+
+class TimerWheel:
+    '''A coarse timer wheel for the idle connections of a producer
+
+    Connections are stored in one-second buckets keyed by the time they
+    would expire if they stay idle. A single periodic sweep closes the
+    connections in expired buckets which have not changed since, and moves
+    the others to the bucket of their new deadline, so that
+    :meth:`~.Protocol.changed` remains an integer store.
+    '''
+    __slots__ = ('producer', 'buckets', 'handler')
+
+    def __init__(self, producer):
+        self.producer = producer
+        self.buckets = {}
+        self.handler = None
+
+    @classmethod
+    def register(cls, producer):
+        wheel = getattr(producer, '_timer_wheel', None)
+        if wheel is None:
+            wheel = cls(producer)
+            producer._timer_wheel = wheel
+        return wheel
+
+    def __len__(self):
+        return sum((len(b) for b in self.buckets.values()))
+
+    def add(self, protocol):
+        last_change = protocol.last_change or self.producer.current_time
+        self._insert(protocol, last_change + protocol.timeout)
+
+    def remove(self, protocol):
+        deadline = protocol._timeout_deadline
+        protocol._timeout_deadline = None
+        bucket = self.buckets.get(deadline)
+        if bucket:
+            bucket.discard(protocol)
+            if not bucket:
+                del self.buckets[deadline]
+        if not self.buckets and self.handler:
+            self.handler.cancel()
+            self.handler = None
+
+    # INTERNALS
+    def _insert(self, protocol, deadline):
+        bucket = self.buckets.get(deadline)
+        if bucket is None:
+            self.buckets[deadline] = bucket = set()
+        bucket.add(protocol)
+        protocol._timeout_deadline = deadline
+        if self.handler is None:
+            self.handler = self.producer._loop.call_later(
+                TIMER_WHEEL_INTERVAL, self._sweep)
+
+    def _sweep(self):
+        self.handler = None
+        now = self.producer.current_time
+        buckets = self.buckets
+        for deadline in [d for d in buckets if d <= now]:
+            for protocol in buckets.pop(deadline):
+                protocol._timeout_deadline = None
+                if protocol.closed:
+                    continue
+                deadline = protocol.last_change + protocol.timeout
+                if deadline > now:
+                    self._insert(protocol, deadline)
+                else:
+                    protocol._timed_out()
+        if buckets and self.handler is None:
+            self.handler = self.producer._loop.call_later(
+                TIMER_WHEEL_INTERVAL, self._sweep)
 
 
 class Pipeline:
     """Pipeline protocol consumers once reading is finished
 
-    This mixin can be used by TCP connections to pipeline response writing
+    This mixin can be used by TCP connections to pipeline response writing.
+    A response is written straight away when no other response is in
+    flight, the :class:`ResponsePipeline` and its queue are only created
+    once the client pipelines requests.
     """
     _pipeline = None
+    _response = None
+    _pipeline_bound = False
 
     def pipeline(self, consumer):
         """Add a consumer to the pipeline
         """
-        if self._pipeline is None:
-            self._pipeline = ResponsePipeline(self)
+        if self._pipeline is not None:
+            return self._pipeline.put(consumer)
+        if not self._pipeline_bound:
+            self._pipeline_bound = True
             self.event('connection_lost').bind(self._close_pipeline)
-        self._pipeline.put(consumer)
+        if self._response is None:
+            self._response = self._loop.create_task(
+                self._write_response(consumer)
+            )
+        else:
+            self._pipeline = ResponsePipeline(self, self._response)
+            self._response = None
+            self._pipeline.put(consumer)
 
     def close_pipeline(self):
         if self._pipeline:
             p, self._pipeline = self._pipeline, None
             return p.close()
+        elif self._response:
+            r, self._response = self._response, None
+            r.cancel()
+            return r
 
     def _close_pipeline(self, _, **kw):
         self.close_pipeline()
 
+    async def _write_response(self, consumer):
+        done = await write_response(self, consumer)
+        self._response = None
+        return done
+
 
 class ResponsePipeline:
     """Maintains a queue of responses to send back to the client
+
+    The ``response`` in flight when the pipeline is created, if any, is
+    awaited before processing the queue.
     """
-    __slots__ = ('connection', 'queue', 'debug', 'worker', 'put')
+    __slots__ = ('connection', 'queue', 'worker', 'put')
 
-    def __init__(self, connection):
+    def __init__(self, connection, response=None):
         self.connection = connection
         self.queue = Queue()
-        self.debug = connection._loop.get_debug()
-        self.worker = self.queue._loop.create_task(self._process())
+        self.worker = self.queue._loop.create_task(self._process(response))
         self.put = self.queue.put_nowait
 
-    async def _process(self):
-        while True:
+    async def _process(self, response):
+        done = True
+        if response is not None:
+            try:
+                done = await response
+            except CancelledError:
+                done = False
+        while done:
             try:
                 consumer = await self.queue.get()
-                if self.debug:
-                    self.connection.producer.logger.debug(
-                        'Connection pipeline process %s', consumer
-                    )
-                await consumer.write_response()
             except (CancelledError, GeneratorExit, RuntimeError):
                 break
-            except Exception:
-                self.connection.producer.logger.exception(
-                    'Critical exception in %s response pipeline',
-                    self.connection
-                )
-                self.connection.close()
-                break
+            done = await write_response(self.connection, consumer)
         # help gc
         self.connection = None
         self.queue = None
@@ -210,3 +328,25 @@ class ResponsePipeline:
     def close(self):
         self.worker.cancel()
         return self.worker
+
+
+async def write_response(connection, consumer):
+    """Write the response of a protocol ``consumer``
+
+    Return ``True`` if the ``connection`` can write further responses
+    """
+    try:
+        if connection._loop.get_debug():
+            connection.producer.logger.debug(
+                'Connection pipeline process %s', consumer
+            )
+        await consumer.write_response()
+    except (CancelledError, GeneratorExit, RuntimeError):
+        return False
+    except Exception:
+        connection.producer.logger.exception(
+            'Critical exception in %s response pipeline', connection
+        )
+        connection.close()
+        return False
+    return True
@@ -16,10 +16,12 @@ CLOSE_TIMEOUT = 3
 class PulsarProtocol(Protocol, FlowControl, Timeout, Pipeline):
     _closed = None
 
-    def __init__(self, consumer_factory, producer, limit=None, **kw):
+    def __init__(self, consumer_factory, producer, limit=None, cork=False,
+                 **kw):
         super().__init__(consumer_factory, producer)
         self.timeout = producer.keep_alive
         self.logger = producer.logger or LOGGER
+        self.cork = cork
         self._limit = limit or DEFAULT_LIMIT
         self._b_limit = 2*self._limit
         self._buffer = deque()
@@ -46,6 +48,7 @@ class PulsarProtocol(Protocol, FlowControl, Timeout, Pipeline):
             if self.transport:
                 if self._loop.get_debug():
                     self.logger.debug('Closing connection %s', self)
+                self.uncork()
                 if self.transport.can_write_eof():
                     try:
                         self.transport.write_eof()
@@ -213,7 +216,8 @@ class TcpServer(Producer):
                             backlog=100, sslcontext=None):
         """Start serving.
 
-        :param address: optional address to bind to
+        :param address: optional address to bind to, a ``(host, port)``
+            tuple or the path of a unix domain socket
         :param sockets: optional list of sockets to bind to
         :param backlog: Number of maximum connections
         :param sslcontext: optional SSLContext object
@@ -242,6 +246,12 @@ class TcpServer(Producer):
                                          port=address[1],
                                          backlog=backlog,
                                          ssl=sslcontext)
+        elif isinstance(address, str):
+            server = await self._loop.create_unix_server(
+                self.create_protocol,
+                path=address,
+                backlog=backlog,
+                ssl=sslcontext)
         else:
             raise RuntimeError('sockets or address must be supplied')
         self._set_server(server)
@@ -44,8 +44,8 @@ class ProtocolError(PulsarException):
     '''
     status_code = None
 
-    def ProtocolError(self, msg=None, status_code=None):
-        super().__init__(msg)
+    def __init__(self, msg=None, status_code=None):
+        super().__init__(*(() if msg is None else (msg,)))
         self.status_code = status_code
 
 
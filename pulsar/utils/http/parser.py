@@ -101,6 +101,7 @@ class HttpParser:
         # private variables
         self._position = 0
         self._clen_rest = self.content_length
+        self._trailers = False
         # protocol callbacks
         self._on_header = getattr(protocol, 'on_header', passthrough)
         self._on_headers_complete = getattr(
@@ -184,6 +185,14 @@ class HttpParser:
             elif not self.is_message_complete():
                 self._parse_body()
                 break
+            else:
+                break
+        #
+        # data beyond the end of the message belongs to the next one
+        if self.buf and self.is_message_complete():
+            data = bytes(self.buf)
+            self.buf.clear()
+            return data
 
     def _parse_headers(self):
         while True:
@@ -235,6 +244,11 @@ class HttpParser:
         #
         if self.flags & F.CHUNKED.value:
             while True:
+                if self._trailers:
+                    if self._parse_trailers():
+                        self._position = 3
+                        self._on_message_complete()
+                    break
                 idx = self.buf.find(b'\r\n')
                 if idx < 0:
                     break
@@ -248,38 +262,43 @@ class HttpParser:
                         'Invalid chunk size %s' % size) from None
                 if size == 0:
                     self.buf = rest
-                    self._parse_trailers()
-                    self._on_message_complete()
-                    break
+                    self._trailers = True
                 elif len(rest) >= size + 2:
                     self._on_body(bytes(rest[:size]))
                     self.buf = rest[size+2:]
                 else:
                     break
         else:
-            #
-            data = bytes(self.buf)
-            self.buf.clear()
             #
             # Content length not given
             if self._clen_rest == sys.maxsize:
                 if not self.http_message_needs_eof():
                     self._position = 3
                     self._on_message_complete()
+                else:
+                    self.buf.clear()
             else:
-                size = min(len(data), self._clen_rest)
+                size = min(len(self.buf), self._clen_rest)
                 if size:
+                    data = bytes(self.buf[:size])
+                    del self.buf[:size]
                     self._clen_rest -= size
-                    self._on_body(data[:size])
+                    self._on_body(data)
                 if not self._clen_rest:
                     self._position = 3
                     self._on_message_complete()
 
     def _parse_trailers(self):
-        idx = self.buf.find(b'\r\n\r\n')
+        # skip trailers and the empty line ending the chunked body,
+        # return False if the empty line is not available yet
         if self.buf[:2] == b'\r\n':
-            self.buf = self.buf[:idx]
-            self._trailers = self._parse_headers()
+            del self.buf[:2]
+            return True
+        idx = self.buf.find(b'\r\n\r\n')
+        if idx >= 0:
+            del self.buf[:idx+4]
+            return True
+        return False
 
 
 class HttpRequestParser(HttpParser):
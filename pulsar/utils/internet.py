@@ -67,10 +67,18 @@ def parse_connection_string(connection_string, default_port=8000):
 
         >>> parse_connection_string('redis://127.0.0.1:6379?db=3&password=bla')
         ('redis', ('127.0.0.1', 6379), {'db': '3', 'password': 'bla'})
+
+    Unix domain sockets are specified via the ``unix:`` prefix::
+
+        >>> parse_connection_string('redis://unix:/tmp/redis.sock?db=3')
+        ('redis', '/tmp/redis.sock', {'db': '3'})
     """
     if '://' not in connection_string:
         connection_string = 'dummy://%s' % connection_string
     scheme, host, path, query, fragment = urlsplit(connection_string)
+    if host.endswith('unix:') and path:
+        # absolute path of a unix domain socket
+        host, path = host + path, ''
     if not scheme and not host:
         host, path = path, ''
     elif path and not query:
@@ -134,6 +142,38 @@ def close_socket(sock):
             pass
 
 
+def reuse_port_sockets(address):
+    '''Bind ``SO_REUSEPORT`` sockets to a ``(host, port)`` address.
+
+    Return a list of bound, not yet listening, sockets, one for each
+    address ``host`` resolves to. Several processes can bind the same
+    address and the kernel balances new connections across the ones
+    listening.
+    '''
+    host, port = address[:2]
+    sockets = []
+    bound = set()
+    try:
+        for family, type, proto, _, sockaddr in socket.getaddrinfo(
+                host or None, port, type=socket.SOCK_STREAM,
+                flags=socket.AI_PASSIVE):
+            if (family, sockaddr) in bound:
+                continue
+            bound.add((family, sockaddr))
+            sock = socket.socket(family, type, proto)
+            sockets.append(sock)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            if family == getattr(socket, 'AF_INET6', None):
+                sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+            sock.bind(sockaddr)
+    except OSError:
+        for sock in sockets:
+            sock.close()
+        raise
+    return sockets
+
+
 def nice_address(address, family=None):
     if isinstance(address, tuple):
         address = ':'.join((str(s) for s in address[:2]))
@@ -11,6 +11,14 @@ REPLAY_TYPE = frozenset((b'$',   # REDIS_REPLY_STRING,
                          b'-'))  # REDIS_REPLY_ERROR
 
 
+# Integer value of the first byte of each reply type
+STRING = ord(b'$')
+ARRAY = ord(b'*')
+INTEGER = ord(b':')
+STATUS = ord(b'+')
+ERROR = ord(b'-')
+
+
 class String:
     __slots__ = ('_length', 'next')
 
@@ -23,8 +31,11 @@ class String:
         length = self._length
         if length >= 0:
             b = parser._inbuffer
-            if len(b) >= length+2:
-                parser._inbuffer, chunk = b[length+2:], bytes(b[:length])
+            start = parser._offset
+            end = start + length
+            if len(b) >= end+2:
+                parser._offset = end + 2
+                chunk = bytes(b[start:end])
                 if parser.encoding:
                     return chunk.decode(parser.encoding)
                 else:
@@ -63,7 +74,11 @@ class ArrayTask:
 
 
 class RedisParser:
-    '''A python parser for redis.'''
+    '''A python parser for redis.
+
+    Data is parsed in place from a read offset into the input buffer,
+    consumed bytes are discarded when new data is fed.
+    '''
     encoding = None
 
     def __init__(self, protocolError, responseError):
@@ -71,6 +86,7 @@ class RedisParser:
         self.responseError = responseError
         self._current = None
         self._inbuffer = bytearray()
+        self._offset = 0
 
     def on_connect(self, connection):
         if connection.decode_responses:
@@ -81,6 +97,10 @@ class RedisParser:
 
     def feed(self, buffer):
         '''Feed new data into the buffer'''
+        if self._offset:
+            # removing from the front of a bytearray does not copy
+            del self._inbuffer[:self._offset]
+            self._offset = 0
         self._inbuffer.extend(buffer)
 
     def get(self):
@@ -90,6 +110,16 @@ class RedisParser:
         else:
             return self._get(None)
 
+    def get_all(self):
+        '''Return a list with all the messages available in the buffer
+        '''
+        messages = []
+        message = self.get()
+        while message is not False:
+            messages.append(message)
+            message = self.get()
+        return messages
+
     def bulk(self, value):
         if value is None:
             return nil
@@ -168,32 +198,35 @@ class RedisParser:
 
     def _get(self, next):
         b = self._inbuffer
-        length = b.find(b'\r\n')
+        offset = self._offset
+        length = b.find(b'\r\n', offset)
         if length >= 0:
-            self._inbuffer, response = b[length+2:], bytes(b[:length])
-            rtype, response = response[:1], response[1:]
-            if rtype == b'-':
-                return self.responseError(response.decode('utf-8'))
-            elif rtype == b':':
-                return int(response)
-            elif rtype == b'+':
-                return response
-            elif rtype == b'$':
+            self._offset = length + 2
+            rtype = b[offset] if length > offset else None
+            response = bytes(b[offset+1:length])
+            if rtype == STRING:
                 task = String(int(response), next)
                 return task.decode(self, False)
-            elif rtype == b'*':
+            elif rtype == ARRAY:
                 task = ArrayTask(int(response), next)
                 return task.decode(self, False)
+            elif rtype == INTEGER:
+                return int(response)
+            elif rtype == STATUS:
+                return response
+            elif rtype == ERROR:
+                return self.responseError(response.decode('utf-8'))
             else:
                 # Clear the buffer and raise
                 self._inbuffer = bytearray()
+                self._offset = 0
                 raise self.protocolError('Protocol Error')
         else:
             return False
 
     def buffer(self):
         '''Current buffer'''
-        return bytes(self._inbuffer)
+        return bytes(self._inbuffer[self._offset:])
 
     def _resume(self, task, result):
         result = task.decode(self, result)
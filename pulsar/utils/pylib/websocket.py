@@ -1,22 +1,46 @@
 import os
 from struct import pack, unpack
-from array import array
 
 from ..string import to_bytes
 
 
+# Size of the blocks XORed at once by websocket_mask
+MASK_BLOCK = 2**16
+
+
 def websocket_mask(data, masking_key):
+    '''XOR ``data`` with the repeated ``masking_key``
+
+    Blocks of the payload and the key, repeated to the block size, are
+    converted into integers and XORed in one operation rather than byte
+    by byte.
+    '''
+    length = len(data)
+    if not length:
+        return b''
     mask_size = len(masking_key)
-    key = array('B', masking_key)
-    data = array('B', data)
-    for i in range(len(data)):
-        data[i] ^= key[i % mask_size]
-    return data.tobytes()
+    size = min(length, MASK_BLOCK - MASK_BLOCK % mask_size)
+    key = masking_key * (size // mask_size + 1)
+    key = int.from_bytes(key[:size], 'little')
+    if size == length:
+        data = int.from_bytes(data, 'little') ^ key
+        return data.to_bytes(length, 'little')
+    chunks = []
+    with memoryview(data) as view:
+        for start in range(0, length, size):
+            chunk = view[start:start+size]
+            n = len(chunk)
+            if n < size:
+                key &= (1 << 8*n) - 1
+            chunks.append((int.from_bytes(chunk, 'little') ^ key).to_bytes(
+                n, 'little'))
+    return b''.join(chunks)
 
 
 class Frame:
     _body = None
     _masking_key = None
+    _rsv1 = 0
 
     def __init__(self, opcode, final, payload_length):
         self._opcode = opcode
@@ -39,6 +63,10 @@ class Frame:
     def masking_key(self):
         return self._masking_key
 
+    @property
+    def rsv1(self):
+        return self._rsv1
+
     @property
     def is_message(self):
         return self._opcode == 1
@@ -81,6 +109,7 @@ class FrameParser:
         self.kind = kind
         self.frame = None
         self.buffer = bytearray()
+        self._offset = 0
         self.ProtocolError = ProtocolError
         self._opcodes = (0, 1, 2, 8, 9, 10)
         self._encode_mask_length = 0
@@ -146,6 +175,8 @@ class FrameParser:
         '''
         fin = 1 if final else 0
         opcode, masking_key, data = self._info(message, opcode, masking_key)
+        if self._extensions:
+            rsv1, data = self._send(opcode, final, data, rsv1)
         return self._encode(data, opcode, masking_key, fin,
                             rsv1, rsv2, rsv3)
 
@@ -157,6 +188,8 @@ class FrameParser:
         '''
         max_payload = max(2, max_payload or self._max_payload)
         opcode, masking_key, data = self._info(message, opcode, masking_key)
+        if self._extensions:
+            rsv1, data = self._send(opcode, True, data, rsv1)
         #
         while data:
             if len(data) >= max_payload:
@@ -166,25 +199,33 @@ class FrameParser:
                 chunk, data, fin = data, b'', 1
             yield self._encode(chunk, opcode, masking_key, fin,
                                rsv1, rsv2, rsv3)
+            # following frames are continuation frames without rsv1
+            opcode = rsv1 = 0
 
     def decode(self, data=None):
         frame = self.frame
         mask_length = self._decode_mask_length
 
         if data:
+            if self._offset:
+                # removing from the front of a bytearray does not copy
+                del self.buffer[:self._offset]
+                self._offset = 0
             self.buffer.extend(data)
         if frame is None:
-            if len(self.buffer) < 2:
+            if self._available() < 2:
                 return
             chunk = self._chunk(2)
             first_byte, second_byte = unpack("BB", chunk)
             fin = (first_byte >> 7) & 1
-            # rsv1 = (first_byte >> 6) & 1
+            rsv1 = (first_byte >> 6) & 1
             # rsv2 = (first_byte >> 5) & 1
             # rsv3 = (first_byte >> 4) & 1
             opcode = first_byte & 0xf
             if fin not in (0, 1):
                 raise self.ProtocolError('FIN must be 0 or 1')
+            if rsv1 and not self._extensions:
+                raise self.ProtocolError('RSV1 set without extensions')
             if bool(mask_length) != bool(second_byte & 0x80):
                 if mask_length:
                     raise self.ProtocolError('unmasked client frame.')
@@ -201,33 +242,39 @@ class FrameParser:
                     raise self.ProtocolError(
                         'WEBSOCKET control frame fragmented')
             self.frame = frame = Frame(opcode, bool(fin), payload_length)
+            frame._rsv1 = rsv1
 
         if frame._masking_key is None:
             if frame._payload_length == 0x7e:  # 126
-                if len(self.buffer) < 2 + mask_length:  # 2 + 4 for mask
+                if self._available() < 2 + mask_length:  # 2 + 4 for mask
                     return
                 chunk = self._chunk(2)
                 frame._payload_length = unpack("!H", chunk)[0]
             elif frame._payload_length == 0x7f:  # 127
-                if len(self.buffer) < 8 + mask_length:  # 8 + 4 for mask
+                if self._available() < 8 + mask_length:  # 8 + 4 for mask
                     return
                 chunk = self._chunk(8)
                 frame._payload_length = unpack("!Q", chunk)[0]
-            elif len(self.buffer) < mask_length:
+            elif self._available() < mask_length:
                 return
             if mask_length:
                 frame._masking_key = self._chunk(mask_length)
             else:
                 frame._masking_key = b''
 
-        if len(self.buffer) >= frame._payload_length:
+        if self._available() >= frame._payload_length:
             self.frame = None
-            chunk = self._chunk(frame._payload_length)
+            start = self._offset
+            self._offset = end = start + frame._payload_length
+            with memoryview(self.buffer) as view:
+                if frame._masking_key:
+                    chunk = websocket_mask(view[start:end],
+                                           frame._masking_key)
+                else:
+                    chunk = bytes(view[start:end])
             if self._extensions:
                 for extension in self._extensions:
-                    chunk = extension.receive(frame, self.buffer)
-            if frame._masking_key:
-                chunk = websocket_mask(chunk, frame._masking_key)
+                    chunk = extension.receive(frame, chunk)
             if frame.opcode == 1:
                 frame._body = chunk.decode("utf-8", "replace")
             else:
@@ -254,10 +301,8 @@ class FrameParser:
             raise self.ProtocolError('WEBSOCKET frame too large')
         if masking_key:
             buffer.extend(masking_key)
-            buffer.extend(websocket_mask(data, masking_key))
-        else:
-            buffer.extend(data)
-        return bytes(buffer)
+            data = websocket_mask(data, masking_key)
+        return bytes(buffer) + data
 
     def _info(self, message, opcode, masking_key):
         mask_length = self._encode_mask_length
@@ -280,7 +325,16 @@ class FrameParser:
                 pass
         return opcode, masking_key, data
 
+    def _send(self, opcode, final, data, rsv1):
+        for extension in self._extensions:
+            bit, data = extension.send(opcode, final, data)
+            rsv1 |= bit
+        return rsv1, data
+
+    def _available(self):
+        return len(self.buffer) - self._offset
+
     def _chunk(self, length):
-        chunk = bytes(self.buffer[:length])
-        self.buffer = self.buffer[length:]
-        return chunk
+        start = self._offset
+        self._offset += length
+        return bytes(self.buffer[start:self._offset])
@@ -78,6 +78,9 @@ class WsgiProtocol:
     def __init__(self, protocol, cfg, FileWrapper):
         connection = protocol.connection
         server_address = connection.transport.get_extra_info('sockname')
+        if not isinstance(server_address, tuple):
+            # unix domain socket
+            server_address = (server_address, '')
         self.environ = {
             'wsgi.async': True,
             'wsgi.timestamp': protocol.producer.current_time,
@@ -101,6 +104,8 @@ class WsgiProtocol:
         self.protocol = protocol
         self.connection = connection
         self.client_address = connection.address
+        if not isinstance(self.client_address, tuple):
+            self.client_address = (self.client_address or '', '')
         self.parser = protocol.create_parser(self)
         self.header_wsgi = Headers()
 
@@ -80,13 +80,68 @@ def websocket_key():
 
 
 class Extension:
+    '''Base class for negotiated websocket extensions
 
-    def receive(self, data):
-        return data
+    Extensions are registered by name in ``WS_EXTENSIONS`` and an instance
+    is created, via :meth:`negotiate`, for each connection accepting it.
+
+    .. attribute:: name
 
-    def send(self, data):
+        Extension token as it appears in the ``Sec-WebSocket-Extensions``
+        header
+    '''
+    name = None
+
+    @classmethod
+    def negotiate(cls, params, **options):
+        '''Accept an offer with ``params`` from the client
+
+        Return a new extension or ``None`` to decline the offer.
+        '''
+        return None if params else cls(**options)
+
+    @classmethod
+    def accept(cls, params):
+        '''Create the client side extension accepted by the server
+        with ``params``
+        '''
+        return cls()
+
+    def header(self):
+        '''Value for the ``Sec-WebSocket-Extensions`` response header'''
+        return self.name
+
+    def receive(self, frame, data):
+        '''Transform the unmasked payload ``data`` of a received ``frame``
+        '''
         return data
 
+    def send(self, opcode, final, data):
+        '''Transform the payload ``data`` of a frame to send
+
+        Return a two elements tuple with the ``rsv1`` bit and the payload.
+        '''
+        return 0, data
+
+
+def parse_extensions(header):
+    '''Parse a ``Sec-WebSocket-Extensions`` header
+
+    Return a list of ``(name, params)`` tuples in the order offered,
+    parameters without a value are set to ``True``.
+    '''
+    extensions = []
+    for offer in (header or '').split(','):
+        bits = [b.strip() for b in offer.split(';')]
+        if not bits[0]:
+            continue
+        params = {}
+        for bit in bits[1:]:
+            key, _, value = bit.partition('=')
+            params[key.strip()] = value.strip().strip('"') or True
+        extensions.append((bits[0], params))
+    return extensions
+
 
 def frame_parser(version=None, kind=0, extensions=None, protocols=None):
     '''Create a new :class:`FrameParser` instance.
@@ -94,7 +149,7 @@ def frame_parser(version=None, kind=0, extensions=None, protocols=None):
     :param version: protocol version, the default is 13
     :param kind: the kind of parser, and integer between 0 and 3 (check the
         :class:`FrameParser` documentation for details)
-    :param extensions: not used at the moment
+    :param extensions: optional list of negotiated :class:`Extension`
     :param protocols: not used at the moment
     :param pyparser: if ``True`` (default ``False``) uses the python frame
         parser implementation rather than the much faster cython
@@ -102,7 +157,8 @@ def frame_parser(version=None, kind=0, extensions=None, protocols=None):
     '''
     version = get_version(version)
     # extensions, protocols
-    return FrameParser(version, kind, ProtocolError, close_codes=CLOSE_CODES)
+    return FrameParser(version, kind, ProtocolError, extensions=extensions,
+                       close_codes=CLOSE_CODES)
 
 
 def parse_close(data):
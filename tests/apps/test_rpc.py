@@ -1,8 +1,11 @@
 '''Tests the rpc middleware and utilities. It uses the calculator example.'''
+import asyncio
+import json
 import unittest
 
-from pulsar.apps import rpc
+from pulsar.apps import rpc, wsgi
 from pulsar.apps.http import HttpWsgiClient
+from pulsar.utils.httpurl import JSON_CONTENT_TYPES
 
 
 class rpcTest(unittest.TestCase):
@@ -24,3 +27,171 @@ class rpcTest(unittest.TestCase):
         p = self.proxy()
         response = await p.calc.add(4, 5)
         self.assertEqual(response, 9)
+
+
+class TestAutoBatch(unittest.TestCase):
+
+    def proxy(self, **kw):
+        from examples.calculator.manage import Site
+        http = HttpWsgiClient(Site())
+        proxy = rpc.JsonProxy('http://127.0.0.1:8060/', http=http,
+                              timeout=20, **kw)
+        proxy.requests = []
+        post = http.post
+
+        def _post(url, data=None, **kw):
+            proxy.requests.append(json.loads(data.decode('utf-8')))
+            return post(url, data=data, **kw)
+
+        http.post = _post
+        return proxy
+
+    async def test_same_tick(self):
+        p = self.proxy(batch_size=10)
+        result = await asyncio.gather(*[p.calc.add(n, 1) for n in range(5)])
+        self.assertEqual(result, [1, 2, 3, 4, 5])
+        self.assertEqual(len(p.requests), 1)
+        self.assertEqual(len(p.requests[0]), 5)
+
+    async def test_batch_size(self):
+        p = self.proxy(batch_size=3)
+        result = await asyncio.gather(*[p.calc.add(n, n) for n in range(7)])
+        self.assertEqual(result, [2*n for n in range(7)])
+        self.assertEqual(len(p.requests), 3)
+        self.assertEqual([len(r) for r in p.requests[:2]], [3, 3])
+        # the last call is sent on its own
+        self.assertIsInstance(p.requests[2], dict)
+
+    async def test_batch_delay(self):
+        p = self.proxy(batch_size=10, batch_delay=0.05)
+        first = asyncio.ensure_future(p.ping())
+        await asyncio.sleep(0.01)
+        result = await asyncio.gather(p.calc.add(1, 2), first)
+        self.assertEqual(result, [3, 'pong'])
+        self.assertEqual(len(p.requests), 1)
+        self.assertEqual(len(p.requests[0]), 2)
+
+    async def test_errors(self):
+        p = self.proxy(batch_size=10)
+        add, ping = await asyncio.gather(p.calc.add(1), p.ping(),
+                                         return_exceptions=True)
+        self.assertIsInstance(add, rpc.InvalidParams)
+        self.assertEqual(ping, 'pong')
+        self.assertEqual(len(p.requests), 1)
+
+    async def test_no_batch(self):
+        p = self.proxy()
+        result = await asyncio.gather(p.ping(), p.ping())
+        self.assertEqual(result, ['pong', 'pong'])
+        self.assertEqual(len(p.requests), 2)
+
+
+async def budget(request, seconds):
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+class SlowRpc(rpc.JSONRPC):
+    max_concurrency = 2
+    method_timeout = 0.5
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.running = 0
+        self.peak = 0
+
+    async def rpc_sleep(self, request, seconds):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.running -= 1
+        return seconds
+
+    def rpc_bad(self, request):
+        return object()
+
+    async def rpc_cancelled(self, request):
+        future = asyncio.Future()
+        future.cancel()
+        return await future
+
+    rpc_budget = rpc.rpc_method(budget, timeout=0.05)
+
+
+class TestJsonRpcServer(unittest.TestCase):
+
+    def proxy(self, handler, **kw):
+        router = wsgi.Router('/', post=handler,
+                             accept_content_types=JSON_CONTENT_TYPES)
+        app = wsgi.WsgiHandler(middleware=[wsgi.wait_for_body_middleware,
+                                           router])
+        return rpc.JsonProxy('http://127.0.0.1:8060/',
+                             http=HttpWsgiClient(app), timeout=20, **kw)
+
+    async def test_batch_concurrency(self):
+        handler = SlowRpc()
+        p = self.proxy(handler, batch_size=10)
+        times = [0.01*(n % 3) for n in range(7)]
+        result = await asyncio.gather(*[p.sleep(t) for t in times])
+        self.assertEqual(result, times)
+        self.assertEqual(handler.peak, 2)
+        self.assertEqual(handler.running, 0)
+
+    async def test_batch_streamed(self):
+        p = self.proxy(SlowRpc(), full_response=True)
+        data = json.dumps(['bla'] + [{'jsonrpc': '2.0', 'id': n,
+                                      'method': 'sleep',
+                                      'params': [0.05*(1 - n)]}
+                                     for n in range(2)]).encode('utf-8')
+        response = await p._send(data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.headers.get('content-length'))
+        result = response.json()
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[0]['error']['code'], -32600)
+        # batch responses are returned as they complete
+        self.assertEqual([r['id'] for r in result], [None, 1, 0])
+
+    async def test_not_serializable(self):
+        p = self.proxy(SlowRpc(), batch_size=10)
+        bad, ok = await asyncio.gather(p.bad(), p.sleep(0),
+                                       return_exceptions=True)
+        self.assertIsInstance(bad, rpc.InternalError)
+        self.assertEqual(ok, 0)
+
+    async def test_cancelled_method(self):
+        p = self.proxy(SlowRpc())
+        with self.assertRaises(rpc.InternalError):
+            await p.cancelled()
+        p = self.proxy(SlowRpc(), batch_size=10)
+        cancelled, ok = await asyncio.gather(p.cancelled(), p.sleep(0),
+                                             return_exceptions=True)
+        self.assertIsInstance(cancelled, rpc.InternalError)
+        self.assertEqual(ok, 0)
+
+    async def test_method_timeout(self):
+        p = self.proxy(SlowRpc())
+        self.assertEqual(await p.budget(0), 0)
+        with self.assertRaises(rpc.MethodTimeout):
+            await p.budget(0.2)
+        self.assertEqual(await p.sleep(0.2), 0.2)
+        handler = SlowRpc()
+        handler.method_timeout = 0.05
+        with self.assertRaises(rpc.MethodTimeout):
+            await self.proxy(handler).sleep(0.2)
+
+    def test_get_handler_cache(self):
+        from examples.calculator.manage import Root, Calculator
+        root = Root()
+        self.assertRaises(rpc.NoSuchFunction, root.get_handler, 'calc.add')
+        root.putSubHandler('calc', Calculator())
+        add = root.get_handler('calc.add')
+        self.assertEqual(add.__name__, 'rpc_add')
+        self.assertTrue(root.get_handler('calc.add') is add)
+        self.assertRaises(rpc.NoSuchFunction, root.get_handler, '')
+        self.assertRaises(rpc.NoSuchFunction, root.get_handler, 'calc.foo')
+        calc = Calculator()
+        root.putSubHandler('calc', calc)
+        self.assertEqual(root.get_handler('calc.add').__self__, calc)
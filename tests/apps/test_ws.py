@@ -0,0 +1,340 @@
+import asyncio
+import json
+import unittest
+
+from pulsar.api import ProtocolError
+from pulsar.apps.ws import WebSocket, WebSocketGroup, WebSocketProtocol, WS
+from pulsar.asynclib.protocols import Connection, TcpServer
+from pulsar.apps.ws.extensions import PerMessageDeflate
+from pulsar.utils.websocket import (
+    frame_parser, parse_close, parse_extensions
+)
+
+
+MESSAGE = json.dumps([{'id': n, 'name': 'item %d' % n, 'price': 10.5}
+                      for n in range(20)])
+
+
+class TestPerMessageDeflate(unittest.TestCase):
+
+    def parsers(self, offer='permessage-deflate', **options):
+        router = WebSocket('/', None, extensions={
+            'permessage-deflate': options
+        })
+        extensions = router.negotiate_extensions(offer)
+        self.assertEqual(len(extensions), 1)
+        server = frame_parser(extensions=extensions)
+        header = extensions[0].header()
+        accepted = [PerMessageDeflate.accept(params)
+                    for _, params in parse_extensions(header)]
+        client = frame_parser(kind=1, extensions=accepted)
+        return server, client
+
+    def test_parse_extensions(self):
+        self.assertEqual(parse_extensions(None), [])
+        self.assertEqual(parse_extensions(
+            'permessage-deflate; client_max_window_bits, '
+            'permessage-deflate; server_max_window_bits="10", foo'), [
+                ('permessage-deflate', {'client_max_window_bits': True}),
+                ('permessage-deflate', {'server_max_window_bits': '10'}),
+                ('foo', {})])
+
+    def test_negotiate(self):
+        router = WebSocket('/', None)
+        self.assertEqual(router.negotiate_extensions('foo, bla'), [])
+        extensions = router.negotiate_extensions(
+            'permessage-deflate; foo=1, permessage-deflate; '
+            'server_max_window_bits=8, permessage-deflate; '
+            'server_max_window_bits=10; client_no_context_takeover, '
+            'permessage-deflate')
+        self.assertEqual(len(extensions), 1)
+        self.assertEqual(extensions[0].header(),
+                         'permessage-deflate; client_no_context_takeover; '
+                         'server_max_window_bits=10')
+        router = WebSocket('/', None, extensions={})
+        self.assertEqual(
+            router.negotiate_extensions('permessage-deflate'), [])
+
+    def test_negotiate_preferences(self):
+        router = WebSocket('/', None, extensions={
+            'permessage-deflate': {'server_no_context_takeover': True,
+                                   'client_max_window_bits': 12}})
+        ext, = router.negotiate_extensions(
+            'permessage-deflate; client_max_window_bits')
+        self.assertEqual(ext.header(),
+                         'permessage-deflate; server_no_context_takeover; '
+                         'client_max_window_bits=12')
+        ext, = router.negotiate_extensions(
+            'permessage-deflate; client_max_window_bits=10')
+        self.assertTrue(ext.header().endswith('client_max_window_bits=10'))
+        self.assertRaises(ProtocolError, PerMessageDeflate.accept,
+                          {'foo': True})
+
+    def test_server_to_client(self):
+        server, client = self.parsers()
+        sizes = []
+        for _ in range(3):
+            chunk = server.encode(MESSAGE)
+            sizes.append(len(chunk))
+            frame = client.decode(chunk)
+            self.assertEqual(frame.rsv1, 1)
+            self.assertEqual(frame.body, MESSAGE)
+        self.assertTrue(sizes[0] < len(MESSAGE) // 2)
+        # context takeover
+        self.assertTrue(sizes[1] < sizes[0] // 2)
+        self.assertTrue(sizes[2] < sizes[0] // 2)
+
+    def test_client_to_server(self):
+        server, client = self.parsers(
+            'permessage-deflate; client_max_window_bits')
+        for _ in range(3):
+            frame = server.decode(client.encode(MESSAGE))
+            self.assertEqual(frame.rsv1, 1)
+            self.assertEqual(frame.body, MESSAGE)
+
+    def test_no_context_takeover(self):
+        server, client = self.parsers(
+            'permessage-deflate; server_no_context_takeover; '
+            'client_no_context_takeover')
+        first = server.encode(MESSAGE)
+        self.assertEqual(server.encode(MESSAGE), first)
+        self.assertEqual(client.decode(first).body, MESSAGE)
+        self.assertEqual(client.decode(first).body, MESSAGE)
+        masking_key = b'abcd'
+        first = client.encode(MESSAGE, masking_key=masking_key)
+        self.assertEqual(client.encode(MESSAGE, masking_key=masking_key),
+                         first)
+        self.assertEqual(server.decode(first).body, MESSAGE)
+        self.assertEqual(server.decode(first).body, MESSAGE)
+
+    def test_small_messages(self):
+        server, client = self.parsers()
+        chunk = server.encode('Hello')
+        self.assertEqual(chunk[2:], b'Hello')
+        frame = client.decode(chunk)
+        self.assertEqual(frame.rsv1, 0)
+        self.assertEqual(frame.body, 'Hello')
+        frame = client.decode(server.ping('Hello'))
+        self.assertEqual(frame.rsv1, 0)
+        self.assertEqual(frame.body, b'Hello')
+
+    def test_fragmented(self):
+        server, client = self.parsers()
+        data = MESSAGE.encode('utf-8') * 10
+        chunks = list(server.multi_encode(data, opcode=2, max_payload=50))
+        self.assertTrue(len(chunks) > 1)
+        frames = [client.decode(chunk) for chunk in chunks]
+        self.assertEqual(frames[0].rsv1, 1)
+        self.assertEqual(frames[1].rsv1, 0)
+        self.assertEqual(b''.join((f.body for f in frames)), data)
+        self.assertEqual(client.decode(server.encode(MESSAGE)).body,
+                         MESSAGE)
+
+    def test_max_size(self):
+        server, client = self.parsers(
+            'permessage-deflate; client_max_window_bits', max_size=1000)
+        self.assertEqual(server.extensions[0].max_size, 1000)
+        frame = server.decode(client.encode('x'*1000))
+        self.assertEqual(frame.body, 'x'*1000)
+        with self.assertRaises(ProtocolError) as cm:
+            server.decode(client.encode('x'*100000))
+        self.assertEqual(cm.exception.status_code, 1009)
+        # fragmented messages
+        server, client = self.parsers(
+            'permessage-deflate; client_max_window_bits', max_size=1000)
+        chunks = list(client.multi_encode(b'x'*2000, opcode=2,
+                                          max_payload=5))
+        self.assertTrue(len(chunks) > 1)
+        with self.assertRaises(ProtocolError):
+            for chunk in chunks:
+                server.decode(chunk)
+        # the rest of the message is not inflated
+        frame = None
+        for chunk in chunks[chunks.index(chunk)+1:]:
+            frame = server.decode(chunk)
+        self.assertEqual(server.extensions[0]._decompressor, None)
+        self.assertTrue(len(frame.body) <= 1001)
+
+    def test_rsv1_without_extensions(self):
+        server, _ = self.parsers()
+        client = frame_parser(kind=1)
+        self.assertRaises(ProtocolError, client.decode,
+                          server.encode(MESSAGE))
+
+
+class Transport(asyncio.Transport):
+
+    def __init__(self):
+        super().__init__()
+        self.written = []
+        self.buffer_size = 0
+        self.closing = False
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def get_write_buffer_size(self):
+        return self.buffer_size
+
+    def write(self, data):
+        self.written.append(data)
+
+    def is_closing(self):
+        return self.closing
+
+    def can_write_eof(self):
+        return False
+
+    def close(self):
+        self.closing = True
+
+
+class Channel:
+    name = 'prices'
+
+
+class TestWebSocketGroup(unittest.TestCase):
+
+    def test_close_message_too_big(self):
+        ws = self.websocket('permessage-deflate; client_max_window_bits',
+                            max_size=100)
+        ws.feed_data(ws.client.encode('x'*1000))
+        transport = ws.connection.transport
+        self.assertTrue(transport.closing)
+        frame = ws.client.decode(transport.written[-1])
+        self.assertTrue(frame.is_close)
+        self.assertEqual(parse_close(frame.body)[0], 1009)
+
+    def test_no_frames_after_message_too_big(self):
+        ws = self.websocket('permessage-deflate; client_max_window_bits',
+                            max_size=100)
+        messages = []
+        ws.handler.on_bytes = lambda ws, body: messages.append(body)
+        chunks = list(ws.client.multi_encode(b'x'*1000, opcode=2,
+                                             max_payload=5))
+        ws.feed_data(b''.join(chunks))
+        transport = ws.connection.transport
+        self.assertTrue(transport.closing)
+        written = len(transport.written)
+        for chunk in chunks:
+            ws.feed_data(chunk)
+        ws.feed_data(ws.client.encode(b'y', opcode=2))
+        self.assertEqual(messages, [])
+        self.assertEqual(len(transport.written), written)
+
+    def websocket(self, offer=None, **options):
+        loop = asyncio.get_event_loop()
+        connection = Connection(None, TcpServer(None, loop=loop))
+        connection.connection_made(Transport())
+        router = WebSocket('/', None, extensions={
+            'permessage-deflate': options
+        })
+        server = frame_parser(extensions=router.negotiate_extensions(offer))
+        accepted = [PerMessageDeflate.accept(params)
+                    for extension in server.extensions
+                    for _, params in parse_extensions(extension.header())]
+        client = frame_parser(kind=1, extensions=accepted)
+        ws = WebSocketProtocol.create(None, WS(), server, connection)
+        ws.client = client
+        return ws
+
+    def test_add_remove(self):
+        group = WebSocketGroup()
+        ws = self.websocket()
+        group.add(ws)
+        group.add(ws)
+        self.assertEqual(len(group), 1)
+        self.assertTrue(ws in group)
+        self.assertEqual(list(group), [ws])
+        group.remove(ws)
+        self.assertEqual(len(group), 0)
+        group.remove(ws)
+
+    def test_broadcast_same_frame(self):
+        group = WebSocketGroup()
+        members = [self.websocket() for _ in range(3)]
+        for ws in members:
+            group.add(ws)
+        self.assertEqual(group.broadcast(MESSAGE), 3)
+        frames = [ws.connection.transport.written[0] for ws in members]
+        self.assertTrue(frames[0] is frames[1])
+        self.assertTrue(frames[0] is frames[2])
+        self.assertEqual(members[0].client.decode(frames[0]).body, MESSAGE)
+
+    def test_broadcast_compressed(self):
+        group = WebSocketGroup()
+        plain = self.websocket()
+        takeover = self.websocket('permessage-deflate')
+        shared = [self.websocket('permessage-deflate; '
+                                 'server_no_context_takeover')
+                  for _ in range(2)]
+        for ws in [plain, takeover] + shared:
+            group.add(ws)
+        self.assertEqual(group.broadcast(MESSAGE), 4)
+        frame = plain.connection.transport.written[0]
+        self.assertTrue(takeover.connection.transport.written[0] is frame)
+        compressed = shared[0].connection.transport.written[0]
+        self.assertTrue(shared[1].connection.transport.written[0]
+                        is compressed)
+        self.assertTrue(len(compressed) < len(frame) // 2)
+        for ws in shared:
+            for chunk in ws.connection.transport.written:
+                self.assertEqual(ws.client.decode(chunk).body, MESSAGE)
+        # the context of the takeover connection is not affected
+        chunk = takeover.parser.encode(MESSAGE)
+        self.assertEqual(takeover.client.decode(frame).body, MESSAGE)
+        self.assertEqual(takeover.client.decode(chunk).body, MESSAGE)
+        group.compress = False
+        group.broadcast(MESSAGE)
+        self.assertTrue(shared[0].connection.transport.written[1] is
+                        plain.connection.transport.written[1])
+
+    def test_skip_slow(self):
+        group = WebSocketGroup(max_buffer=100)
+        fast, slow = self.websocket(), self.websocket()
+        group.add(fast)
+        group.add(slow)
+        slow.connection.transport.buffer_size = 101
+        self.assertEqual(group.broadcast(MESSAGE), 1)
+        self.assertEqual(group.skipped, 1)
+        self.assertEqual(len(group), 2)
+        self.assertEqual(slow.connection.transport.written, [])
+        slow.connection.transport.buffer_size = 0
+        self.assertEqual(group.broadcast(MESSAGE), 2)
+
+    def test_drop_slow(self):
+        group = WebSocketGroup(max_buffer=100, drop_slow=True)
+        fast, slow = self.websocket(), self.websocket()
+        group.add(fast)
+        group.add(slow)
+        slow.connection.transport.buffer_size = 101
+        self.assertEqual(group.broadcast(MESSAGE), 1)
+        self.assertEqual(group.dropped, 1)
+        self.assertEqual(list(group), [fast])
+        self.assertTrue(slow.connection.closed)
+
+    def test_closed_members(self):
+        group = WebSocketGroup()
+        ws1, ws2 = self.websocket(), self.websocket()
+        group.add(ws1)
+        group.add(ws2)
+        ws1.connection.transport.close()
+        self.assertEqual(group.broadcast(MESSAGE), 1)
+        self.assertEqual(list(group), [ws2])
+        ws2.event('post_request').fire()
+        self.assertEqual(len(group), 0)
+        group.add(ws2)
+        self.assertEqual(len(group), 0)
+
+    def test_channel_callback(self):
+        group = WebSocketGroup()
+        ws = self.websocket()
+        group.add(ws)
+        group(Channel(), 'update', {'price': 10})
+        frame = ws.client.decode(ws.connection.transport.written[0])
+        self.assertEqual(json.loads(frame.body), {'channel': 'prices',
+                                                  'event': 'update',
+                                                  'data': {'price': 10}})
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+
+from pulsar.api import ProtocolConsumer
+from pulsar.asynclib.protocols import Connection, TcpServer
+
+
+class Transport(asyncio.Transport):
+    '''A transport recording the data written into it'''
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+        self.closing = False
+        self.reading = True
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def is_closing(self):
+        return self.closing
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+    def can_write_eof(self):
+        return False
+
+    def close(self):
+        self.closing = True
+
+    def pause_reading(self):
+        self.reading = False
+
+    def resume_reading(self):
+        self.reading = True
+
+
+class Echo(ProtocolConsumer):
+    '''Reply to each line received'''
+
+    def feed_data(self, data):
+        for line in bytes(data).split(b'\r\n')[:-1]:
+            self.connection.write(b'+' + line + b'\r\n')
+
+
+def connection(**kw):
+    server = TcpServer(None, loop=asyncio.get_event_loop())
+    conn = Connection(Echo, server, **kw)
+    conn.connection_made(Transport())
+    return conn
+
+
+class TestFlowControl(unittest.TestCase):
+
+    async def test_no_cork(self):
+        conn = connection()
+        self.assertFalse(conn.cork)
+        conn.data_received(b'a\r\nb\r\nc\r\n')
+        self.assertEqual(conn.transport.writes, [b'+a\r\n', b'+b\r\n',
+                                                 b'+c\r\n'])
+
+    async def test_cork(self):
+        conn = connection(cork=True)
+        self.assertTrue(conn.cork)
+        conn.data_received(b'a\r\nb\r\nc\r\n')
+        self.assertEqual(conn.transport.writes, [])
+        await asyncio.sleep(0)
+        self.assertEqual(conn.transport.writes, [b'+a\r\n+b\r\n+c\r\n'])
+        conn.data_received(b'd\r\n')
+        await asyncio.sleep(0)
+        self.assertEqual(conn.transport.writes[1:], [b'+d\r\n'])
+
+    async def test_cork_limit(self):
+        conn = connection(cork=True, limit=4)
+        conn.data_received(b'abcdefgh\r\ni\r\n')
+        self.assertEqual(conn.transport.writes, [b'+abcdefgh\r\n'])
+        await asyncio.sleep(0)
+        self.assertEqual(conn.transport.writes[1:], [b'+i\r\n'])
+
+    async def test_cork_paused(self):
+        conn = connection(cork=True)
+        conn.pause_writing()
+        conn.data_received(b'a\r\nb\r\n')
+        await asyncio.sleep(0)
+        self.assertEqual(conn.transport.writes, [])
+        self.assertEqual(conn._buffer_size, 8)
+        conn.resume_writing()
+        self.assertEqual(conn.transport.writes, [b'+a\r\n+b\r\n'])
+        self.assertEqual(conn._buffer_size, 0)
+
+    async def test_cork_close(self):
+        conn = connection(cork=True)
+        conn.data_received(b'a\r\n')
+        conn.close()
+        self.assertEqual(conn.transport.writes, [b'+a\r\n'])
+        await asyncio.sleep(0)
+        self.assertEqual(conn.transport.writes, [b'+a\r\n'])
@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+
+from pulsar.api import ProtocolConsumer
+from pulsar.asynclib.mixins import ResponsePipeline
+from pulsar.asynclib.protocols import Connection, TcpServer
+
+
+class Transport(asyncio.Transport):
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def is_closing(self):
+        return False
+
+
+class Consumer(ProtocolConsumer):
+    written = None
+
+    def feed_data(self, data):
+        pass
+
+    async def write_response(self):
+        await self.waiter
+        self.written.append(self)
+
+
+class TestPipeline(unittest.TestCase):
+
+    def connection(self):
+        loop = asyncio.get_event_loop()
+        conn = Connection(Consumer, TcpServer(None, loop=loop))
+        conn.connection_made(Transport())
+        return conn
+
+    def consumer(self, conn, written):
+        consumer = Consumer(conn)
+        consumer.waiter = asyncio.Future()
+        consumer.written = written
+        return consumer
+
+    async def test_single_response(self):
+        conn = self.connection()
+        written = []
+        consumer = self.consumer(conn, written)
+        conn.pipeline(consumer)
+        self.assertEqual(conn._pipeline, None)
+        response = conn._response
+        self.assertTrue(response)
+        consumer.waiter.set_result(None)
+        self.assertTrue(await response)
+        self.assertEqual(written, [consumer])
+        self.assertEqual(conn._response, None)
+        self.assertEqual(conn._pipeline, None)
+
+    async def test_pipelined_responses(self):
+        conn = self.connection()
+        written = []
+        consumers = [self.consumer(conn, written) for _ in range(3)]
+        for consumer in consumers:
+            conn.pipeline(consumer)
+        self.assertIsInstance(conn._pipeline, ResponsePipeline)
+        self.assertEqual(conn._response, None)
+        for consumer in reversed(consumers):
+            consumer.waiter.set_result(None)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        self.assertEqual(written, consumers)
+        worker = conn.close_pipeline()
+        await asyncio.wait([worker])
+        self.assertEqual(conn._pipeline, None)
+
+    async def test_close_response(self):
+        conn = self.connection()
+        written = []
+        conn.pipeline(self.consumer(conn, written))
+        response = conn.close_pipeline()
+        with self.assertRaises(asyncio.CancelledError):
+            await response
+        self.assertEqual(written, [])
+        self.assertEqual(conn._response, None)
@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from pulsar.api import ProtocolConsumer
+from pulsar.asynclib.mixins import TimerWheel
+from pulsar.asynclib.protocols import Connection, TcpServer
+
+
+class Transport(asyncio.Transport):
+
+    def __init__(self):
+        super().__init__()
+        self.closing = False
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def is_closing(self):
+        return self.closing
+
+    def can_write_eof(self):
+        return False
+
+    def close(self):
+        self.closing = True
+
+
+class Consumer(ProtocolConsumer):
+
+    def feed_data(self, data):
+        pass
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def server(self, keep_alive=5):
+        return TcpServer(None, loop=asyncio.get_event_loop(),
+                         keep_alive=keep_alive)
+
+    def connection(self, server):
+        conn = Connection(Consumer, server)
+        conn.connection_made(Transport())
+        return conn
+
+    def test_no_timeout(self):
+        server = self.server(0)
+        conn = self.connection(server)
+        self.assertEqual(conn._timeout_deadline, None)
+        self.assertFalse(hasattr(server, '_timer_wheel'))
+
+    def test_buckets(self):
+        server = self.server()
+        connections = [self.connection(server) for _ in range(100)]
+        wheel = TimerWheel.register(server)
+        self.assertEqual(len(wheel), 100)
+        self.assertTrue(len(wheel.buckets) <= 2)
+        self.assertTrue(wheel.handler)
+        for conn in connections:
+            self.assertEqual(conn._timeout_deadline, conn.last_change + 5)
+            conn.connection_lost(None)
+            self.assertEqual(conn._timeout_deadline, None)
+        self.assertEqual(len(wheel), 0)
+        self.assertFalse(wheel.buckets)
+        self.assertEqual(wheel.handler, None)
+
+    def test_sweep(self):
+        server = self.server()
+        idle = self.connection(server)
+        active = self.connection(server)
+        wheel = TimerWheel.register(server)
+        now = server.current_time
+        with mock.patch.object(TcpServer, 'current_time', now + 5):
+            active.changed()
+            wheel._sweep()
+        self.assertTrue(idle.closed)
+        self.assertFalse(active.closed)
+        self.assertEqual(active._timeout_deadline, now + 10)
+        self.assertEqual(len(wheel), 1)
+        self.assertTrue(wheel.handler)
+        active.close()
+        with mock.patch.object(TcpServer, 'current_time', now + 10):
+            wheel._sweep()
+        self.assertEqual(len(wheel), 0)
+        self.assertEqual(wheel.handler, None)
+
+    def test_change_timeout(self):
+        server = self.server()
+        conn = self.connection(server)
+        conn.timeout = 20
+        self.assertEqual(conn._timeout_deadline, conn.last_change + 20)
+        self.assertEqual(len(TimerWheel.register(server)), 1)
+        conn.timeout = 0
+        self.assertEqual(conn._timeout_deadline, None)
+        self.assertEqual(len(TimerWheel.register(server)), 0)
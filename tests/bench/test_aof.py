@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from pulsar.api import send
+from pulsar.apps.test import run_test_server
+from pulsar.apps.ds import PulsarDS
+from pulsar.apps.data import create_store
+
+
+class TestNoAppendOnly(unittest.TestCase):
+    '''Write throughput of pulsar-ds without the append only file'''
+    __benchmark__ = True
+    __number__ = 1000
+    app_cfg = None
+    fsync = None
+
+    @classmethod
+    async def setUpClass(cls):
+        kw = {}
+        if cls.fsync:
+            kw = dict(key_value_appendonly=True,
+                      key_value_appendfilename=os.path.join(
+                          tempfile.mkdtemp(), 'bench.aof'),
+                      key_value_appendfsync=cls.fsync)
+        await run_test_server(cls, PulsarDS, **kw)
+        cls.client = create_store(
+            'pulsar://%s:%s/5' % cls.app_cfg.addresses[0]).client()
+        cls.value = os.urandom(64)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    def test_set(self):
+        return self.client.set('bench', self.value)
+
+    def test_rpush(self):
+        return self.client.rpush('bench-list', self.value)
+
+
+class TestAppendFsyncNo(TestNoAppendOnly):
+    fsync = 'no'
+
+
+class TestAppendFsyncEverySec(TestNoAppendOnly):
+    fsync = 'everysec'
+
+
+class TestAppendFsyncAlways(TestNoAppendOnly):
+    fsync = 'always'
@@ -0,0 +1,70 @@
+import asyncio
+import socket
+import unittest
+
+from pulsar.api import ProtocolConsumer
+from pulsar.asynclib.protocols import Connection, TcpServer
+
+
+class CountingSocket(socket.socket):
+    '''A socket counting ``send`` system calls'''
+    sends = 0
+
+    def send(self, data, *args):
+        self.sends += 1
+        return super().send(data, *args)
+
+
+class Ping(ProtocolConsumer):
+    '''Reply ``+PONG`` to each ``PING`` line received'''
+    buffer = b''
+
+    def feed_data(self, data):
+        lines = (self.buffer + bytes(data)).split(b'\r\n')
+        self.buffer = lines.pop()
+        for _ in lines:
+            self.connection.write(b'+PONG\r\n')
+
+
+class TestPipeline(unittest.TestCase):
+    '''Replies to a pipeline of 1,000 commands, one write each'''
+    __benchmark__ = True
+    __number__ = 10
+    commands = 1000
+    cork = False
+
+    @classmethod
+    async def setUpClass(cls):
+        loop = asyncio.get_event_loop()
+        server, cls.client = socket.socketpair()
+        cls.client.setblocking(False)
+        cls.sock = CountingSocket(fileno=server.detach())
+        producer = TcpServer(None, loop=loop)
+        cls.transport, _ = await loop.connect_accepted_socket(
+            lambda: Connection(Ping, producer, cork=cls.cork), cls.sock)
+        cls.request = b'PING\r\n' * cls.commands
+        cls.response_size = len(b'+PONG\r\n') * cls.commands
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.transport.close()
+        cls.client.close()
+
+    async def test_pipeline(self):
+        loop = asyncio.get_event_loop()
+        sends = self.sock.sends
+        await loop.sock_sendall(self.client, self.request)
+        received = 0
+        while received < self.response_size:
+            data = await loop.sock_recv(self.client, self.response_size)
+            received += len(data)
+        self.assertEqual(received, self.response_size)
+        sends = self.sock.sends - sends
+        self.assertTrue(sends <= self.commands)
+        if self.cork:
+            self.assertTrue(sends < self.commands // 10)
+
+
+class TestCorkedPipeline(TestPipeline):
+    '''Replies to a pipeline of 1,000 commands coalesced by cork mode'''
+    cork = True
@@ -0,0 +1,84 @@
+import os
+import time
+import unittest
+from inspect import isawaitable
+
+from pulsar.apps import wsgi
+from pulsar.apps.wsgi.response import brotli
+
+
+class TestGZip(unittest.TestCase):
+    '''Compress a response body with GZipMiddleware, the summary includes
+    the CPU time (event loop and executor threads) per repeat'''
+    __benchmark__ = True
+    __number__ = 5
+    _sizes = {'tiny': 2**10,
+              'small': 2**13,
+              'normal': 2**16,
+              'big': 2**18,
+              'huge': 2**20}
+    chunk_size = 2**14
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, '
+                          'cpu {0[cpu]} secs, stdev {0[std]}')
+
+    @classmethod
+    def setUpClass(cls):
+        size = cls._sizes[cls.cfg.size]
+        cls.body = os.urandom(size // 2).hex().encode('utf-8')
+        cls.environ = {'HTTP_ACCEPT_ENCODING': 'gzip, deflate, br'}
+        cls.middleware = wsgi.GZipMiddleware()
+
+    def startUp(self):
+        self._cpu = time.process_time()
+
+    def getInfo(self, info, delta, dt):
+        info['cpu'] = info.get('cpu', 0) + time.process_time() - self._cpu
+
+    def getSummary(self, info, repeat, total_time, total_time2):
+        info['cpu'] = '%.5f' % (info['cpu'] / repeat)
+        return info
+
+    async def respond(self, content, environ=None, middleware=None):
+        response = wsgi.WsgiResponse(200, content, content_type='text/plain')
+        middleware = middleware or self.middleware
+        if environ is None:
+            environ = self.environ
+        result = middleware(environ, response)
+        if isawaitable(result):
+            response = await result
+        size = 0
+        for chunk in response:
+            if isawaitable(chunk):
+                chunk = await chunk
+            size += len(chunk)
+        self.assertTrue(size)
+
+    def chunks(self):
+        body, size = self.body, self.chunk_size
+        return (body[i:i+size] for i in range(0, len(body), size))
+
+    def test_identity(self):
+        return self.respond(self.body, {})
+
+    def test_gzip(self):
+        return self.respond(self.body)
+
+    def test_deflate(self):
+        return self.respond(self.body,
+                            {'HTTP_ACCEPT_ENCODING': 'deflate'})
+
+    @unittest.skipUnless(brotli, 'Requires brotli')
+    def test_brotli(self):
+        return self.respond(self.body, {'HTTP_ACCEPT_ENCODING': 'br'})
+
+    def test_gzip_streamed(self):
+        return self.respond(self.chunks())
+
+    def test_gzip_executor(self):
+        middleware = wsgi.GZipMiddleware(executor_length=self.chunk_size)
+        return self.respond(self.body, middleware=middleware)
+
+    def test_gzip_streamed_executor(self):
+        middleware = wsgi.GZipMiddleware(executor_length=self.chunk_size)
+        return self.respond(self.chunks(), middleware=middleware)
@@ -0,0 +1,117 @@
+import time
+import asyncio
+import unittest
+import tracemalloc
+
+from pulsar.api import ProtocolConsumer
+from pulsar.asynclib.mixins import TimerWheel
+from pulsar.asynclib.protocols import Connection, TcpServer
+
+
+class Transport(asyncio.Transport):
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def is_closing(self):
+        return False
+
+
+class Consumer(ProtocolConsumer):
+
+    def feed_data(self, data):
+        pass
+
+
+class CallLaterConnection(Connection):
+    '''Idle timeout with a loop timer per connection, as it was before
+    the timer wheel'''
+    _timeout_handler = None
+
+    def _timed_out(self):
+        if self.last_change:
+            gap = time.time() - self.last_change
+            if gap < self._timeout:
+                self._timeout_handler = None
+                return self._add_timeout(None, timeout=self._timeout-gap)
+        self.close()
+
+    def _add_timeout(self, _, exc=None, timeout=None):
+        if not self.closed:
+            self._cancel_timeout(_, exc=exc)
+            timeout = timeout or self._timeout
+            if timeout and not exc:
+                self._timeout_handler = self._loop.call_later(
+                    timeout, self._timed_out
+                )
+
+    def _cancel_timeout(self, _, exc=None, **kw):
+        if self._timeout_handler:
+            self._timeout_handler.cancel()
+            self._timeout_handler = None
+
+
+class TestTimerWheel(unittest.TestCase):
+    '''Add and remove idle timeouts of many connections and sweep them
+    once'''
+    __benchmark__ = True
+    __number__ = 1
+    _sizes = {'tiny': 1000,
+              'small': 5000,
+              'normal': 10000,
+              'big': 100000,
+              'huge': 100000}
+    connection_class = Connection
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          'timers memory {0[memory]} bytes per connection')
+
+    @classmethod
+    def setUpClass(cls):
+        loop = asyncio.get_event_loop()
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.server = TcpServer(None, loop=loop)
+        cls.connections = []
+        for _ in range(cls.size):
+            conn = cls.connection_class(Consumer, cls.server)
+            conn.connection_made(Transport())
+            cls.connections.append(conn)
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        cls.set_timeout(30)
+        cls.memory = (tracemalloc.get_traced_memory()[0] - start) // cls.size
+        tracemalloc.stop()
+        cls.set_timeout(0)
+
+    @classmethod
+    def set_timeout(cls, timeout):
+        for conn in cls.connections:
+            conn.timeout = timeout
+
+    def getSummary(self, info, repeat, t, t2):
+        info['memory'] = self.memory
+        return info
+
+    def sweep(self):
+        wheel = TimerWheel.register(self.server)
+        buckets = wheel.buckets
+        wheel.buckets = dict(((d - 30, b) for d, b in buckets.items()))
+        wheel._sweep()
+
+    def test_idle(self):
+        self.set_timeout(30)
+        self.sweep()
+        self.set_timeout(0)
+
+
+class TestCallLater(TestTimerWheel):
+    '''Add and remove idle timeouts of many connections with a loop timer
+    per connection'''
+    connection_class = CallLaterConnection
+
+    def sweep(self):
+        for conn in self.connections:
+            conn._timeout_handler._run()
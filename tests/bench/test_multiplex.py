@@ -0,0 +1,39 @@
+import asyncio
+import unittest
+
+from pulsar.api import send
+from pulsar.apps.test import run_test_server
+from pulsar.apps.ds import PulsarDS
+from pulsar.apps.data import create_store
+
+
+class TestPool(unittest.TestCase):
+    '''Fan out of concurrent commands over a pool of connections'''
+    __benchmark__ = True
+    __number__ = 10
+    app_cfg = None
+    multiplex = False
+    concurrency = 100
+
+    @classmethod
+    async def setUpClass(cls):
+        await run_test_server(cls, PulsarDS)
+        cls.client = create_store(
+            'pulsar://%s:%s/5' % cls.app_cfg.addresses[0],
+            multiplex=cls.multiplex).client()
+        await cls.client.set('bench', 'x'*64)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    def test_get(self):
+        get = self.client.get
+        return asyncio.gather(*[get('bench')
+                                for _ in range(self.concurrency)])
+
+
+class TestMultiplexed(TestPool):
+    '''Fan out of concurrent commands over a multiplexed connection'''
+    multiplex = True
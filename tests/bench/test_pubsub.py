@@ -0,0 +1,54 @@
+from random import randrange
+import unittest
+
+from pulsar.apps.ds.server import PatternIndex
+
+
+class LinearPatterns(PatternIndex):
+    '''Match every pattern against the channel, as pulsar-ds did before
+    patterns were bucketed by their literal prefix
+    '''
+    def match(self, channel):
+        ch = channel.decode('utf-8')
+        for p in self._patterns.values():
+            if p.re.match(ch):
+                yield p
+
+
+class TestPatternIndex(unittest.TestCase):
+    '''Match published channels against 1k to 100k subscribed patterns'''
+    __benchmark__ = True
+    __number__ = 1
+    _sizes = {'tiny': 1000,
+              'small': 5000,
+              'normal': 10000,
+              'big': 50000,
+              'huge': 100000}
+    index_class = PatternIndex
+    messages = 100
+
+    @classmethod
+    def setUpClass(cls):
+        size = cls._sizes[cls.cfg.size]
+        cls.index = cls.index_class()
+        for i in range(size):
+            if i % 2:
+                pattern = 'user:%d:*' % i
+            else:
+                pattern = 'room:%d:?' % i
+            cls.index.add(pattern.encode('utf-8'))
+        cls.index.add(b'*:logout')
+        cls.channels = [('user:%d:login' % randrange(size)).encode('utf-8')
+                        for _ in range(cls.messages)]
+
+    def test_publish(self):
+        match = self.index.match
+        count = 0
+        for channel in self.channels:
+            for _ in match(channel):
+                count += 1
+        self.assertTrue(count <= len(self.channels))
+
+
+class TestLinearPatterns(TestPatternIndex):
+    index_class = LinearPatterns
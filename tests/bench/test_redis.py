@@ -3,11 +3,58 @@ import string
 import unittest
 
 from pulsar.api import HAS_C_EXTENSIONS
-from pulsar.apps.ds import redis_parser
+from pulsar.apps.ds.parser import InvalidResponse, response_error
+from pulsar.utils.lib import RedisParser
+from pulsar.utils.pylib.redisparser import (RedisParser as PyRedisParser,
+                                            String, ArrayTask)
 
 characters = string.ascii_letters + string.digits
 
 
+class ReslicingString(String):
+    __slots__ = ()
+
+    def decode(self, parser, result):
+        parser._current = None
+        length = self._length
+        if length >= 0:
+            b = parser._inbuffer
+            if len(b) >= length+2:
+                parser._inbuffer, chunk = b[length+2:], bytes(b[:length])
+                return chunk
+            else:
+                parser._current = self
+                return False
+
+
+class ReslicingParser(PyRedisParser):
+    '''The python parser before read offsets were introduced, it copies
+    the remaining buffer after each line and bulk string.
+    '''
+    def _get(self, next):
+        b = self._inbuffer
+        length = b.find(b'\r\n')
+        if length >= 0:
+            self._inbuffer, response = b[length+2:], bytes(b[:length])
+            rtype, response = response[:1], response[1:]
+            if rtype == b'-':
+                return self.responseError(response.decode('utf-8'))
+            elif rtype == b':':
+                return int(response)
+            elif rtype == b'+':
+                return response
+            elif rtype == b'$':
+                return ReslicingString(int(response), next).decode(self,
+                                                                   False)
+            elif rtype == b'*':
+                return ArrayTask(int(response), next).decode(self, False)
+            else:
+                self._inbuffer = bytearray()
+                raise self.protocolError('Protocol Error')
+        else:
+            return False
+
+
 class RedisPyParser(unittest.TestCase):
     __benchmark__ = True
     __number__ = 100
@@ -16,7 +63,7 @@ class RedisPyParser(unittest.TestCase):
               'normal': 100,
               'big': 1000,
               'huge': 10000}
-    redis_py_parser = True
+    parser_class = PyRedisParser
 
     @classmethod
     def setUpClass(cls):
@@ -26,7 +73,7 @@ class RedisPyParser(unittest.TestCase):
                     for s in range(nsize)]
         cls.data_bytes = [(''.join((choice(characters) for l in range(20)))
                            ).encode('utf-8') for s in range(nsize)]
-        cls.parser = redis_parser(cls.redis_py_parser)()
+        cls.parser = cls.parser_class(InvalidResponse, response_error)
         cls.chunk = cls.parser.multi_bulk(cls.data)
 
     def test_pack_command(self):
@@ -45,4 +92,53 @@ class RedisPyParser(unittest.TestCase):
 
 @unittest.skipUnless(HAS_C_EXTENSIONS, 'Requires C extensions')
 class RedisCParser(RedisPyParser):
-    redis_py_parser = False
+    parser_class = RedisParser
+
+
+class PipelinePyParser(unittest.TestCase):
+    '''Decode pipelines of 1k to 100k commands, as received by the
+    pulsar-ds server, either at once or in socket sized chunks
+    '''
+    __benchmark__ = True
+    __number__ = 1
+    _sizes = {'tiny': 1000,
+              'small': 5000,
+              'normal': 10000,
+              'big': 50000,
+              'huge': 100000}
+    parser_class = PyRedisParser
+    chunk_size = 65536
+
+    @classmethod
+    def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        parser = cls.parser_class(InvalidResponse, response_error)
+        commands = ((('set', 'key:%d' % i, 'x'*20), None)
+                    for i in range(cls.size))
+        cls.data = parser.pack_pipeline(commands)
+
+    def setUp(self):
+        self.parser = self.parser_class(InvalidResponse, response_error)
+
+    def test_decode_batch(self):
+        self.parser.feed(self.data)
+        self.assertEqual(len(self.parser.get_all()), self.size)
+
+    def test_decode_chunks(self):
+        data = self.data
+        size = self.chunk_size
+        parser = self.parser
+        commands = 0
+        for start in range(0, len(data), size):
+            parser.feed(data[start:start+size])
+            commands += len(parser.get_all())
+        self.assertEqual(commands, self.size)
+
+
+class PipelineReslicingParser(PipelinePyParser):
+    parser_class = ReslicingParser
+
+
+@unittest.skipUnless(HAS_C_EXTENSIONS, 'Requires C extensions')
+class PipelineCParser(PipelinePyParser):
+    parser_class = RedisParser
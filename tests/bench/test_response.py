@@ -0,0 +1,121 @@
+import socket
+import asyncio
+import unittest
+import tracemalloc
+from functools import partial
+
+from pulsar.asynclib.protocols import Connection, TcpServer
+from pulsar.apps.wsgi import WSGIServer, HttpServerResponse
+
+
+REQUEST = b'GET / HTTP/1.1\r\nHost: bench\r\n\r\n'
+REQUEST_CLOSE = b'GET / HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n'
+
+
+def hello(environ, start_response):
+    data = b'Hello World!\n'
+    start_response('200 OK', [('Content-Type', 'text/plain'),
+                              ('Content-Length', str(len(data)))])
+    return [data]
+
+
+class TestKeepAlive(unittest.TestCase):
+    '''Sequential requests on a keep-alive connection'''
+    __benchmark__ = True
+    __number__ = 10
+    _sizes = {'tiny': 50,
+              'small': 100,
+              'normal': 200,
+              'big': 500,
+              'huge': 1000}
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          '{0[rps]} requests/sec, {0[memory]} bytes '
+                          'allocated per request')
+
+    @classmethod
+    async def setUpClass(cls):
+        loop = asyncio.get_event_loop()
+        cfg = WSGIServer(callable=hello).cfg
+        cls.server = TcpServer(partial(Connection, HttpServerResponse),
+                               loop=loop, keep_alive=cfg.http_keep_alive,
+                               cfg=cfg)
+        cls.server.wsgi_callable = hello
+        await cls.server.start_serving(address=('127.0.0.1', 0))
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.clients = []
+        cls.memory = await cls.allocated()
+
+    @classmethod
+    async def tearDownClass(cls):
+        for client in cls.clients:
+            client.close()
+        await cls.server.close()
+
+    @classmethod
+    async def allocated(cls):
+        # memory held by the server for each request answered on a
+        # connection still open
+        clients = [await cls.connect() for _ in range(cls.size)]
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        for client in clients:
+            await cls.request(client, REQUEST)
+        memory = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+        cls.clients.extend(clients)
+        return memory // cls.size
+
+    @classmethod
+    async def connect(cls):
+        loop = asyncio.get_event_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        await loop.sock_connect(sock, cls.server.address)
+        return sock
+
+    @classmethod
+    async def request(cls, client, request, number=1):
+        loop = asyncio.get_event_loop()
+        await loop.sock_sendall(client, request * number)
+        data = b''
+        for _ in range(number):
+            while b'\r\n\r\n' not in data:
+                data += await loop.sock_recv(client, 4096)
+            headers, data = data.split(b'\r\n\r\n', 1)
+            length = int(headers.split(b'Content-Length: ')[1]
+                         .split(b'\r\n')[0])
+            while len(data) < length:
+                data += await loop.sock_recv(client, 4096)
+            data = data[length:]
+
+    def getSummary(self, info, repeat, t, t2):
+        info['rps'] = int(self.size * self.__number__ * repeat / t)
+        info['memory'] = self.memory
+        return info
+
+    async def test_requests(self):
+        client = await self.connect()
+        for _ in range(self.size):
+            await self.request(client, REQUEST)
+        client.close()
+
+
+class TestNoKeepAlive(TestKeepAlive):
+    '''Sequential requests, each on a new connection'''
+
+    async def test_requests(self):
+        for _ in range(self.size):
+            client = await self.connect()
+            await self.request(client, REQUEST_CLOSE)
+            client.close()
+
+
+class TestPipelined(TestKeepAlive):
+    '''Requests pipelined on a keep-alive connection'''
+
+    async def test_requests(self):
+        client = await self.connect()
+        await self.request(client, REQUEST, self.size)
+        client.close()
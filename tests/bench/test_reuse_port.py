@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+from pulsar.api import send, get_actor
+from pulsar.apps.test import dont_run_with_thread, run_test_server
+
+from examples.helloworld.manage import server
+
+
+@dont_run_with_thread
+class TestSharedSocket(unittest.TestCase):
+    '''Batches of concurrent requests, each on a new connection, served
+    by workers accepting on a shared socket'''
+    __benchmark__ = True
+    __number__ = 10
+    _sizes = {'tiny': 10,
+              'small': 25,
+              'normal': 50,
+              'big': 100,
+              'huge': 200}
+    reuse_port = False
+    workers = 2
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          'p99 {0[p99]} msecs, connections per worker '
+                          '{0[workers]}')
+
+    @classmethod
+    async def setUpClass(cls):
+        await run_test_server(cls, server, workers=cls.workers,
+                              reuse_port=cls.reuse_port)
+        cls.address = cls.app_cfg.addresses[0]
+        cls.latencies = []
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def accepted(self):
+        monitor = get_actor().get_actor(self.app_cfg.name)
+        accepted = []
+        for aid in monitor.managed_actors:
+            info = await send(aid, 'info')
+            server = info.get(self.app_cfg.name + 'server', {})
+            accepted.append(server.get('clients', {}).get('accepted', 0))
+        return sorted(accepted, reverse=True)
+
+    def getSummary(self, info, repeat, t, t2):
+        latencies = sorted(self.latencies)
+        p99 = latencies[int(0.99 * (len(latencies) - 1))]
+        info['p99'] = '%.3f' % (1000 * p99)
+        info['workers'] = self.workers_accepted
+        return info
+
+    async def request(self):
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        reader, writer = await asyncio.open_connection(*self.address)
+        writer.write(b'GET / HTTP/1.1\r\nHost: bench\r\n'
+                     b'Connection: close\r\n\r\n')
+        headers = await reader.readuntil(b'\r\n\r\n')
+        length = int(headers.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+        await reader.readexactly(length)
+        writer.close()
+        self.latencies.append(loop.time() - start)
+
+    async def test_connections(self):
+        size = self._sizes[self.cfg.size]
+        await asyncio.gather(*[self.request() for _ in range(size)])
+        self.__class__.workers_accepted = await self.accepted()
+
+
+@dont_run_with_thread
+class TestReusePort(TestSharedSocket):
+    '''Batches of concurrent requests, each on a new connection, served
+    by workers listening on their own SO_REUSEPORT socket'''
+    reuse_port = True
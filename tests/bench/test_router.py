@@ -0,0 +1,54 @@
+import unittest
+
+from pulsar.apps.wsgi import Router
+
+
+def handler(request):
+    pass
+
+
+class TestRouter(unittest.TestCase):
+    '''Resolve urls with variables, which defeat the resolve cache,
+    on a router with 500+ routes'''
+    __benchmark__ = True
+    __number__ = 100
+    _sizes = {'tiny': 100,
+              'small': 250,
+              'normal': 500,
+              'big': 1000,
+              'huge': 2500}
+
+    @classmethod
+    def setUpClass(cls):
+        size = cls._sizes[cls.cfg.size]
+        cls.router = Router('/')
+        for n in range(size // 5):
+            name = 'resource%d' % n
+            cls.router.add_child(Router(name, get=handler))
+            cls.router.add_child(Router('%s/<int:id>' % name, get=handler))
+            cls.router.add_child(Router('%s/<int:id>/<slug>' % name,
+                                        get=handler))
+            api = Router('api/%s/' % name)
+            api.add_child(Router('<id>', get=handler))
+            api.add_child(Router('<id>/<any(edit, delete):action>',
+                                 get=handler))
+            cls.router.add_child(api)
+        cls.last = 'resource%d' % (n // 2)
+        cls.count = 0
+
+    def urls(self):
+        self.__class__.count = self.count + 1
+        return ('/%s/%d' % (self.last, self.count),
+                '/%s/%d/slug' % (self.last, self.count),
+                '/api/%s/%d/edit' % (self.last, self.count),
+                '/api/%s/%d/missing' % (self.last, self.count))
+
+    def test_compiled(self):
+        router = self.router
+        for url in self.urls():
+            router.resolve(url, 'GET')
+
+    def test_recursive(self):
+        router = self.router
+        for url in self.urls():
+            router._resolve(url[1:], 'get')
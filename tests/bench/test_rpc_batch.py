@@ -0,0 +1,107 @@
+import asyncio
+import json
+import unittest
+import tracemalloc
+
+from pulsar.apps import rpc, wsgi
+from pulsar.apps.http import HttpWsgiClient
+from pulsar.utils.httpurl import JSON_CONTENT_TYPES
+
+from examples.calculator.manage import Site
+
+
+class TestRpcCalls(unittest.TestCase):
+    '''Concurrent JSON-RPC calls, one HTTP request each'''
+    __benchmark__ = True
+    __number__ = 10
+    _sizes = {'tiny': 10,
+              'small': 20,
+              'normal': 50,
+              'big': 100,
+              'huge': 200}
+    batch_size = None
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          '{0[rate]} calls per second')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.proxy = rpc.JsonProxy('http://127.0.0.1:8060/',
+                                  http=HttpWsgiClient(Site()),
+                                  batch_size=cls.batch_size)
+
+    def getSummary(self, info, repeat, t, t2):
+        info['rate'] = int(repeat * self.__number__ * self.size / t)
+        return info
+
+    async def test_calls(self):
+        add = self.proxy.calc.add
+        await asyncio.gather(*[add(n, n) for n in range(self.size)])
+
+
+class TestRpcAutoBatch(TestRpcCalls):
+    '''The same calls auto-batched by :class:`.JsonProxy`'''
+    batch_size = 100
+
+
+class Batch(rpc.JSONRPC):
+
+    async def rpc_echo(self, request, message):
+        await asyncio.sleep(0)
+        return message
+
+
+class TestServerBatch(unittest.TestCase):
+    '''A large JSON-RPC batch request executed with bounded concurrency
+    and streamed to the client'''
+    __benchmark__ = True
+    __number__ = 1
+    _sizes = {'tiny': 100,
+              'small': 1000,
+              'normal': 5000,
+              'big': 10000,
+              'huge': 20000}
+    max_concurrency = None
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          '{0[rate]} calls per second, peak memory '
+                          '{0[memory]} bytes per call')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        handler = Batch()
+        handler.max_concurrency = cls.max_concurrency or Batch.max_concurrency
+        router = wsgi.Router('/', post=handler,
+                             accept_content_types=JSON_CONTENT_TYPES)
+        app = wsgi.WsgiHandler(middleware=[wsgi.wait_for_body_middleware,
+                                           router])
+        cls.proxy = rpc.JsonProxy('http://127.0.0.1:8060/',
+                                  http=HttpWsgiClient(app),
+                                  full_response=True)
+        cls.data = json.dumps([{'jsonrpc': '2.0', 'id': n, 'method': 'echo',
+                                'params': ['message %d' % n]}
+                               for n in range(cls.size)]).encode('utf-8')
+        cls.memory = 0
+
+    def getSummary(self, info, repeat, t, t2):
+        info['rate'] = int(repeat * self.__number__ * self.size / t)
+        info['memory'] = self.memory
+        return info
+
+    async def test_batch(self):
+        # peak memory is traced in all runs, timings include the overhead
+        tracemalloc.start()
+        try:
+            response = await self.proxy._send(self.data)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert len(response.json()) == self.size
+        self.__class__.memory = max(self.memory, peak // self.size)
+
+
+class TestServerBatchUnbounded(TestServerBatch):
+    '''The same batch with all calls executed concurrently'''
+    max_concurrency = 10**6
@@ -0,0 +1,111 @@
+import os
+import socket
+import asyncio
+import tempfile
+import unittest
+
+from pulsar.api import send, create_future
+from pulsar.apps import wsgi
+from pulsar.apps.test import run_test_server
+from pulsar.apps.wsgi.wrappers import FileWrapper
+
+
+class ReadingFileWrapper:
+    '''Read the file on the event loop, as FileWrapper did before
+    sendfile and executor reads'''
+
+    def __init__(self, file, block):
+        self.file = file
+        self.block = block
+
+    def __iter__(self):
+        while True:
+            data = self.file.read(self.block)
+            if not data:
+                break
+            future = create_future()
+            future.set_result(data)
+            yield future
+
+    def close(self):
+        self.file.close()
+
+
+class FileServer:
+
+    def __init__(self, path, wrapper):
+        self.path = path
+        self.wrapper = wrapper
+
+    def __call__(self, environ, start_response):
+        request = wsgi.WsgiRequest(environ)
+        response = wsgi.file_response(request, self.path)
+        file = response.content.file
+        if self.wrapper == 'read':
+            response.content = ReadingFileWrapper(file, 2**20)
+        elif self.wrapper == 'executor':
+            response.content = iter(FileWrapper(file))
+        response.start(environ, start_response)
+        return response
+
+
+class TestSendfile(unittest.TestCase):
+    '''Download a file served with loop.sendfile'''
+    __benchmark__ = True
+    __number__ = 5
+    _sizes = {'tiny': 2**20,
+              'small': 2**22,
+              'normal': 2**24,
+              'big': 2**26,
+              'huge': 2**28}
+    app_cfg = None
+    concurrency = 'process'
+    wrapper = 'sendfile'
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        fd, cls.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as file:
+            block = os.urandom(2**16)
+            for _ in range(cls.size // len(block)):
+                file.write(block)
+        await run_test_server(
+            cls, wsgi.WSGIServer,
+            callable=FileServer(cls.path, cls.wrapper))
+        cls.sock = socket.create_connection(cls.app_cfg.addresses[0])
+        cls.sock.setblocking(False)
+        cls.buffer = memoryview(bytearray(2**20))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sock.close()
+        os.remove(cls.path)
+        if cls.app_cfg is not None:
+            return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def test_download(self):
+        loop = asyncio.get_event_loop()
+        await loop.sock_sendall(self.sock,
+                                b'GET / HTTP/1.1\r\nHost: bench\r\n\r\n')
+        received = 0
+        expected = None
+        while expected is None or received < expected:
+            n = await loop.sock_recv_into(self.sock, self.buffer)
+            self.assertTrue(n)
+            if expected is None:
+                data = bytes(self.buffer[:n])
+                self.assertTrue(data.startswith(b'HTTP/1.1 200'))
+                expected = data.index(b'\r\n\r\n') + 4 + self.size
+            received += n
+        self.assertEqual(received, expected)
+
+
+class TestExecutorReads(TestSendfile):
+    '''Download a file read in the executor, as served over TLS'''
+    wrapper = 'executor'
+
+
+class TestLoopReads(TestSendfile):
+    '''Download a file read on the event loop'''
+    wrapper = 'read'
@@ -0,0 +1,70 @@
+import io
+import os
+import time
+import unittest
+
+from pulsar.apps.ds.snapshot import write_snapshot, read_snapshot
+
+
+SIZES = {'tiny': 10000,
+         'big': 1000000,
+         'huge': 10000000}
+
+
+class TestSnapshot(unittest.TestCase):
+    '''Time taken to write and stream back snapshots of growing size, the
+    summary includes write and read times per repeat and the snapshot
+    size'''
+    __benchmark__ = True
+    __number__ = 1
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          'write {0[write]} secs, read {0[read]} secs, '
+                          '{0[size]} MB')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.value = bytearray(os.urandom(32))
+
+    def getInfo(self, info, delta, dt):
+        info['write'] = info.get('write', 0) + self._write
+        info['read'] = info.get('read', 0) + self._read
+        info['size'] = self._size
+
+    def getSummary(self, info, repeat, total_time, total_time2):
+        info['write'] = '%.3f' % (info['write'] / repeat)
+        info['read'] = '%.3f' % (info['read'] / repeat)
+        info['size'] = '%.1f' % (info['size'] / 1048576)
+        return info
+
+    def data(self, size):
+        value = self.value
+        keys = dict((('key:%d' % i).encode('utf-8'), value)
+                    for i in range(size))
+        return [(0, keys, {})]
+
+    def snapshot(self, size):
+        data = self.data(size)
+        file = io.BytesIO()
+        start = time.time()
+        write_snapshot(file, data, 0)
+        self._write = time.time() - start
+        file.seek(0)
+        start = time.time()
+        keys = 0
+        for _ in read_snapshot(file):
+            keys += 1
+        self._read = time.time() - start
+        self._size = len(file.getvalue())
+        self.assertEqual(keys, size)
+
+    def test_tiny(self):
+        self.snapshot(SIZES['tiny'])
+
+    def test_big(self):
+        self.snapshot(SIZES['big'])
+
+    @unittest.skipUnless(os.environ.get('PULSARDS_HUGE_SNAPSHOT'),
+                         'set PULSARDS_HUGE_SNAPSHOT to snapshot 10M keys')
+    def test_huge(self):
+        self.snapshot(SIZES['huge'])
@@ -0,0 +1,86 @@
+import os
+import socket
+import asyncio
+import shutil
+import tempfile
+import unittest
+from functools import partial
+
+from pulsar.api import ProtocolConsumer
+from pulsar.asynclib.protocols import Connection, TcpServer
+
+
+class Ping(ProtocolConsumer):
+    '''Reply ``+PONG`` to each ``PING`` line received'''
+    buffer = b''
+
+    def feed_data(self, data):
+        lines = (self.buffer + bytes(data)).split(b'\r\n')
+        self.buffer = lines.pop()
+        for _ in lines:
+            self.connection.write(b'+PONG\r\n')
+
+
+class TestTcpLoopback(unittest.TestCase):
+    '''Sequential PING round trips to a server listening on the loopback
+    interface'''
+    __benchmark__ = True
+    __number__ = 10
+    _sizes = {'tiny': 50,
+              'small': 100,
+              'normal': 200,
+              'big': 500,
+              'huge': 1000}
+
+    @classmethod
+    async def setUpClass(cls):
+        loop = asyncio.get_event_loop()
+        cls.server = TcpServer(partial(Connection, Ping), loop=loop)
+        await cls.server.start_serving(address=cls.bind())
+        cls.client = cls.connect(cls.server.address)
+        cls.client.setblocking(False)
+
+    @classmethod
+    async def tearDownClass(cls):
+        cls.client.close()
+        await cls.server.close()
+
+    @classmethod
+    def bind(cls):
+        return ('127.0.0.1', 0)
+
+    @classmethod
+    def connect(cls, address):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.connect(address)
+        return sock
+
+    async def test_ping(self):
+        loop = asyncio.get_event_loop()
+        client = self.client
+        for _ in range(self._sizes[self.cfg.size]):
+            await loop.sock_sendall(client, b'PING\r\n')
+            response = await loop.sock_recv(client, 64)
+            assert response == b'+PONG\r\n'
+
+
+class TestUnixSocket(TestTcpLoopback):
+    '''Sequential PING round trips to a server listening on a unix domain
+    socket'''
+
+    @classmethod
+    def bind(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        return os.path.join(cls.tmpdir, 'ping.sock')
+
+    @classmethod
+    def connect(cls, address):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+        return sock
+
+    @classmethod
+    async def tearDownClass(cls):
+        await super().tearDownClass()
+        shutil.rmtree(cls.tmpdir)
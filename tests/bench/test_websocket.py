@@ -1,40 +1,52 @@
-from random import randint
+import os
 import unittest
 
+from pulsar.api import ProtocolError
 from pulsar.utils.websocket import frame_parser
-
-
-def i2b(args):
-    return bytes(bytearray(args))
+from pulsar.utils.pylib.websocket import FrameParser
 
 
 class TestCParser(unittest.TestCase):
     __benchmark__ = True
-    __number__ = 10000
-    _sizes = {'tiny': 10,
-              'small': 200,
-              'normal': 2000,
-              'large': 10000,
-              'huge': 100000}
+    __number__ = 10
+    _sizes = {'tiny': 2**10,
+              'small': 2**16,
+              'normal': 2**20,
+              'big': 2**22,
+              'huge': 2**24}
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          '{0[mbs]} MB/s')
 
     @classmethod
     def setUpClass(cls):
-        size = cls.cfg.size
-        nsize = cls._sizes[size]
-        cls.data = i2b((randint(0, 255) for v in range(nsize)))
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.data = os.urandom(cls.size)
+        cls.frame = cls.parser(kind=1).encode(cls.data, opcode=2)
 
     def setUp(self):
         self.server = self.parser()
         self.client = self.parser(kind=1)
 
-    def parser(self, kind=0):
+    @classmethod
+    def parser(cls, kind=0):
         return frame_parser(kind=kind)
 
+    def getSummary(self, info, repeat, t, t2):
+        mbs = self.size * self.__number__ * repeat / t / 2**20
+        info['mbs'] = '%.1f' % mbs
+        return info
+
     def test_masked_encode(self):
         self.client.encode(self.data, opcode=2)
 
+    def test_masked_decode(self):
+        frame = self.server.decode(self.frame)
+        assert len(frame.body) == self.size
+
 
 class TestPyParser(TestCParser):
 
-    def parser(self, kind=0):
-        return frame_parser(pyparser=True, kind=kind)
+    @classmethod
+    def parser(cls, kind=0):
+        return FrameParser(13, kind, ProtocolError)
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import unittest
+
+from pulsar.apps.ws import WebSocketGroup, WebSocketProtocol, WS
+from pulsar.asynclib.protocols import Connection, TcpServer
+from pulsar.utils.websocket import frame_parser
+
+
+MESSAGE = json.dumps({'channel': 'prices',
+                      'event': 'update',
+                      'data': [{'symbol': 'SYM%d' % i, 'price': 10.5 + i}
+                               for i in range(10)]})
+
+
+class Transport(asyncio.Transport):
+    written = 0
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def write(self, data):
+        self.written += len(data)
+
+    def is_closing(self):
+        return False
+
+
+def websocket(loop):
+    connection = Connection(None, TcpServer(None, loop=loop))
+    connection.connection_made(Transport())
+    return WebSocketProtocol.create(None, WS(), frame_parser(), connection)
+
+
+class TestWriteLoop(unittest.TestCase):
+    '''Send a message to many websockets encoding a frame for each one'''
+    __benchmark__ = True
+    __number__ = 10
+    _sizes = {'tiny': 1000,
+              'small': 5000,
+              'normal': 10000,
+              'big': 20000,
+              'huge': 50000}
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          '{0[rate]} messages per second')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        loop = asyncio.get_event_loop()
+        cls.members = [websocket(loop) for _ in range(cls.size)]
+        cls.group = WebSocketGroup()
+        for ws in cls.members:
+            cls.group.add(ws)
+
+    def getSummary(self, info, repeat, t, t2):
+        info['rate'] = int(repeat * self.__number__ * self.size / t)
+        return info
+
+    def test_broadcast(self):
+        for ws in self.members:
+            ws.write(MESSAGE)
+
+
+class TestBroadcast(TestWriteLoop):
+    '''Send a message to many websockets with a :class:`.WebSocketGroup`'''
+
+    def test_broadcast(self):
+        self.group.broadcast(MESSAGE)
@@ -0,0 +1,84 @@
+import json
+import unittest
+from random import random
+
+from pulsar.apps.ws.extensions import PerMessageDeflate
+from pulsar.utils.websocket import frame_parser
+
+
+def feed(size):
+    return [json.dumps({'channel': 'prices',
+                        'event': 'update',
+                        'data': [{'symbol': 'SYM%d' % i, 'price': random(),
+                                  'volume': int(1000 * random())}
+                                 for i in range(10)]})
+            for _ in range(size)]
+
+
+class TestPlainFeed(unittest.TestCase):
+    '''Encode a feed of JSON messages on the server and decode them on
+    the client'''
+    __benchmark__ = True
+    __number__ = 10
+    _sizes = {'tiny': 100,
+              'small': 500,
+              'normal': 1000,
+              'big': 5000,
+              'huge': 10000}
+    extension = None
+    benchmark_template = ('{0[name]}: repeated {0[repeat]}(x{0[times]}) '
+                          'times, average {0[mean]} secs, stdev {0[std]}, '
+                          '{0[wire]} bytes per message on the wire, '
+                          'ratio {0[ratio]}')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.messages = feed(cls.size)
+        cls.raw = sum((len(m) for m in cls.messages))
+        cls.wire = 0
+
+    def startUp(self):
+        if self.extension:
+            server = frame_parser(extensions=[self.extension(server=True)])
+            client = frame_parser(kind=1,
+                                  extensions=[self.extension(server=False)])
+        else:
+            server = frame_parser()
+            client = frame_parser(kind=1)
+        self.server = server
+        self.client = client
+
+    def getSummary(self, info, repeat, t, t2):
+        info['wire'] = self.wire // self.size
+        info['ratio'] = '%.2f' % (self.wire / self.raw)
+        return info
+
+    def test_feed(self):
+        wire = 0
+        encode = self.server.encode
+        decode = self.client.decode
+        for message in self.messages:
+            chunk = encode(message)
+            wire += len(chunk)
+            decode(chunk)
+        self.__class__.wire = wire
+
+
+class TestDeflateFeed(TestPlainFeed):
+    '''The same feed compressed with permessage-deflate and context
+    takeover'''
+    extension = PerMessageDeflate
+
+
+class NoContextTakeover(PerMessageDeflate):
+
+    def __init__(self, server=True):
+        super().__init__(server=server, server_no_context_takeover=True,
+                         client_no_context_takeover=True)
+
+
+class TestDeflateNoContextTakeoverFeed(TestPlainFeed):
+    '''The same feed compressed with permessage-deflate without context
+    takeover'''
+    extension = NoContextTakeover
@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import socket
 import asyncio
 import unittest
@@ -273,6 +274,13 @@ class TestHttpClient(TestHttpClientBase, unittest.TestCase):
         # if 'content-encoding' in response.headers:
         self.assertTrue(response.headers['content-encoding'], 'gzip')
 
+    async def test_200_gzip_stream(self):
+        http = self._client
+        response = await http.get(self.httpbin('gzip'), stream=True)
+        self.assertEqual(response.status_code, 200)
+        content = json.loads((await response.raw.read()).decode('utf-8'))
+        self.assertTrue(content['gzipped'])
+
     async def test_post_json(self):
         http = self._client
         data = {'bla': 'foo',
@@ -703,6 +711,19 @@ class TestHttpClient(TestHttpClientBase, unittest.TestCase):
         self.assertEqual(response.status_code, 304)
         self.assertFalse('content-length' in response.headers)
 
+    async def test_media_file_content(self):
+        from examples.httpbin.manage import ASSET_DIR
+        http = self._client
+        response = await http.get(self.httpbin('media/favicon.ico'))
+        self.assertEqual(response.status_code, 200)
+        with open(os.path.join(ASSET_DIR, 'favicon.ico'), 'rb') as file:
+            self.assertEqual(response.content, file.read())
+        # keep alive connection can serve the next request
+        response = await http.get(self.httpbin('media/httpbin.css'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.content),
+                         int(response.headers['content-length']))
+
     @unittest.skipIf(platform.is_windows, 'windows test #291')
     async def test_http_get_timeit(self):
         N = 10
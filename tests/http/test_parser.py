@@ -187,3 +187,53 @@ class TestPythonHttpParser(unittest.TestCase):
         ))
         self.assertTrue(p.headers_complete)
         self.assertFalse(p.message_complete)
+
+    def test_pipelined_requests(self):
+        p = self.request()
+        rest = p.feed_data(b'GET /a HTTP/1.1\r\nHost: a\r\n\r\n'
+                           b'GET /b HTTP/1.1\r\n')
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.url, b'/a')
+        self.assertEqual(rest, b'GET /b HTTP/1.1\r\n')
+
+    def test_pipelined_content_length(self):
+        p = self.request()
+        rest = p.feed_data(b'POST /a HTTP/1.1\r\nContent-Length: 4\r\n\r\n'
+                           b'ciaoGET /b HTTP/1.1\r\n\r\n')
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.body, b'ciao')
+        self.assertEqual(rest, b'GET /b HTTP/1.1\r\n\r\n')
+
+    def test_pipelined_chunked_split(self):
+        p = self.request()
+        rest = p.feed_data(b'POST /a HTTP/1.1\r\n'
+                           b'Transfer-Encoding: chunked\r\n\r\n'
+                           b'4\r\nciao\r\n0\r\n')
+        self.assertFalse(p.message_complete)
+        self.assertEqual(rest, None)
+        rest = p.feed_data(b'\r')
+        self.assertFalse(p.message_complete)
+        rest = p.feed_data(b'\nGET /b HTTP/1.1\r\n\r\n')
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.body, b'ciao')
+        self.assertEqual(rest, b'GET /b HTTP/1.1\r\n\r\n')
+
+    def test_pipelined_chunked_trailers(self):
+        p = self.request()
+        p.feed_data(b'POST /a HTTP/1.1\r\n'
+                    b'Transfer-Encoding: chunked\r\n\r\n'
+                    b'4\r\nciao\r\n0\r\nExpires: never\r\n')
+        self.assertFalse(p.message_complete)
+        rest = p.feed_data(b'\r\nGET /b HTTP/1.1\r\n\r\n')
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.body, b'ciao')
+        self.assertEqual(rest, b'GET /b HTTP/1.1\r\n\r\n')
+
+    def test_pipelined_chunked(self):
+        p = self.request()
+        rest = p.feed_data(b'POST /a HTTP/1.1\r\n'
+                           b'Transfer-Encoding: chunked\r\n\r\n'
+                           b'4\r\nciao\r\n0\r\n\r\nGET /b HTTP/1.1\r\n\r\n')
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.body, b'ciao')
+        self.assertEqual(rest, b'GET /b HTTP/1.1\r\n\r\n')
@@ -0,0 +1,103 @@
+import zlib
+import asyncio
+import unittest
+
+from pulsar.api import EventHandler
+from pulsar.apps.http import stream
+from pulsar.apps.http.decompress import GzipDecompress, DeflateDecompress
+
+
+class Transport:
+
+    def __init__(self):
+        self.reading = True
+
+    def is_closing(self):
+        return False
+
+    def pause_reading(self):
+        self.reading = False
+
+    def resume_reading(self):
+        self.reading = True
+
+
+class Connection:
+
+    def __init__(self):
+        self.transport = Transport()
+
+
+class Response(EventHandler):
+    ONE_TIME_EVENTS = ('post_request',)
+
+    def __init__(self):
+        self._loop = asyncio.get_event_loop()
+        self.connection = Connection()
+
+
+class TestHttpStream(unittest.TestCase):
+
+    async def test_backpressure(self):
+        response = Response()
+        transport = response.connection.transport
+        raw = stream.HttpStream(response, limit=10)
+        raw.feed_data(b'a'*6)
+        self.assertTrue(transport.reading)
+        raw.feed_data(b'b'*6)
+        self.assertFalse(transport.reading)
+        raw.feed_data(b'c'*3)
+        iterator = raw.__aiter__()
+        self.assertEqual(await iterator.__anext__(), b'a'*6)
+        self.assertFalse(transport.reading)
+        self.assertEqual(await iterator.__anext__(), b'b'*6)
+        self.assertTrue(transport.reading)
+        self.assertEqual(await iterator.__anext__(), b'c'*3)
+        response.event('post_request').fire()
+        with self.assertRaises(StopAsyncIteration):
+            await iterator.__anext__()
+
+    async def test_wait_for_data(self):
+        response = Response()
+        raw = stream.HttpStream(response)
+        loop = response._loop
+        loop.call_soon(raw.feed_data, b'hello')
+        loop.call_soon(raw.feed_data, b' world')
+        loop.call_later(0.01, response.event('post_request').fire)
+        self.assertEqual(await raw.read(), b'hello world')
+        self.assertEqual(await raw.read(), b'')
+        self.assertRaises(stream.StreamConsumedError, raw.__aiter__)
+
+    def test_resume_when_done(self):
+        response = Response()
+        transport = response.connection.transport
+        raw = stream.HttpStream(response, limit=4)
+        raw.feed_data(b'hello')
+        self.assertFalse(transport.reading)
+        response.event('post_request').fire()
+        self.assertTrue(transport.reading)
+        self.assertEqual(list(raw), [b'hello'])
+
+
+class TestDecompress(unittest.TestCase):
+
+    def incremental(self, decoder, data):
+        chunks = [decoder.decompress(data[i:i+10])
+                  for i in range(0, len(data), 10)]
+        return b''.join(chunks) + decoder.flush()
+
+    def test_gzip(self):
+        body = b'pulsar '*100
+        compress = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        data = compress.compress(body) + compress.flush()
+        self.assertEqual(self.incremental(GzipDecompress(), data), body)
+        self.assertEqual(GzipDecompress()(data), body)
+
+    def test_deflate(self):
+        body = b'pulsar '*100
+        for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
+            compress = zlib.compressobj(9, zlib.DEFLATED, wbits)
+            data = compress.compress(body) + compress.flush()
+            self.assertEqual(self.incremental(DeflateDecompress(), data),
+                             body)
+            self.assertEqual(DeflateDecompress()(data), body)
@@ -0,0 +1,129 @@
+import os
+import asyncio
+import tempfile
+import unittest
+
+from pulsar.api import send
+from pulsar.apps.test import run_test_server, sequential
+from pulsar.apps.ds import PulsarDS, redis_parser
+
+from tests.stores.test_pulsards import StoreMixin
+
+
+def read_aof(filename):
+    parser = redis_parser()
+    with open(filename, 'rb') as file:
+        parser.feed(file.read())
+    requests = []
+    request = parser.get()
+    while request is not False:
+        requests.append(request)
+        request = parser.get()
+    return requests
+
+
+@sequential
+class TestAppendOnlyFile(StoreMixin, unittest.TestCase):
+    app_cfg = None
+    fsync = 'always'
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.aof = os.path.join(tempfile.mkdtemp(), 'pulsards.aof')
+        await cls.start_server()
+
+    @classmethod
+    async def start_server(cls):
+        await run_test_server(cls, PulsarDS,
+                              key_value_appendonly=True,
+                              key_value_appendfilename=cls.aof,
+                              key_value_appendfsync=cls.fsync)
+        uri = 'pulsar://%s:%s/3' % cls.app_cfg.addresses[0]
+        cls.store = cls.create_store(uri)
+        cls.client = cls.store.client()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def read_aof(self):
+        if self.fsync != 'always':
+            # wait for the buffer to be written
+            await asyncio.sleep(0.1)
+        return read_aof(self.aof)
+
+    async def test_log_write_commands(self):
+        c = self.client
+        key = self.randomkey()
+        self.assertEqual(await c.set(key, 'hello'), True)
+        self.assertEqual(await c.get(key), b'hello')
+        self.assertEqual(await c.rpush(key + 'l', 'a', 'b'), 2)
+        requests = await self.read_aof()
+        self.assertTrue([b'select', b'3'] in requests)
+        commands = [r[0] for r in requests if r[1].startswith(key.encode())]
+        self.assertEqual(commands[-2:], [b'set', b'rpush'])
+        # read commands are not logged
+        self.assertFalse(b'get' in commands)
+
+    async def test_expire_logged_as_pexpireat(self):
+        c = self.client
+        key = self.randomkey()
+        self.assertEqual(await c.set(key, 'hello', ex=100), True)
+        self.assertEqual(await c.expire(key + 'x', 100), False)
+        requests = [r for r in await self.read_aof()
+                    if r[1] in (key.encode(), (key + 'x').encode())]
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0], [b'set', key.encode(), b'hello'])
+        self.assertEqual(requests[1][0], b'pexpireat')
+
+    async def test_blocked_pop_logged_after_push(self):
+        c = self.client
+        key = self.randomkey()
+        bkey = key.encode('utf-8')
+        pop = asyncio.ensure_future(c.blpop(key, 5))
+        await asyncio.sleep(0.1)
+        self.assertEqual(await c.rpush(key, 'x'), 1)
+        self.assertEqual(await pop, (bkey, b'x'))
+        commands = [r[0] for r in await self.read_aof() if r[1] == bkey]
+        self.assertEqual(commands, [b'rpush', b'lpop'])
+        # replay the log
+        await send('arbiter', 'kill_actor', self.app_cfg.name)
+        await self.start_server()
+        self.assertEqual(await self.client.exists(key), False)
+
+    async def test_bgrewriteaof_and_reload(self):
+        c = self.client
+        key = self.randomkey()
+        for i in range(100):
+            await c.rpush(key, i)
+        await c.hmset(key + 'h', {'a': 1, 'b': 2})
+        await c.zadd(key + 'z', a=1, b=2.5)
+        await c.sadd(key + 's', 'a', 'b')
+        await c.set(key + 'e', 'expire', ex=100)
+        size = os.path.getsize(self.aof)
+        result = await c.execute('bgrewriteaof')
+        self.assertTrue(result)
+        await c.set(key + 'n', 'during rewrite')
+        for _ in range(50):
+            info = await c.info()
+            if not info['aof_rewrite_in_progress']:
+                break
+            await asyncio.sleep(0.1)
+        self.assertEqual(info['aof_rewrite_in_progress'], 0)
+        self.assertTrue(os.path.getsize(self.aof) < size)
+        # restart the server and check data has been reloaded
+        await send('arbiter', 'kill_actor', self.app_cfg.name)
+        await self.start_server()
+        c = self.client
+        self.assertEqual(await c.llen(key), 100)
+        self.assertEqual(await c.hgetall(key + 'h'), {b'a': b'1', b'b': b'2'})
+        self.assertEqual(await c.zscore(key + 'z', 'b'), 2.5)
+        self.assertEqual(await c.scard(key + 's'), 2)
+        self.assertEqual(await c.get(key + 'n'), b'during rewrite')
+        ttl = await c.ttl(key + 'e')
+        self.assertTrue(ttl > 90 and ttl <= 100)
+
+
+class TestAppendOnlyFileEverySec(TestAppendOnlyFile):
+    fsync = 'everysec'
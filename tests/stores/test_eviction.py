@@ -0,0 +1,134 @@
+import unittest
+
+from pulsar.api import send
+from pulsar.apps.test import run_test_server, sequential
+from pulsar.apps.ds import PulsarDS, ResponseError
+
+from tests.stores.test_pulsards import StoreMixin, Listener, StringProtocol
+
+
+class EvictionMixin(StoreMixin):
+    app_cfg = None
+    policy = 'allkeys-lru'
+    maxmemory = '50kb'
+
+    @classmethod
+    async def setUpClass(cls):
+        await run_test_server(cls, PulsarDS,
+                              key_value_maxmemory=cls.maxmemory,
+                              key_value_maxmemory_policy=cls.policy)
+        cls.store = cls.create_store(
+            'pulsar://%s:%s/4' % cls.app_cfg.addresses[0])
+        cls.client = cls.store.client()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def fill(self, prefix, n=500, **kw):
+        value = 'x'*100
+        for i in range(n):
+            await self.client.set('%s:%s' % (prefix, i), value, **kw)
+
+    async def memory_info(self):
+        info = await self.client.info()
+        self.assertEqual(info['maxmemory_policy'], self.policy)
+        self.assertEqual(info['maxmemory'], 50*1024)
+        return info
+
+
+@sequential
+class TestAllKeysLru(EvictionMixin, unittest.TestCase):
+
+    async def test_evict(self):
+        c = self.client
+        await c.set('lru:hot', 'hot')
+        for n in range(50):
+            await self.fill('lru%s' % n, 10)
+            # keep the hot key recently used
+            self.assertEqual(await c.get('lru:hot'), b'hot')
+        info = await self.memory_info()
+        self.assertTrue(info['evicted_keys'] > 0)
+        # eviction happens before a command is executed
+        self.assertTrue(info['used_memory'] < info['maxmemory'] + 1024)
+        self.assertTrue(await c.dbsize() < 500)
+
+    async def test_evicted_event(self):
+        pubsub = self.client.pubsub(protocol=StringProtocol())
+        listener = Listener()
+        pubsub.add_client(listener)
+        await pubsub.subscribe('__keyevent@4__:evicted')
+        await self.fill('event', 500)
+        channel, key = await listener.get()
+        self.assertEqual(channel, '__keyevent@4__:evicted')
+        self.assertTrue(key)
+        pubsub.unsubscribe()
+
+
+class TestAllKeysLfu(TestAllKeysLru):
+    policy = 'allkeys-lfu'
+
+
+@sequential
+class TestVolatileTtl(EvictionMixin, unittest.TestCase):
+    policy = 'volatile-ttl'
+
+    async def test_evict_volatile_only(self):
+        c = self.client
+        await c.set('ttl:persistent', 'persistent')
+        await self.fill('ttl', 500, ex=1000)
+        info = await self.memory_info()
+        self.assertTrue(info['evicted_keys'] > 0)
+        self.assertEqual(await c.get('ttl:persistent'), b'persistent')
+        # the keys with the longest time to live are still available
+        self.assertEqual(await c.exists('ttl:499'), True)
+        self.assertEqual(await c.exists('ttl:0'), False)
+
+
+@sequential
+class TestNoEviction(EvictionMixin, unittest.TestCase):
+    policy = 'noeviction'
+
+    async def test_out_of_memory(self):
+        c = self.client
+        with self.assertRaises(ResponseError):
+            await self.fill('oom', 500)
+        info = await self.memory_info()
+        self.assertEqual(info['evicted_keys'], 0)
+        # commands which free memory are still allowed
+        self.assertEqual(await c.delete('oom:0'), 1)
+
+
+@sequential
+class TestRemovedKeys(EvictionMixin, unittest.TestCase):
+
+    async def test_expireat_past(self):
+        c = self.client
+        await c.flushdb()
+        used = (await self.memory_info())['used_memory']
+        for n in range(3):
+            key = 'past:%s' % n
+            await c.set(key, 'x'*100)
+            self.assertEqual(await c.expireat(key, 1), True)
+            self.assertEqual(await c.exists(key), False)
+        info = await self.memory_info()
+        self.assertEqual(info['used_memory'], used)
+        self.assertEqual(await c.scan(match='past:*', count=1000), (0, []))
+        await self.fill('past', 500)
+        info = await self.memory_info()
+        self.assertTrue(info['evicted_keys'] > 0)
+        # only existing keys are evicted
+        self.assertEqual(info['evicted_keys'] + await c.dbsize(), 500)
+
+    async def test_rename(self):
+        c = self.client
+        await c.flushdb()
+        used = (await self.memory_info())['used_memory']
+        await c.set('rename:a', 'x'*100)
+        await c.rename('rename:a', 'rename:b')
+        self.assertEqual(await c.scan(match='rename:*', count=1000),
+                         (0, [b'rename:b']))
+        await c.delete('rename:b')
+        info = await self.memory_info()
+        self.assertEqual(info['used_memory'], used)
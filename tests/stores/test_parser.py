@@ -130,6 +130,31 @@ class TestParser(unittest.TestCase):
         self.assertEqual(res2[0], b'100')
         self.assertEqual(res2[1], result[1])
 
+    def test_get_all(self):
+        p = redis_parser()
+        commands = [[b'set', str(i).encode('utf-8'), b'x'*i]
+                    for i in range(100)]
+        data = p.pack_pipeline(((c, None) for c in commands))
+        p.feed(data[:-3])
+        self.assertEqual(p.get_all(), commands[:-1])
+        self.assertTrue(p.buffer())
+        self.assertEqual(p.get_all(), [])
+        p.feed(data[-3:])
+        self.assertEqual(p.get_all(), commands[-1:])
+        self.assertEqual(p.buffer(), b'')
+
+    def test_buffer_after_partial_get(self):
+        p = redis_parser()
+        p.feed(b'+OK\r\n$5\r\nhel')
+        self.assertEqual(p.get(), b'OK')
+        self.assertEqual(p.get(), False)
+        self.assertEqual(p.buffer(), b'hel')
+        p.feed(b'lo\r\n:3\r\n')
+        self.assertEqual(p.get(), b'hello')
+        self.assertEqual(p.buffer(), b':3\r\n')
+        self.assertEqual(p.get(), 3)
+        self.assertEqual(p.buffer(), b'')
+
     # CLIENT ENCODERS
     def test_encode_commands(self):
         p = redis_parser()
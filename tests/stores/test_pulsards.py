@@ -1,4 +1,7 @@
+import os
 import binascii
+import shutil
+import tempfile
 import time
 import json
 import unittest
@@ -136,6 +139,28 @@ class RedisCommands(StoreMixin):
         eq(await c.ttl(key), -1)
         eq(await c.persist(key), False)
 
+    async def test_expire_lazy(self):
+        key = self.randomkey()
+        c = self.client
+        eq = self.assertEqual
+        eq(await c.set(key, 1, px=1000), True)
+        eq(await c.pexpire(key, 100), True)
+        await asyncio.sleep(0.15)
+        eq(await c.exists(key), False)
+        eq(await c.ttl(key), -2)
+        eq(await c.get(key), None)
+
+    async def test_active_expire(self):
+        key = self.randomkey()
+        c = self.client
+        info = await c.info()
+        expired = info['expired_keys']
+        for i in range(10):
+            await c.set('%s%s' % (key, i), i, px=50)
+        await asyncio.sleep(1.5)
+        info = await c.info()
+        self.assertTrue(info['expired_keys'] >= expired + 10)
+
     async def test_keys(self):
         key = self.randomkey()
         keya = '%s_a' % key
@@ -152,6 +177,48 @@ class RedisCommands(StoreMixin):
         self.assertEqual(set(k1), keys_with_underscores)
         self.assertEqual(set(k2), keys)
 
+    async def scan_all(self, method, *args, **kw):
+        cursor, result = await method(*args, **kw)
+        values = list(result)
+        while cursor:
+            cursor, result = await method(*args, cursor=cursor, **kw)
+            values.extend(result)
+        return values
+
+    async def test_scan(self):
+        key = self.randomkey()
+        c = self.client
+        keys = set(('%s:%s' % (key, i)).encode('utf-8') for i in range(50))
+        for k in keys:
+            await c.set(k, 1)
+        await c.rpush(key + ':list', 1)
+        match = '%s:*' % key
+        self.assertEqual(set(await self.scan_all(c.scan, match=match,
+                                                 count=7, type='string')),
+                         keys)
+        self.assertEqual(await self.scan_all(c.scan, match=match,
+                                             type='list'),
+                         [(key + ':list').encode('utf-8')])
+        # keys present for the whole iteration are always returned
+        cursor, seen = await c.scan(match=match, count=10)
+        seen = set(seen)
+        removed = list(keys - seen)[:10]
+        await c.delete(*removed)
+        for i in range(20):
+            await c.set('%s:new%s' % (key, i), 1)
+        while cursor:
+            cursor, result = await c.scan(cursor, match=match, count=10)
+            seen.update(result)
+        self.assertTrue(keys.difference(removed) <= seen)
+        # keys removed by expire are not returned
+        expired = '%s:expired' % key
+        await c.set(expired, 1)
+        await c.expireat(expired, 1)
+        self.assertFalse(expired.encode('utf-8') in
+                         await self.scan_all(c.scan, match=match))
+        await self.wait(ResponseError, c.scan, 'bla')
+        await self.wait(ResponseError, c.scan, 0, count=0)
+
     async def test_move(self):
         key = self.randomkey()
         c = self.client
@@ -588,6 +655,23 @@ class RedisCommands(StoreMixin):
         await self.wait(ResponseError, c.hlen, key)
         await self.wait(ResponseError, c.hmget, key, 'f1', 'f2')
 
+    async def test_hscan(self):
+        key = self.randomkey()
+        c = self.client
+        data = dict((('f%s' % i).encode('utf-8'), str(i).encode('utf-8'))
+                    for i in range(100))
+        await c.hmset(key, data)
+        result = {}
+        cursor = None
+        while cursor != 0:
+            cursor, values = await c.hscan(key, cursor or 0, count=10)
+            result.update(values)
+        self.assertEqual(result, data)
+        cursor, values = await c.hscan(key, match='f1*', count=1000)
+        self.assertEqual(cursor, 0)
+        self.assertEqual(len(values), 11)
+        self.assertEqual(await c.hscan(key + 'x'), (0, {}))
+
     async def test_hsetnx(self):
         key = self.randomkey()
         eq = self.assertEqual
@@ -900,6 +984,27 @@ class RedisCommands(StoreMixin):
         eq(await c.sismember(key, 3), True)
         eq(await c.sismember(key, 4), False)
 
+    async def test_sscan(self):
+        key = self.randomkey()
+        c = self.client
+        members = set(('m%s' % i).encode('utf-8') for i in range(100))
+        await c.sadd(key, *members)
+        cursor, first = await c.sscan(key, count=10)
+        self.assertTrue(cursor)
+        self.assertTrue(len(first) >= 10)
+        await c.srem(key, *list(members - set(first))[:10])
+        await c.sadd(key, *('n%s' % i for i in range(50)))
+        seen = set(first)
+        while cursor:
+            cursor, result = await c.sscan(key, cursor, count=10)
+            seen.update(result)
+        self.assertTrue(len(members & seen) >= 90)
+        self.assertEqual(set(await self.scan_all(c.sscan, key,
+                                                 match='m*')),
+                         set(await c.smembers(key)) & members)
+        await c.set(key + 'x', 'foo')
+        await self.wait(ResponseError, c.sscan, key + 'x')
+
     async def test_smove(self):
         key = self.randomkey()
         key2 = key + '2'
@@ -1060,6 +1165,15 @@ class RedisCommands(StoreMixin):
         eq(await c.zrange(des, 0, -1, withscores=True),
            Zset(((20.0, b'a3'), (23.0, b'a1'))))
 
+    async def test_zscan(self):
+        key = self.randomkey()
+        c = self.client
+        data = dict((('m%s' % i), i + 0.5) for i in range(30))
+        await c.zadd(key, **data)
+        result = await self.scan_all(c.zscan, key, count=4)
+        self.assertEqual(dict(((m.decode('utf-8'), s) for m, s in result)),
+                         data)
+
     async def test_zrange(self):
         key = self.randomkey()
         eq = self.assertEqual
@@ -1270,3 +1384,61 @@ class TestPulsarStore(RedisCommands, unittest.TestCase):
         self.assertTrue(store.dsn.startswith('%s/10?' % self.pulsards_uri))
         self.assertEqual(store.encoding, 'utf-8')
         self.assertTrue(repr(store))
+
+
+class TestUnixPulsarStore(TestPulsarStore):
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(cls.tmpdir, 'pulsards.sock')
+        await run_test_server(cls, PulsarDS, bind='unix:%s' % path,
+                              redis_py_parser=cls.redis_py_parser)
+        cls.pulsards_uri = 'pulsar://unix:%s' % cls.app_cfg.addresses[0]
+        cls.store = cls.create_store('%s?database=9' % cls.pulsards_uri)
+        cls.client = cls.store.client()
+
+    @classmethod
+    async def tearDownClass(cls):
+        await super().tearDownClass()
+        shutil.rmtree(cls.tmpdir)
+
+    def test_store_methods(self):
+        store = self.create_store('%s?database=8' % self.pulsards_uri)
+        self.assertEqual(store._host, self.app_cfg.addresses[0])
+        self.assertEqual(store.database, 8)
+        store.database = 10
+        self.assertEqual(store.database, 10)
+        self.assertTrue(store.dsn.startswith(self.pulsards_uri))
+        self.assertTrue('database=10' in store.dsn)
+
+
+class TestMultiplexedPulsarStore(TestPulsarStore):
+
+    @classmethod
+    def create_store(cls, address, **kw):
+        return super().create_store(address, multiplex=True, **kw)
+
+    def test_multiplexed_dsn(self):
+        self.assertTrue(self.store._multiplexer)
+        self.assertEqual(self.store.urlparams['multiplex'], 'true')
+
+    async def test_fan_out(self):
+        key = self.randomkey()
+        c = self.client
+        results = await asyncio.gather(*[c.incr(key) for _ in range(500)])
+        self.assertEqual(sorted(results), list(range(1, 501)))
+        # all commands share the multiplexed connection
+        self.assertEqual(self.store.pool.in_use, 0)
+
+    async def test_errors_and_pipelines(self):
+        key = self.randomkey()
+        c = self.client
+        pipe = c.pipeline()
+        pipe.set(key, 'foo')
+        pipe.get(key)
+        results = await asyncio.gather(pipe.commit(), c.get(key + 'x'),
+                                       c.incr(key), return_exceptions=True)
+        self.assertEqual(results[0], [True, b'foo'])
+        self.assertEqual(results[1], None)
+        self.assertIsInstance(results[2], ResponseError)
@@ -0,0 +1,126 @@
+import io
+import os
+import asyncio
+import tempfile
+import unittest
+
+from pulsar.api import send
+from pulsar.apps.test import run_test_server, sequential
+from pulsar.apps.ds import PulsarDS
+from pulsar.apps.ds.server import Timer
+from pulsar.apps.ds.snapshot import (write_snapshot, read_snapshot,
+                                     SnapshotError)
+from pulsar.utils.structures import Dict, Zset, Deque
+
+from tests.stores.test_pulsards import StoreMixin
+
+
+class TestSnapshotFormat(unittest.TestCase):
+
+    def snapshot(self):
+        zset = Zset()
+        zset.add(1.5, b'a')
+        data = [(0, {b'a': bytearray(b'foo'), b'b': {b'x', b'y'},
+                     b'c': Dict({b'f': b'v'}), b'd': zset,
+                     b'e': Deque((b'1', b'2'))},
+                 {b'f': Timer(bytearray(b'bla'), 10.5)}),
+                (3, {b'a': bytearray(b'bar')}, {})]
+        file = io.BytesIO()
+        self.assertEqual(write_snapshot(file, data, 100), 7)
+        return file.getvalue()
+
+    def test_roundtrip(self):
+        records = list(read_snapshot(io.BytesIO(self.snapshot())))
+        self.assertEqual(len(records), 7)
+        keys = dict(((num, key), (value, expire))
+                    for num, key, value, expire in records)
+        self.assertEqual(keys[(0, b'a')], (bytearray(b'foo'), None))
+        self.assertEqual(keys[(0, b'b')][0], {b'x', b'y'})
+        self.assertEqual(keys[(0, b'c')][0][b'f'], b'v')
+        self.assertEqual(keys[(0, b'd')][0].score(b'a'), 1.5)
+        self.assertEqual(list(keys[(0, b'e')][0]), [b'1', b'2'])
+        self.assertEqual(keys[(0, b'f')], (bytearray(b'bla'), 110500))
+        self.assertEqual(keys[(3, b'a')], (bytearray(b'bar'), None))
+
+    def test_checksum(self):
+        data = bytearray(self.snapshot())
+        data[30] ^= 0xff
+        with self.assertRaises(SnapshotError):
+            list(read_snapshot(io.BytesIO(bytes(data))))
+
+    def test_truncated(self):
+        data = self.snapshot()[:-10]
+        with self.assertRaises(SnapshotError):
+            list(read_snapshot(io.BytesIO(data)))
+
+    def test_bad_magic(self):
+        with self.assertRaises(SnapshotError):
+            list(read_snapshot(io.BytesIO(b'REDIS0006')))
+
+
+@sequential
+class TestSnapshot(StoreMixin, unittest.TestCase):
+    app_cfg = None
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.filename = os.path.join(tempfile.mkdtemp(), 'pulsards.rdb')
+        await cls.start_server()
+
+    @classmethod
+    async def start_server(cls):
+        await run_test_server(cls, PulsarDS,
+                              key_value_save=[(900, 1)],
+                              key_value_filename=cls.filename)
+        uri = 'pulsar://%s:%s/6' % cls.app_cfg.addresses[0]
+        cls.store = cls.create_store(uri)
+        cls.client = cls.store.client()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.app_cfg is not None:
+            return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def restart(self):
+        await send('arbiter', 'kill_actor', self.app_cfg.name)
+        await self.start_server()
+        return self.client
+
+    async def populate(self, key):
+        c = self.client
+        await c.set(key, 'hello')
+        await c.rpush(key + 'l', *range(100))
+        await c.hmset(key + 'h', {'a': 1, 'b': 2})
+        await c.zadd(key + 'z', a=1, b=2.5)
+        await c.sadd(key + 's', 'a', 'b')
+        await c.set(key + 'e', 'expire', ex=100)
+
+    async def check(self, c, key):
+        self.assertEqual(await c.get(key), b'hello')
+        self.assertEqual(await c.llen(key + 'l'), 100)
+        self.assertEqual(await c.hgetall(key + 'h'), {b'a': b'1', b'b': b'2'})
+        self.assertEqual(await c.zscore(key + 'z', 'b'), 2.5)
+        self.assertEqual(await c.scard(key + 's'), 2)
+        ttl = await c.ttl(key + 'e')
+        self.assertTrue(ttl > 90 and ttl <= 100)
+
+    async def test_save(self):
+        key = self.randomkey()
+        await self.populate(key)
+        self.assertEqual(await self.client.execute('save'), True)
+        c = await self.restart()
+        await self.check(c, key)
+
+    async def test_bgsave(self):
+        key = self.randomkey()
+        await self.populate(key)
+        self.assertEqual(await self.client.execute('bgsave'), True)
+        for _ in range(50):
+            info = await self.client.info()
+            if not info['rdb_bgsave_in_progress']:
+                break
+            await asyncio.sleep(0.1)
+        self.assertEqual(info['rdb_bgsave_in_progress'], 0)
+        self.assertEqual(info['rdb_changes_since_last_save'], 0)
+        c = await self.restart()
+        await self.check(c, key)
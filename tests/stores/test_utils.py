@@ -2,6 +2,7 @@ import re
 import unittest
 
 from pulsar.apps.ds import redis_to_py_pattern
+from pulsar.apps.ds.server import PatternIndex, literal_prefix
 
 
 class TestUtils(unittest.TestCase):
@@ -33,3 +34,33 @@ class TestUtils(unittest.TestCase):
         self.match(c, 'hello')
         self.match(c, 'hallo')
         self.not_match(c, 'hollo')
+
+    def test_literal_prefix(self):
+        self.assertEqual(literal_prefix(b'news.*'), b'news.')
+        self.assertEqual(literal_prefix(b'h?llo'), b'h')
+        self.assertEqual(literal_prefix(b'[ab]c'), b'')
+        self.assertEqual(literal_prefix(b'a\\*b'), b'a')
+        self.assertEqual(literal_prefix(b'plain'), b'plain')
+
+    def test_pattern_index(self):
+        index = PatternIndex()
+        for pattern in (b'news.*', b'news.art.*', b'*.art.*', b'h?llo',
+                        b'hello'):
+            index.add(pattern).clients.add(pattern)
+        self.assertEqual(len(index), 5)
+        self.assertTrue(index.add(b'hello') is index.get(b'hello'))
+
+        def matches(channel):
+            return sorted(c for p in index.match(channel) for c in p.clients)
+
+        self.assertEqual(matches(b'news.art.figurative'),
+                         [b'*.art.*', b'news.*', b'news.art.*'])
+        self.assertEqual(matches(b'news.music'), [b'news.*'])
+        self.assertEqual(matches(b'hello'), [b'h?llo', b'hello'])
+        self.assertEqual(matches(b'hallo'), [b'h?llo'])
+        self.assertEqual(matches(b'new'), [])
+        index.remove(b'news.*')
+        index.remove(b'*.art.*')
+        self.assertFalse(b'news.*' in index)
+        self.assertEqual(matches(b'news.art.figurative'), [b'news.art.*'])
+        self.assertEqual(len(index), 3)
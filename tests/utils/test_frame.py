@@ -4,6 +4,7 @@ import unittest
 
 from pulsar.api import ProtocolError
 from pulsar.utils.websocket import frame_parser, parse_close
+from pulsar.utils.pylib.websocket import websocket_mask
 
 
 def i2b(args):
@@ -186,5 +187,49 @@ class FrameTest(unittest.TestCase):
         chunk = s.encode('Hello')
         self.assertEqual(s.decode(chunk).body, 'Hello')
 
+    def test_websocket_mask(self):
+        key = i2b((0x37, 0xfa, 0x21, 0x3d))
+        for size in (0, 1, 3, 4, 7, 8, 9, 255):
+            data = self.bdata[:size]
+            masked = websocket_mask(data, key)
+            self.assertEqual(masked, i2b((b ^ key[i % 4]
+                                          for i, b in enumerate(data))))
+            self.assertEqual(websocket_mask(masked, key), data)
+        #
+        # several blocks and a partial one
+        data = self.large_bdata * 2 + self.bdata[:7]
+        masked = websocket_mask(data, key)
+        self.assertEqual(len(masked), len(data))
+        self.assertEqual(masked[-7:], websocket_mask(data[-7:], key))
+        self.assertEqual(websocket_mask(masked, key), data)
+
+    def test_many_frames(self):
+        s = self.parser()
+        c = self.parser(kind=1)
+        chunk = b''.join((c.encode(self.bdata[:n], opcode=2)
+                          for n in range(1, 200)))
+        frames = [s.decode(chunk)]
+        frame = s.decode()
+        while frame:
+            frames.append(frame)
+            frame = s.decode()
+        self.assertEqual(len(frames), 199)
+        for n, frame in enumerate(frames, 1):
+            self.assertEqual(frame.body, self.bdata[:n])
+
+    def test_partial_masked(self):
+        s = self.parser()
+        c = self.parser(kind=1)
+        chunk = c.encode(self.large_bdata, opcode=2) + c.encode('Hello')
+        frames = []
+        for start in range(0, len(chunk), 1000):
+            frame = s.decode(chunk[start:start+1000])
+            while frame:
+                frames.append(frame)
+                frame = s.decode()
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[0].body, self.large_bdata)
+        self.assertEqual(frames[1].body, 'Hello')
+
     def test_parse_close(self):
         self.assertRaises(ProtocolError, parse_close, b'o')
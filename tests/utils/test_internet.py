@@ -3,7 +3,8 @@ import unittest
 from unittest import mock
 
 from pulsar.utils.internet import (parse_address, parse_connection_string,
-                                   close_socket, format_address)
+                                   close_socket, format_address,
+                                   reuse_port_sockets)
 
 
 class TestParseAddress(unittest.TestCase):
@@ -54,6 +55,13 @@ class TestParseConnectionString(unittest.TestCase):
         self.assertEqual(address, 'bla.foo')
         self.assertEqual(params, {})
 
+    def test_parse_unix_absolute(self):
+        scheme, address, params = parse_connection_string(
+            'redis://unix:/tmp/redis.sock?db=3')
+        self.assertEqual(scheme, 'redis')
+        self.assertEqual(address, '/tmp/redis.sock')
+        self.assertEqual(params, {'db': '3'})
+
     def test_parse_tcp_with_scheme_and_params(self):
         scheme, address, params = parse_connection_string('redis://:6439?db=3')
         self.assertEqual(scheme, 'redis')
@@ -91,3 +99,18 @@ class TestMisc(unittest.TestCase):
         self.assertRaises(ValueError, format_address, (1, 2, 3))
         self.assertRaises(ValueError, format_address, (1, 2, 3, 4, 5))
         self.assertEqual(format_address(1), '1')
+
+
+@unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'), 'Requires SO_REUSEPORT')
+class TestReusePortSockets(unittest.TestCase):
+
+    def test_bind_twice(self):
+        sockets = reuse_port_sockets(('127.0.0.1', 0))
+        self.assertEqual(len(sockets), 1)
+        address = sockets[0].getsockname()
+        self.assertNotEqual(address[1], 0)
+        others = reuse_port_sockets(address)
+        self.assertEqual(others[0].getsockname(), address)
+        for sock in sockets + others:
+            sock.listen(5)
+            sock.close()
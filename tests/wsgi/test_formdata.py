@@ -0,0 +1,204 @@
+'''Tests multipart/form-data parsing in pulsar.apps.wsgi'''
+import unittest
+from io import BytesIO
+from unittest import mock
+
+from pulsar.api import HttpException
+from pulsar.apps.test import test_wsgi_request
+from pulsar.apps.wsgi.formdata import (parse_form_data, HttpBodyReader,
+                                       BodyReaderStats)
+from pulsar.utils.httpurl import encode_multipart_formdata
+
+
+BOUNDARY = 'a94f8bc3e2'
+
+
+class TestMultipart(unittest.TestCase):
+    fields = (('name', 'pulsar'),
+              ('numero', '1'),
+              ('numero', '2'),
+              ('file', ('data.bin', bytes(range(256)) * 8)))
+
+    async def request(self, body, chunk=None, **kw):
+        request = await test_wsgi_request(method='post')
+        environ = request.environ
+        environ['CONTENT_TYPE'] = ('multipart/form-data; boundary=%s' %
+                                   BOUNDARY)
+        environ['REQUEST_METHOD'] = 'POST'
+        if chunk:
+            reader = HttpBodyReader(mock.MagicMock(), 2**16, environ)
+            for i in range(0, len(body), chunk):
+                reader.feed_data(body[i:i+chunk])
+            reader.feed_eof()
+            environ['wsgi.input'] = reader
+        else:
+            environ['wsgi.input'] = BytesIO(body)
+        return request
+
+    def body(self, fields=None):
+        body, _ = encode_multipart_formdata(fields or self.fields,
+                                            boundary=BOUNDARY)
+        return body
+
+    def check(self, result):
+        data, files = result
+        self.assertEqual(data['name'], 'pulsar')
+        self.assertEqual(data.getall('numero'), ['1', '2'])
+        part = files['file']
+        self.assertEqual(part.filename, 'data.bin')
+        self.assertEqual(part.bytes(), self.fields[-1][1][1])
+        self.assertEqual(part.size, 2048)
+        return part
+
+    async def test_sync(self):
+        request = await self.request(self.body())
+        result = parse_form_data(request)
+        self.check(result)
+
+    async def test_chunks(self):
+        body = self.body()
+        for chunk in (1, 7, 13, 100, 4096):
+            request = await self.request(body, chunk)
+            self.check(await parse_form_data(request, chunk_size=64))
+
+    async def test_spool(self):
+        request = await self.request(self.body(), 100)
+        part = self.check(await parse_form_data(request, spool_size=1000))
+        self.assertTrue(part.file)
+        self.assertEqual(part.bytesio().read(), self.fields[-1][1][1])
+        part.close()
+
+    async def test_too_large(self):
+        request = await self.request(self.body(), 100)
+        cfg = request.cache.cfg
+        limit = cfg.stream_buffer
+        cfg.set('stream_buffer', 1000)
+        try:
+            parse = parse_form_data(request, stream=lambda part: None)
+            with self.assertRaises(HttpException) as error:
+                await parse
+        finally:
+            cfg.set('stream_buffer', limit)
+        self.assertEqual(error.exception.status, 403)
+
+    async def test_stream(self):
+        received = []
+
+        def stream(part):
+            received.append((part.name, part.recv(), part.complete()))
+
+        request = await self.request(self.body(), 500)
+        await parse_form_data(request, stream=stream)
+        data = b''.join(d for name, d, _ in received if name == 'file')
+        self.assertEqual(data, self.fields[-1][1][1])
+        self.assertEqual(received[-1], ('file', b'', True))
+
+    async def test_boundary_in_data(self):
+        value = '--%s is not\n--%sX a boundary\r\n' % (BOUNDARY, BOUNDARY)
+        fields = (('text', value), ('name', 'pulsar'))
+        for chunk in (None, 3):
+            request = await self.request(self.body(fields), chunk)
+            data, _ = await self.sync(parse_form_data(request))
+            self.assertEqual(data['text'], value)
+            self.assertEqual(data['name'], 'pulsar')
+
+    async def test_preamble_and_lf(self):
+        body = ('preamble\n--{0}\n'
+                'Content-Disposition: form-data; name="a"\n\n'
+                'foo\n--{0}\n'
+                'Content-Disposition: form-data; name="b"\n\n'
+                'bar\n--{0}--\nepilogue').format(BOUNDARY).encode('utf-8')
+        for chunk in (None, 2):
+            request = await self.request(body, chunk)
+            data, _ = await self.sync(parse_form_data(request))
+            self.assertEqual(dict(data), {'a': 'foo', 'b': 'bar'})
+
+    async def test_parts(self):
+        request = await self.request(self.body(), 300)
+        parts = []
+        async for part in request.multipart_parts(chunk_size=128):
+            if part.name == 'numero':
+                # not read
+                parts.append((part.name, None))
+                continue
+            chunks = []
+            async for chunk in part:
+                chunks.append(chunk)
+            parts.append((part.name, b''.join(chunks)))
+            self.assertEqual(await part.read(), b'')
+        self.assertEqual(parts, [('name', b'pulsar'),
+                                 ('numero', None),
+                                 ('numero', None),
+                                 ('file', self.fields[-1][1][1])])
+
+    async def sync(self, result):
+        if isinstance(result, tuple):
+            return result
+        return await result
+
+
+class TestHttpBodyReader(unittest.TestCase):
+
+    def reader(self, limit=2**16, high_water=100, **environ):
+        transport = mock.MagicMock()
+        transport.is_closing.return_value = False
+        stats = BodyReaderStats()
+        environ.setdefault('SERVER_PROTOCOL', 'HTTP/1.1')
+        return HttpBodyReader(transport, limit, environ,
+                              high_water=high_water, stats=stats)
+
+    async def test_backpressure(self):
+        reader = self.reader()
+        transport = reader.transport
+        reader.feed_data(b'x' * 150)
+        self.assertFalse(transport.pause_reading.called)
+        reader.feed_data(b'x' * 100)
+        self.assertEqual(transport.pause_reading.call_count, 1)
+        reader.feed_data(b'x' * 100)
+        self.assertEqual(transport.pause_reading.call_count, 1)
+        self.assertEqual(reader.paused, 1)
+        self.assertEqual(reader.stats.paused, 1)
+        self.assertEqual(len(await reader.read(200)), 200)
+        self.assertFalse(transport.resume_reading.called)
+        self.assertEqual(len(await reader.read(100)), 100)
+        self.assertEqual(transport.resume_reading.call_count, 1)
+        self.assertTrue(reader.paused_time > 0)
+        self.assertEqual(reader.stats.paused_time, reader.paused_time)
+        self.assertEqual(reader.stats.info()['paused'], 1)
+
+    async def test_read_limit(self):
+        reader = self.reader(limit=200)
+        reader.feed_data(b'x' * 150)
+        reader.feed_data(b'x' * 150)
+        reader.feed_eof()
+        with self.assertRaises(HttpException) as error:
+            await reader.read()
+        self.assertEqual(error.exception.status, 403)
+
+    async def test_content_length_limit(self):
+        reader = self.reader(limit=200, CONTENT_LENGTH='300',
+                             HTTP_EXPECT='100-continue')
+        with self.assertRaises(HttpException) as error:
+            reader.read()
+        self.assertEqual(error.exception.status, 403)
+        self.assertFalse(reader.transport.write.called)
+        with self.assertRaises(HttpException):
+            reader.readexactly(300)
+
+    async def test_read_all(self):
+        reader = self.reader()
+        reader.feed_data(b'x' * 250)
+        read = reader.read()
+        reader.feed_data(b'y' * 250)
+        reader.feed_eof()
+        self.assertEqual(await read, b'x' * 250 + b'y' * 250)
+        self.assertEqual(reader.paused, 1)
+
+    async def test_discard(self):
+        reader = self.reader()
+        reader.feed_data(b'x' * 250)
+        self.assertTrue(reader.transport.pause_reading.called)
+        reader.discard()
+        self.assertTrue(reader.transport.resume_reading.called)
+        reader.feed_data(b'x' * 250)
+        self.assertEqual(reader.paused, 1)
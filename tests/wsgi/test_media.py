@@ -0,0 +1,204 @@
+'''Tests range, conditional and cached responses of MediaRouter'''
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from pulsar.api import Http404
+from pulsar.apps.http import HttpWsgiClient
+from pulsar.apps.wsgi import MediaRouter, WsgiHandler
+from pulsar.apps.wsgi.routers import FileCache, parse_ranges
+
+
+class TestMediaRouter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.content = bytes(range(256)) * 40
+        with open(os.path.join(cls.path, 'data.bin'), 'wb') as file:
+            file.write(cls.content)
+        with open(os.path.join(cls.path, 'large.bin'), 'wb') as file:
+            file.write(cls.content * 10)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+
+    def client(self, **kw):
+        router = MediaRouter('/', self.path, **kw)
+        return router, HttpWsgiClient(WsgiHandler((router,)))
+
+    def test_parse_ranges(self):
+        self.assertEqual(parse_ranges('bytes=0-9', 100), [(0, 9)])
+        self.assertEqual(parse_ranges('bytes=90-', 100), [(90, 99)])
+        self.assertEqual(parse_ranges('bytes=-10', 100), [(90, 99)])
+        self.assertEqual(parse_ranges('bytes=-200', 100), [(0, 99)])
+        self.assertEqual(parse_ranges('bytes=0-0, 50-150', 100),
+                         [(0, 0), (50, 99)])
+        self.assertEqual(parse_ranges('bytes=100-200', 100), [])
+        self.assertEqual(parse_ranges('bytes=10-5', 100), None)
+        self.assertEqual(parse_ranges('bytes=a-5', 100), None)
+        self.assertEqual(parse_ranges('items=0-5', 100), None)
+
+    def test_parse_ranges_merge(self):
+        self.assertEqual(parse_ranges('bytes=50-59,0-9,10-19,55-65', 100),
+                         [(0, 19), (50, 65)])
+        self.assertEqual(parse_ranges('bytes=0-9,5-7', 100), [(0, 9)])
+        # too many ranges
+        self.assertEqual(parse_ranges('bytes=' + ','.join(
+            '%d-%d' % (n, n) for n in range(17)), 100), None)
+        self.assertEqual(parse_ranges('bytes=0-1,3-4', 100, max_ranges=1),
+                         None)
+        # ranges covering more than the resource
+        self.assertEqual(parse_ranges('bytes=0-,0-', 100), None)
+        self.assertEqual(parse_ranges('bytes=0-60,40-99', 100), None)
+
+    async def test_full_and_cached(self):
+        router, cli = self.client()
+        response = await cli.get('http://example.com/data.bin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.content)
+        self.assertEqual(response.headers['accept-ranges'], 'bytes')
+        self.assertTrue(os.path.join(self.path, 'data.bin') in router.cache)
+        response = await cli.get('http://example.com/large.bin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.content * 10)
+        self.assertEqual(len(router.cache), 1)
+
+    async def test_if_none_match(self):
+        router, cli = self.client()
+        response = await cli.get('http://example.com/data.bin')
+        etag = response.headers['etag']
+        response = await cli.get('http://example.com/data.bin',
+                                 headers=[('If-None-Match', etag)])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['etag'], etag)
+        response = await cli.get('http://example.com/data.bin',
+                                 headers=[('If-None-Match', '"xyz"')])
+        self.assertEqual(response.status_code, 200)
+
+    async def test_single_range(self):
+        for name, content in (('data.bin', self.content),
+                              ('large.bin', self.content * 10)):
+            router, cli = self.client()
+            response = await cli.get('http://example.com/%s' % name,
+                                     headers=[('Range', 'bytes=100-299')])
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.headers['content-range'],
+                             'bytes 100-299/%d' % len(content))
+            self.assertEqual(response.content, content[100:300])
+
+    async def test_range_not_satisfiable(self):
+        router, cli = self.client()
+        response = await cli.get('http://example.com/data.bin',
+                                 headers=[('Range', 'bytes=20000-')])
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers['content-range'],
+                         'bytes */%d' % len(self.content))
+
+    async def test_if_range(self):
+        router, cli = self.client()
+        response = await cli.get('http://example.com/data.bin',
+                                 headers=[('Range', 'bytes=0-9'),
+                                          ('If-Range', '"old"')])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.content)
+
+    async def test_multiple_ranges(self):
+        router, cli = self.client()
+        response = await cli.get('http://example.com/large.bin',
+                                 headers=[('Range', 'bytes=0-9,-5')])
+        self.assertEqual(response.status_code, 206)
+        ct = response.headers['content-type']
+        self.assertTrue(ct.startswith('multipart/byteranges; boundary='))
+        boundary = ct.split('=')[1].encode('utf-8')
+        body = response.content
+        self.assertEqual(len(body), int(response.headers['content-length']))
+        parts = body.split(b'--' + boundary)
+        self.assertEqual(parts[0], b'')
+        self.assertEqual(parts[-1], b'--\r\n')
+        size = len(self.content) * 10
+        head, data = parts[1].split(b'\r\n\r\n', 1)
+        self.assertTrue(b'Content-Range: bytes 0-9/%d' % size in head)
+        self.assertEqual(data, self.content[:10] + b'\r\n')
+        head, data = parts[2].split(b'\r\n\r\n', 1)
+        self.assertTrue(b'Content-Range: bytes %d-%d/%d' % (
+            size - 5, size - 1, size) in head)
+        self.assertEqual(data, self.content[-5:] + b'\r\n')
+
+    async def test_overlapping_ranges(self):
+        router, cli = self.client()
+        response = await cli.get('http://example.com/large.bin',
+                                 headers=[('Range', ','.join(['bytes=0-'] +
+                                                             ['0-']*100))])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.content * 10)
+        response = await cli.get('http://example.com/large.bin',
+                                 headers=[('Range', 'bytes=0-9,5-19')])
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['content-range'],
+                         'bytes 0-19/%d' % (len(self.content) * 10))
+        self.assertEqual(response.content, self.content[:20])
+
+    async def test_cache_invalidation(self):
+        path = os.path.join(self.path, 'changing.txt')
+        with open(path, 'wb') as file:
+            file.write(b'first')
+        router, cli = self.client(cache_interval=0)
+        response = await cli.get('http://example.com/changing.txt')
+        self.assertEqual(response.content, b'first')
+        with open(path, 'wb') as file:
+            file.write(b'second')
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        response = await cli.get('http://example.com/changing.txt')
+        self.assertEqual(response.content, b'second')
+        os.remove(path)
+        response = await cli.get('http://example.com/changing.txt')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(path in router.cache)
+
+    def test_cache_lru(self):
+        cache = FileCache(max_files=1)
+        cache.get(os.path.join(self.path, 'data.bin'))
+        self.assertEqual(len(cache), 1)
+        self.assertRaises(Http404, cache.get,
+                          os.path.join(self.path, 'missing'))
+        cache.get(os.path.join(self.path, 'large.bin'))
+        self.assertEqual(len(cache), 1)
+        cache = FileCache(max_files=1, max_file_size=2**20)
+        cache.get(os.path.join(self.path, 'data.bin'))
+        cache.get(os.path.join(self.path, 'large.bin'))
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(os.path.join(self.path, 'large.bin') in cache)
+
+    async def test_precompressed(self):
+        path = os.path.join(self.path, 'app.js')
+        for suffix, content in (('', b'plain'), ('.gz', b'gzip'),
+                                ('.br', b'brotli')):
+            with open(path + suffix, 'wb') as file:
+                file.write(content)
+        router, cli = self.client(cache_interval=0)
+        url = 'http://example.com/app.js'
+        response = await cli.get(url, headers=[('Accept-Encoding',
+                                                'gzip, br')])
+        self.assertEqual(response.headers['content-encoding'], 'br')
+        self.assertEqual(response.headers['vary'], 'Accept-Encoding')
+        self.assertTrue('javascript' in response.headers['content-type'])
+        self.assertEqual(response.content, b'brotli')
+        response = await cli.get(url, headers=[('Accept-Encoding',
+                                                'gzip;q=0.9, br;q=0.5')])
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        os.remove(path + '.gz')
+        response = await cli.get(url, headers=[('Accept-Encoding',
+                                                'gzip, deflate')])
+        self.assertFalse('content-encoding' in response.headers)
+        self.assertEqual(response.headers['vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, b'plain')
+        os.remove(path + '.br')
+        os.remove(path)
+        router, cli = self.client(precompressed=None)
+        response = await cli.get('http://example.com/data.bin',
+                                 headers=[('Accept-Encoding', 'gzip')])
+        self.assertFalse('vary' in response.headers)
@@ -0,0 +1,124 @@
+'''Tests response middleware in pulsar.apps.wsgi'''
+import zlib
+import asyncio
+import unittest
+
+from pulsar.api import create_future
+from pulsar.apps import wsgi
+from pulsar.apps.wsgi.response import negotiate_encoding, StreamCompressor
+
+
+def gunzip(data):
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+class TestGZipMiddleware(unittest.TestCase):
+    body = b'pulsar streaming compression ' * 100
+
+    def environ(self, accept='gzip, deflate'):
+        return {'HTTP_ACCEPT_ENCODING': accept}
+
+    def response(self, content, **kw):
+        return wsgi.WsgiResponse(200, content, content_type='text/plain',
+                                 **kw)
+
+    async def consume(self, response):
+        chunks = []
+        for chunk in response:
+            if not isinstance(chunk, bytes):
+                chunk = await chunk
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding(None), None)
+        self.assertEqual(negotiate_encoding('identity'), None)
+        self.assertEqual(negotiate_encoding('gzip, deflate',
+                                            ('gzip', 'deflate')), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0.5, deflate',
+                                            ('gzip', 'deflate')), 'deflate')
+        self.assertEqual(negotiate_encoding('*', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('*, br;q=0', ('br', 'gzip')),
+                         'gzip')
+        self.assertEqual(negotiate_encoding('GZIP;q=0.1', ('gzip',)),
+                         'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0', ('gzip',)), None)
+
+    def test_stream_compressor(self):
+        compressor = StreamCompressor('deflate')
+        data = compressor.compress(self.body[:100]) + compressor.flush()
+        self.assertEqual(zlib.decompressobj().decompress(data),
+                         self.body[:100])
+        data += compressor.compress(self.body[100:]) + compressor.finish()
+        self.assertEqual(zlib.decompress(data), self.body)
+
+    def test_not_available(self):
+        middleware = wsgi.GZipMiddleware()
+        response = self.response(b'short')
+        self.assertEqual(middleware(self.environ(), response), response)
+        self.assertEqual(response.content, (b'short',))
+        response = self.response(self.body)
+        middleware(self.environ('identity'), response)
+        self.assertEqual(response.content, (self.body,))
+        self.assertFalse('content-encoding' in response.headers)
+
+    def test_gzip(self):
+        middleware = wsgi.GZipMiddleware()
+        response = self.response(self.body)
+        middleware(self.environ(), response)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.headers['vary'], 'Accept-Encoding')
+        self.assertFalse(response.is_streamed())
+        self.assertEqual(gunzip(b''.join(response.content)), self.body)
+
+    def test_deflate(self):
+        middleware = wsgi.GZipMiddleware()
+        response = self.response(self.body)
+        middleware(self.environ('deflate'), response)
+        self.assertEqual(response.headers['content-encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(b''.join(response.content)),
+                         self.body)
+
+    async def test_streamed(self):
+        middleware = wsgi.GZipMiddleware()
+        chunks = [self.body[:1000], self.body[1000:]]
+        response = self.response(iter(chunks),
+                                 response_headers=[('content-length',
+                                                    len(self.body))])
+        middleware(self.environ(), response)
+        self.assertTrue(response.is_streamed())
+        self.assertFalse('content-length' in response.headers)
+        self.assertEqual(gunzip(await self.consume(response)), self.body)
+
+    async def test_streamed_awaitables(self):
+        middleware = wsgi.GZipMiddleware(executor_length=1000)
+
+        def chunks():
+            for start in range(0, len(self.body), 500):
+                future = create_future()
+                future.set_result(self.body[start:start+500])
+                yield future
+            yield self.body
+
+        response = self.response(chunks())
+        middleware(self.environ(), response)
+        decompress = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+        data = b''
+        for chunk in response:
+            if not isinstance(chunk, bytes):
+                chunk = await chunk
+                # awaited chunks are flushed
+                data += decompress(chunk)
+                self.assertTrue(data)
+                self.assertEqual(data, self.body[:len(data)])
+            else:
+                data += decompress(chunk)
+        self.assertEqual(data, self.body + self.body)
+
+    async def test_executor(self):
+        middleware = wsgi.GZipMiddleware(executor_length=1000)
+        response = self.response(self.body)
+        result = middleware(self.environ(), response)
+        self.assertTrue(asyncio.iscoroutine(result))
+        self.assertEqual(await result, response)
+        self.assertEqual(gunzip(b''.join(response.content)), self.body)
@@ -1,6 +1,8 @@
 import unittest
 
-from pulsar.apps.wsgi import Route
+from pulsar.api import MethodNotAllowed
+from pulsar.apps.wsgi import Route, Router, MediaRouter, route
+from pulsar.apps.wsgi.route import RouteTree
 
 
 class Routes(unittest.TestCase):
@@ -199,3 +201,117 @@ class Routes(unittest.TestCase):
         self.assertEqual(r.rule, '')
         self.assertEqual(r.url(), '/')
         self.assertEqual(r.path, '/')
+
+
+class Api(Router):
+
+    def get(self, request):
+        pass
+
+    @route('users/<int:id>')
+    def user(self, request):
+        pass
+
+    @route('users/new')
+    def new_user(self, request):
+        pass
+
+    @route('users/<id>/<any(posts, "comments"):what>/', method='post')
+    def user_items(self, request):
+        pass
+
+    @route('files/<path:path>/info')
+    def file_info(self, request):
+        pass
+
+    @route('rate/<float(max=5.0):rate>')
+    def rate(self, request):
+        pass
+
+
+class TestRouteTree(unittest.TestCase):
+    paths = ('/', '/users/5', '/users/new', '/users/foo', '/users/',
+             '/users/5/posts/', '/users/5/comments/', '/users/5/other/',
+             '/users/5/posts', '/files/a/b/info', '/files/info',
+             '/files//info', '/files/a/info/info', '/rate/4.5',
+             '/rate/6.0', '/rate/4', '/media/', '/media/a/b.txt',
+             '/media', '/missing', '/bla/', '/bla/x/y')
+
+    def router(self):
+        router = Api('/', MediaRouter('media', '.'))
+        leaf = Router('bla')
+        leaf.add_child(Router('<path:path>', get=lambda r: None))
+        router.add_child(Router('bla/', leaf))
+        return router
+
+    def resolve(self, router, path, method='get'):
+        try:
+            hnd = router._resolve(path[1:], method)
+        except MethodNotAllowed:
+            hnd = MethodNotAllowed
+        try:
+            hnd2 = router.resolve(path, method)
+        except MethodNotAllowed:
+            self.assertEqual(hnd, MethodNotAllowed)
+            return
+        self.assertNotEqual(hnd, MethodNotAllowed)
+        if hnd is None:
+            self.assertEqual(hnd2, None)
+        else:
+            self.assertEqual(hnd2.router, hnd.router)
+            self.assertEqual(hnd2.handler, hnd.handler)
+            self.assertEqual(hnd2.urlargs, hnd.urlargs)
+        return hnd2
+
+    def test_tree(self):
+        tree = RouteTree()
+        tree.add((Route('users/<int:id>'),), 'int')
+        tree.add((Route('users/'), Route('<id>')), 'string')
+        tree.add((Route('users/new'),), 'new')
+        tree.add((Route('media/<path:path>'),), 'media')
+        self.assertEqual(len(tree), 4)
+        self.assertEqual(tree.match('users/5'), ('int', {'id': 5}))
+        self.assertEqual(tree.match('users/new'), ('string', {'id': 'new'}))
+        self.assertEqual(tree.match('users/'), None)
+        self.assertEqual(tree.match('media/'), ('media', {'path': ''}))
+        self.assertEqual(tree.match('media/a/b'),
+                         ('media', {'path': 'a/b'}))
+        self.assertEqual(tree.match('media'), None)
+
+    def test_regex_rule(self):
+        tree = RouteTree()
+        self.assertRaises(ValueError, tree.add,
+                          (Route('a.b', is_re=True),), None)
+        tree.add((Route('a-b', is_re=True),), 'a-b')
+        self.assertEqual(tree.match('a-b'), ('a-b', {}))
+
+    def test_same_as_resolve(self):
+        router = self.router()
+        self.assertTrue(router.route_tree())
+        for path in self.paths:
+            for method in ('get', 'post'):
+                self.resolve(router, path, method)
+        child = router.get_route('user_items')
+        self.assertEqual(self.resolve(child, '/users/5/posts/', 'post')
+                         .urlargs, {'id': '5', 'what': 'posts'})
+
+    def test_rebuild(self):
+        router = self.router()
+        self.assertEqual(self.resolve(router, '/extra'), None)
+        tree = router.route_tree()
+        extra = Router('extra', get=lambda r: None)
+        router.add_child(extra)
+        self.assertNotEqual(router.route_tree(), tree)
+        self.assertEqual(self.resolve(router, '/extra').router, extra)
+        router.remove_child(extra)
+        self.assertEqual(self.resolve(router, '/extra'), None)
+
+    def test_not_compiled(self):
+        router = self.router()
+        router.add_child(Router('re.gex', get=lambda r: None))
+        router.add_child(Router(Route('a(b)?', is_re=True),
+                                get=lambda r: None))
+        self.assertEqual(router.route_tree(), None)
+        self.assertTrue(self.resolve(router, '/ab'))
+        for path in self.paths:
+            self.resolve(router, path)
@@ -1,14 +1,17 @@
 '''Tests the wsgi middleware in pulsar.apps.wsgi'''
+import os
 import time
 import pickle
 import unittest
 from unittest import mock
+from io import BytesIO
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 
 from pulsar.api import HttpRedirect
 from pulsar.apps import wsgi, http
 from pulsar.apps.test import test_wsgi_request
+from pulsar.apps.wsgi.wrappers import FileWrapper
 from pulsar.utils.lib import http_date
 
 
@@ -229,3 +232,29 @@ class WsgiRequestTests(unittest.TestCase):
         response = request.redirect('/foo2', permanent=True)
         self.assertEqual(response.status_code, 301)
         self.assertEqual(response['location'], '/foo2')
+
+    async def test_file_wrapper(self):
+        with open(__file__, 'rb') as file:
+            content = file.read()
+            file.seek(10)
+            wrapper = FileWrapper(file, 2**16)
+            self.assertEqual(wrapper.fileno(), file.fileno())
+            chunks = list(wrapper)
+            self.assertEqual(len(chunks), 1)
+            self.assertEqual(await chunks[0], content[10:])
+
+    async def test_file_wrapper_pipe(self):
+        r, w = os.pipe()
+        os.write(w, b'hello pipe')
+        os.close(w)
+        with open(r, 'rb') as file:
+            wrapper = FileWrapper(file)
+            chunks = [await chunk for chunk in wrapper]
+        self.assertEqual(chunks, [b'hello pipe'])
+
+    async def test_file_wrapper_in_memory(self):
+        wrapper = FileWrapper(BytesIO(b'x'*100000))
+        self.assertEqual(wrapper.fileno(), None)
+        self.assertEqual(wrapper.block, 2**20)
+        chunks = [await chunk for chunk in wrapper]
+        self.assertEqual(chunks, [b'x'*100000])